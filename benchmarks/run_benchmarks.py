@@ -0,0 +1,187 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+
+import charts.draw_descriptive_charts as dwdesc
+import charts.draw_statistical_charts as dwstat
+import charts.render as render
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import write_team, write_workbook
+from parsing.batch import run_batch
+from parsing.main import open_stats, read_stats
+from parsing.weekly_engine import derive_weekly_summary
+from utils.features import FEATURES, FeatureStore
+
+# a stage is flagged when it gets this much slower than the baseline
+REGRESSION_TOLERANCE = 1.25
+# stages faster than this are timer noise, never flagged
+MIN_REGRESSION_S = 0.01
+
+
+def measure(func, repeat=3):
+    """
+    Best-of-`repeat` wall and CPU time, plus peak traced memory of one extra run.
+    """
+    walls, cpus = [], []
+    for _ in range(repeat):
+        w0, c0 = time.perf_counter(), time.process_time()
+        func()
+        walls.append(time.perf_counter() - w0)
+        cpus.append(time.process_time() - c0)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall_s": min(walls), "cpu_s": min(cpus), "peak_mb": peak / 2**20}
+
+
+def _render(chart, data):
+    def run():
+        figs = render.as_figures(chart(data))
+        for fig in figs:
+            fig.savefig(io.BytesIO(), format="png")
+            plt.close(fig)
+    return run
+
+
+def _all_features(df, log):
+    def run():
+        store = FeatureStore(df, log=log)
+        for name in FEATURES:
+            store[name]
+    return run
+
+
+def stages(file, workdir):
+    """
+    (stage, name, callable) for one workbook. Inputs of later stages are
+    prepared here, outside the timed callables.
+    """
+    sheets = read_stats(file)
+    weekly = sheets['Weekly Calendar summary']
+    log = sheets['Full Calendar Log']
+    df = dwstat.compute_fatigue_proxy(weekly)
+    store = FeatureStore(df, log=log)
+    cache_dir = os.path.join(workdir, "cache")
+    open_stats(file, cache_dir=cache_dir)    # warm the cache
+
+    yield "load", "read_stats", lambda: read_stats(file)
+    yield "load", "open_stats_cached", lambda: open_stats(file, cache_dir=cache_dir)
+    yield "derive", "compute_fatigue_proxy", lambda: dwstat.compute_fatigue_proxy(weekly)
+    yield "derive", "feature_store_all", _all_features(df, log)
+    yield "aggregate", "prepare_totals_weekly", lambda: dwdesc.prepare_totals(weekly, dwdesc.muscle_groups, "W")
+    yield "aggregate", "prepare_totals_quarterly", lambda: dwdesc.prepare_totals(weekly, dwdesc.muscle_groups, "Q")
+    yield "aggregate", "derive_weekly_summary", lambda: derive_weekly_summary(log)
+    for name, chart in render.CHARTS.items():
+        yield "render", name, _render(chart, store)
+
+
+def run_benchmarks(years_list=(1, 5, 20), athletes=1, repeat=3, seed=0, render_charts=True):
+    """
+    Time and memory-profile every stage on synthetic workbooks of growing history.
+    Returns a JSON-serializable dict.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for years in years_list:
+            file = os.path.join(workdir, f"synthetic_{years}y.xlsx")
+            log_rows, weekly_rows = write_workbook(file, years, seed=seed)
+            size = {"years": years, "log_rows": log_rows, "weekly_rows": weekly_rows}
+
+            for stage, name, func in stages(file, workdir):
+                if stage == "render" and not render_charts:
+                    continue
+                try:
+                    stats = measure(func, repeat)
+                except Exception as exc:
+                    stats = {"error": repr(exc)}
+                results.append({"stage": stage, "name": name, **size, **stats})
+                print(f"{years:>5}y {stage:<10}{name:<28}"
+                      + (f"{stats['wall_s']:9.4f}s {stats['peak_mb']:8.1f} MB" if "error" not in stats
+                         else stats["error"]), flush=True)
+
+            if athletes > 1:
+                team_dir = os.path.join(workdir, f"team_{years}y")
+                write_team(team_dir, athletes, years, seed=seed)
+                out_dir = os.path.join(workdir, "reports")
+                stats = measure(lambda: run_batch(team_dir, output_dir=out_dir), repeat=1)
+                results.append({"stage": "batch", "name": f"run_batch_{athletes}_athletes", **size, **stats})
+                print(f"{years:>5}y {'batch':<10}{athletes:>3} athletes{'':<18}{stats['wall_s']:9.4f}s", flush=True)
+
+    return {"meta": _meta(repeat, seed), "results": results}
+
+
+def _meta(repeat, seed):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "repeat": repeat,
+        "seed": seed,
+    }
+
+
+def compare(current, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Stages whose wall time grew by more than `tolerance` x versus the baseline.
+    """
+    def key(r):
+        return r["stage"], r["name"], r["years"]
+
+    before = {key(r): r for r in baseline["results"] if "wall_s" in r}
+    regressions = []
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old and "wall_s" in r and r["wall_s"] > max(old["wall_s"] * tolerance, MIN_REGRESSION_S):
+            regressions.append({**r, "baseline_wall_s": old["wall_s"], "ratio": r["wall_s"] / old["wall_s"]})
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark load / derive / aggregate / render stages.")
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--athletes", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-render", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results file to check for regressions")
+    args = parser.parse_args()
+
+    current = run_benchmarks(args.years, args.athletes, args.repeat, args.seed, not args.no_render)
+    with open(args.output, "w") as fh:
+        json.dump(current, fh, indent=1)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(current, json.load(fh))
+        for r in regressions:
+            print(f"REGRESSION {r['stage']}/{r['name']} ({r['years']}y): "
+                  f"{r['baseline_wall_s']:.4f}s -> {r['wall_s']:.4f}s (x{r['ratio']:.2f})")
+        sys.exit(1 if regressions else 0)
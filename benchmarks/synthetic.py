@@ -0,0 +1,154 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from parsing.weekly_engine import derive_weekly_summary
+
+LOG_HEADER = [
+    "Group", "Exercise", "Where", "Day",
+    "Warm up set Series", "Warm up set Reps", "Warm up set kg",
+    "Intermediate set Series", "Intermediate set Reps", "Intermediate set kg",
+    "Heavy set Series", "Heavy set Reps", "Heavy set kg",
+    "Volume set Series", "Volume set Reps", "Volume set kg",
+    "Total", "Weight", "Date", "Week", "Cycle", "Day", "Type", "Where", "Duration mins", "Notes",
+]
+
+WEEKLY_HEADER = [
+    "Year", "Week", "Yearweek", "Weight avg kg", "Mins gym", "Weekly total cal surplus (deficit)",
+    "Projected weight kg", "kcals daily avg", "Proteins daily avg", "Resting energy kcal",
+    "Active energy kcal", "Totals kg", "Leg kg", "Chest kg", "Back kg", "Shoulders kg", "Biceps kg",
+    "Core kg", "Leg sets", "Chest sets", "Back sets", "Shoulders sets", "Biceps sets", "Core sets",
+    "Mins run", "km run", "Min total", "Hours total",
+]
+
+# (group, exercise, typical kg) as found in the real log
+EXERCISES = [
+    ("Leg", "Squat", 36), ("Leg", "Deadlift", 36), ("Leg", "Barbell lounges", 28),
+    ("Leg", "Hip thrust", 36), ("Leg", "Calf", 1),
+    ("Chest", "Dips", 69), ("Chest", "Pushups strict", 22.77),
+    ("Back", "Dumbell row", 44), ("Back", "Pull-ups", 69),
+    ("Shoulders", "Overhead press", 24), ("Shoulders", "Dumbell lateralraise", 10),
+    ("Biceps", "Overhead press", 36), ("Tríceps", "Skull crasher TRX", 22.77),
+    ("Core", "Leg raise", 1), ("Core", "Rings support", 1),
+]
+SESSION_NOTES = ["Leg day", "Upper body", None]
+
+
+def _as_read(header):
+    """
+    Column names as pandas reads them: repeated headers get '.1', '.2', ...
+    """
+    seen = {}
+    names = []
+    for name in header:
+        names.append(f"{name}.{seen[name]}" if name in seen else name)
+        seen[name] = seen.get(name, 0) + 1
+    return names
+
+
+def synthetic_log(years, start="2015-01-05", seed=0, sessions_per_week=3.5, exercises_per_session=10):
+    """
+    Daily Full Calendar Log with the real column layout (duplicated 'Day'/'Where' headers).
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start, periods=int(years * 365.25), freq="D")
+    train = days[rng.random(len(days)) < sessions_per_week / 7]
+
+    n_ex = rng.poisson(exercises_per_session, len(train)).clip(3, 20)
+    dates = np.repeat(train.to_numpy(), n_ex)
+    n = len(dates)
+
+    pick = rng.integers(0, len(EXERCISES), n)
+    group = np.array([e[0] for e in EXERCISES], dtype=object)[pick]
+    exercise = np.array([e[1] for e in EXERCISES], dtype=object)[pick]
+    base_kg = np.array([e[2] for e in EXERCISES], dtype=float)[pick]
+
+    series = rng.integers(2, 7, n)
+    reps = rng.integers(3, 21, n)
+    kg = np.round(base_kg * rng.uniform(0.8, 1.3, n), 2)
+    weight = np.round(70 + np.cumsum(rng.normal(0, 0.05, len(days))), 1)
+
+    day_index = (dates - days[0].to_datetime64()).astype("timedelta64[D]").astype(int)
+    session = np.repeat(np.arange(len(train)), n_ex)
+    duration = rng.integers(45, 120, len(train))[session]
+
+    empty = np.full(n, np.nan)
+    columns = [
+        group, exercise, np.full(n, "Home", dtype=object), rng.choice(["1", "2", "3", "1, 2, 3"], n).astype(object),
+        empty, empty, empty, empty, empty, empty, empty, empty, empty,
+        series, reps, kg,
+        series * reps * kg, weight[day_index], dates,
+        ((day_index // 7) % 12) + 1, np.full(n, "Maintenance", dtype=object),
+        pd.DatetimeIndex(dates).dayofweek.to_numpy() + 1,
+        np.where(rng.random(n) < 0.2, "Main", "Accessory").astype(object),
+        np.full(n, "Ulignano", dtype=object), duration,
+        np.array(SESSION_NOTES, dtype=object)[session % len(SESSION_NOTES)],
+    ]
+    log = pd.DataFrame(dict(enumerate(columns)))
+    log.columns = LOG_HEADER
+    return log
+
+
+def synthetic_weekly(log, seed=0):
+    """
+    Weekly Calendar summary consistent with the log, plus plausible energy columns.
+    """
+    rng = np.random.default_rng(seed + 1)
+    named = log.copy()
+    named.columns = _as_read(LOG_HEADER)
+    weekly = derive_weekly_summary(named)
+    n = len(weekly)
+
+    resting = rng.normal(1800, 15, n).round()
+    active = rng.normal(900, 120, n).round()
+    kcals = (resting + active + rng.normal(0, 250, n)).round() / 1000
+    weekly["Resting energy kcal"] = resting
+    weekly["Active energy kcal"] = active
+    weekly["kcals daily avg"] = kcals
+    weekly["Proteins daily avg"] = rng.normal(135, 8, n).round()
+    weekly["Weekly total cal surplus (deficit)"] = (7 * (kcals * 1000 - resting - active)).round()
+    weekly["Projected weight kg"] = weekly["Weight avg kg"] + weekly["Weekly total cal surplus (deficit)"] / 7700
+    weekly["Mins run"] = rng.integers(0, 240, n).astype(float)
+    weekly["km run"] = (weekly["Mins run"] / rng.uniform(5, 7, n)).round(2)
+    weekly["Min total"] = weekly["Mins gym"] + weekly["Mins run"]
+    weekly["Hours total"] = weekly["Min total"] / 60
+    return weekly[WEEKLY_HEADER]
+
+
+def write_workbook(file, years, seed=0):
+    """
+    Write one synthetic athlete workbook; returns (log rows, weekly rows).
+    """
+    log = synthetic_log(years, seed=seed)
+    weekly = synthetic_weekly(log, seed=seed)
+    with pd.ExcelWriter(file, engine="openpyxl") as writer:
+        log.to_excel(writer, sheet_name="Full Calendar Log", index=False)
+        weekly.to_excel(writer, sheet_name="Weekly Calendar summary", index=False)
+    return len(log), len(weekly)
+
+
+def write_team(directory, athletes, years, seed=0):
+    """
+    One workbook per athlete (athlete_000.xlsx, ...) in `directory`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(athletes):
+        file = os.path.join(directory, f"athlete_{i:03d}.xlsx")
+        write_workbook(file, years, seed=seed + i)
+        files.append(file)
+    return files
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic fitness_stats workbooks.")
+    parser.add_argument("directory")
+    parser.add_argument("--athletes", type=int, default=1)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for f in write_team(args.directory, args.athletes, args.years, args.seed):
+        print(f)
@@ -1,6 +1,11 @@
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
+
+from charts.labels import ABOVE, CENTER, LabelPlacer
+from charts.lod import bar_layer, label_step, line, period_axis, use_lod
+from charts.overlays import changepoint_overlay, changepoint_ticks
+from utils.features import as_feature_store
+from utils.profiling import traced
 
 EXTENDED_PALETTE = [
     "#9ecae1",  # light blue 
@@ -23,6 +28,7 @@ palette = {
     "Core tons": "#8c564b"
 }
 
+@traced("layout")
 def label_line_points_smart(
     fig,
     ax_line,
@@ -40,6 +46,8 @@ def label_line_points_smart(
     """
     Add line-point labels while avoiding overlap with bar labels.
     Tries above the point, then below; hides label if both collide.
+    Collisions are checked against every bar and label (see charts/labels.py),
+    so call it once the figure layout is final.
 
     Parameters
     ----------
@@ -49,7 +57,7 @@ def label_line_points_smart(
     ax_bar : matplotlib.axes.Axes
         Axis containing the bar plot
     x_values : iterable
-        X positions (same order as bars and line values)
+        Numeric X positions (same order as bars and line values)
     line_values : iterable
         Y values of the line
     bars : matplotlib.container.BarContainer
@@ -66,51 +74,42 @@ def label_line_points_smart(
         Pixel offset applied when shifting label up/down
     """
 
-    fig.canvas.draw()
+    placer = LabelPlacer(fig)
+
+    # bar tops are obstacles: a label closer than min_pixel_distance is moved/hidden
+    bar_x = [bar.get_x() + bar.get_width() / 2 for bar in bars]
+    bar_top = [bar.get_height() for bar in bars]
+    if len(bars):
+        (x0, _), (x1, _) = ax_bar.transData.transform([(0, 0), (bars[0].get_width(), 0)])
+        placer.add_obstacles(ax_bar, bar_x, bar_top, abs(x1 - x0), 2 * min_pixel_distance)
+
+    offset_pt = pixel_offset * 72 / fig.dpi
+    line_values = list(line_values)
+    placer.add(
+        ax_line,
+        x_values,
+        line_values,
+        [fmt.format(y) for y in line_values],
+        candidates=[(0, offset_pt, "center", "bottom"), (0, -offset_pt, "center", "top")],
+        fontsize=fontsize,
+        color=color
+    )
 
-    for x, y, bar in zip(x_values, line_values, bars):
+    return placer.place()
 
-        # bar top (pixel coords)
-        bar_top_disp = ax_bar.transData.transform(
-            (bar.get_x() + bar.get_width() / 2, bar.get_height())
-        )
+@traced("chart")
+def draw_weekly_weight_kcals(df, lod=None, changepoints=True):
+    """
+    Stacked daily energy (resting / active / surplus) per week with the weight lines.
+    lod: None switches to level-of-detail drawing for long histories (see charts/lod.py).
+    changepoints: mark weight plateaus / step changes (see utils/changepoints.py).
+    """
+    # rolling means come from the feature store (or the incremental frame) instead of being recomputed
+    df = as_feature_store(df).frame([
+        "Yearweek", "kcals daily avg", "Resting energy kcal", "Active energy kcal",
+        "Weight avg kg", "Weight_rolling4", "kcals_rolling4",
+    ])
 
-        # line point (pixel coords)
-        line_disp = ax_line.transData.transform((x, y))
-
-        # try ABOVE
-        above_disp_y = line_disp[1] + pixel_offset
-        if abs(above_disp_y - bar_top_disp[1]) >= min_pixel_distance:
-            ax_line.annotate(
-                fmt.format(y),
-                (x, y),
-                xytext=(0, pixel_offset),
-                textcoords="offset pixels",
-                ha="center",
-                va="bottom",
-                fontsize=fontsize,
-                color=color
-            )
-            continue
-
-        # try BELOW
-        below_disp_y = line_disp[1] - pixel_offset
-        if abs(below_disp_y - bar_top_disp[1]) >= min_pixel_distance:
-            ax_line.annotate(
-                fmt.format(y),
-                (x, y),
-                xytext=(0, -pixel_offset),
-                textcoords="offset pixels",
-                ha="center",
-                va="top",
-                fontsize=fontsize,
-                color=color
-            )
-            continue
-
-        # else: skip label (collision both ways)
-
-def draw_weekly_weight_kcals(df):
     # --------------------------
     # COLORS (same hue, different intensity)
     # --------------------------
@@ -138,17 +137,14 @@ def draw_weekly_weight_kcals(df):
     # surplus / deficit (can be negative)
     df["Energy_surplus_k"] = df["kcals daily avg"] - (df["Resting_k"] + df["Active_k"])
 
-    # rolling averages
-    df["Weight_rolling4"] = df["Weight avg kg"].rolling(4, min_periods=1).mean()
-    df["kcals_rolling4"] = df["kcals daily avg"].rolling(4, min_periods=1).mean()
-
     # --------------------------
     # FIGURE / AXES
     # --------------------------
     fig, ax1 = plt.subplots(figsize=(12, 5))
     ax2 = ax1.twinx()
 
-    x = df["Yearweek"].astype(str)
+    lod = use_lod(len(df), lod)
+    x = np.arange(len(df))
 
     # --------------------------
     # STACKED BARS
@@ -157,10 +153,12 @@ def draw_weekly_weight_kcals(df):
     bottom_neg = np.zeros(len(df))
 
     # Resting (always positive)
-    bars_rest = ax1.bar(
+    bar_layer(
+        ax1,
         x,
         df["Resting_k"],
-        bottom=bottom_pos,
+        bottom_pos,
+        lod,
         label="Resting energy kcal",
         color=resting_color,
         alpha=0.9
@@ -168,10 +166,12 @@ def draw_weekly_weight_kcals(df):
     bottom_pos += df["Resting_k"]
 
     # Active (always positive, lighter)
-    bars_active = ax1.bar(
+    bar_layer(
+        ax1,
         x,
         df["Active_k"],
-        bottom=bottom_pos,
+        bottom_pos,
+        lod,
         label="Active energy kcal",
         color=active_color,
         alpha=0.55
@@ -182,66 +182,64 @@ def draw_weekly_weight_kcals(df):
     surplus_pos = df["Energy_surplus_k"].clip(lower=0)
     surplus_neg = df["Energy_surplus_k"].clip(upper=0)
 
-    bars_surplus_pos = ax1.bar(
+    bar_layer(
+        ax1,
         x,
         surplus_pos,
-        bottom=bottom_pos,
+        bottom_pos,
+        lod,
         label="Surplus / deficit kcal",
         color=neutral_color,
         alpha=0.8
     )
 
-    bars_surplus_neg = ax1.bar(
+    bar_layer(
+        ax1,
         x,
         surplus_neg,
-        bottom=bottom_neg,
+        bottom_neg,
+        lod,
         color=neutral_color,
         alpha=0.8
     )
 
     # ---------------------------------------
     # SEGMENT LABELS (inside stacks + on top)
+    # placed together with the totals once the layout is final;
+    # long histories only keep every step-th total
     # --------------------------------------
-    def label_segments(ax, bars, values, totals, min_frac=0.06):
-        for bar, val, total in zip(bars, values, totals):
-            if total > 0 and abs(val) / total >= min_frac:
-                ax.text(
-                    bar.get_x() + bar.get_width() / 2,
-                    bar.get_y() + bar.get_height() / 2,
-                    f"{val:.1f}",
-                    ha="center",
-                    va="center",
-                    fontsize=7,
-                    color="white"
-                )
-    def label_totals_on_top(ax, x, totals, y_offset_frac=0.015, fontsize=7):
-        y_min, y_max = ax.get_ylim()
-        y_offset = (y_max - y_min) * y_offset_frac
-    
-        for xi, total in zip(x, totals):
-            ax.text(
-                xi,
-                total + y_offset,
-                f"{total:.2f}",
-                ha="center",
-                va="bottom",
-                fontsize=fontsize,
-                color="grey"
-            )            
-
-    
-    totals_k = df["kcals daily avg"]
+    placer = LabelPlacer(fig)
+    totals_k = df["kcals daily avg"].to_numpy()
+    step = label_step(len(df), lod)
+
+    def label_segments(bottoms, values, min_frac=0.06):
+        if lod:
+            return
+        values = np.asarray(values, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            keep = (totals_k > 0) & (np.abs(values) / totals_k >= min_frac)
+        placer.add(
+            ax1,
+            x[keep],
+            (np.asarray(bottoms, dtype=float) + values / 2)[keep],
+            [f"{v:.1f}" for v in values[keep]],
+            candidates=CENTER,
+            fontsize=7,
+            color="white"
+        )
 
-    label_segments(ax1, bars_rest, df["Resting_k"], totals_k)
-    label_segments(ax1, bars_active, df["Active_k"], totals_k)
-    label_segments(ax1, bars_surplus_pos, surplus_pos, totals_k)
+    label_segments(0, df["Resting_k"])
+    label_segments(df["Resting_k"], df["Active_k"])
+    label_segments(df["Resting_k"] + df["Active_k"], surplus_pos)
 
     # --------------------------
     # KCALS MOVING AVERAGE
     # --------------------------
-    ax1.plot(
+    line(
+        ax1,
         x,
         df["kcals_rolling4"],
+        lod,
         color=resting_color,
         linewidth=1.3,
         label="kcals 4-wk MA"
@@ -250,22 +248,32 @@ def draw_weekly_weight_kcals(df):
     # --------------------------
     # WEIGHT LINES (SECOND AXIS)
     # --------------------------
-    ax2.plot(
+    line(
+        ax2,
         x,
         df["Weight avg kg"],
+        lod,
         marker="o",
         color=line_color,
         label="Weight avg kg"
     )
 
-    ax2.plot(
+    line(
+        ax2,
         x,
         df["Weight_rolling4"],
+        lod,
         linestyle="--",
         color=line_movingavg_color,
         label="Weight 4-wk MA"
     )
 
+    # --------------------------
+    # WEIGHT CHANGE POINTS
+    # --------------------------
+    if changepoints:
+        changepoint_overlay(ax2, x, df["Weight avg kg"], color=line_color, label="Weight change point")
+
     # --------------------------
     # Y-LIMITS (CORRECT FOR STACKED + NEGATIVE)
     # --------------------------
@@ -278,8 +286,17 @@ def draw_weekly_weight_kcals(df):
     # --------------------------
     # TOTAL LABELS ON TOP
     # --------------------------
-    total_stack = df["Resting_k"] + df["Active_k"] + surplus_pos
-    label_totals_on_top(ax1, x, total_stack)
+    total_stack = (df["Resting_k"] + df["Active_k"] + surplus_pos).to_numpy()
+    placer.add(
+        ax1,
+        x[::step],
+        total_stack[::step],
+        [f"{t:.2f}" for t in total_stack[::step]],
+        candidates=ABOVE,
+        priority=1,
+        fontsize=7,
+        color="grey"
+    )
 
     # --------------------------
     # AXES & LAYOUT
@@ -287,7 +304,7 @@ def draw_weekly_weight_kcals(df):
     ax1.set_ylabel("Daily energy kcal")
     ax2.set_ylabel("Weight avg kg")
 
-    ax1.tick_params(axis="x", rotation=45, labelsize=8)
+    period_axis(ax1, df["Yearweek"], lod)
     ax1.grid(axis="y", alpha=0.2)
 
     ax1.set_title("Daily Energy Breakdown (Resting / Active / Surplus) vs Weight")
@@ -296,82 +313,82 @@ def draw_weekly_weight_kcals(df):
     ax2.legend(loc="upper right", fontsize=8)
 
     plt.tight_layout()
+    placer.place()
+
+    return fig
 
 # --------------------------
 # Helper 1: Prepare totals
 # --------------------------
 def prepare_totals(df, muscle_groups, freq="W"):
     """
-    Aggregates totals by week ('W') or quarter ('Q').
-    Returns a new dataframe with aggregated muscle groups and total.
+    Totals by week ('W'), month ('M'), quarter ('Q') or year ('Y'), read from the
+    feature store's aggregation cube. Returns the muscle group sums, a Period
+    label and the total.
     """
-    df_copy = df.copy()
-    if freq == "Q":
-        # Assume df has Yearweek in ISO week format: convert to datetime first
-        df_copy["Date"] = df_copy["Yearweek"].apply(lambda yw: pd.to_datetime(f"{str(yw)[:4]}-W{int(str(yw)[4:]):02d}-1", format="%G-W%V-%u"))
-        df_copy = df_copy.set_index("Date").resample("QE").sum()
-        # Quarter label for x-axis
-        df_copy["Period"] = df_copy.index.to_period("Q").astype(str)
-    else:
-        # Weekly
-        df_copy["Period"] = df_copy["Yearweek"].astype(str)
-    
+    cube = as_feature_store(df).cube
+    totals = cube.sum(freq, muscle_groups).copy()
+    # week labels are Yearweek codes, the other levels '2025-03', '2025Q1', '2025'
+    totals["Period"] = cube.labels(freq)
+
     # Compute total
-    df_copy["Totals tons"] = df_copy[muscle_groups].sum(axis=1)
-    
-    return df_copy
+    totals["Totals tons"] = totals[muscle_groups].sum(axis=1)
+
+    return totals
 
 # --------------------------
 # Helper 2: Plot stacked bars
 # --------------------------
-def plot_stacked_bars(df, muscle_groups, palette, title_suffix=""):
+@traced("chart")
+def plot_stacked_bars(df, muscle_groups, palette, title_suffix="", lod=None, changepoints=True):
     """
     Plots absolute and normalized stacked bar charts for a given dataframe.
+    Above LOD_THRESHOLD periods (or with lod=True) each layer is one collection,
+    segment labels are dropped and the totals line / labels are decimated.
+    With changepoints, volume step changes of the total are marked with lines
+    and segment means, those of each muscle group with triangles on top.
     """
-    x = df["Period"].astype(str)
+    lod = use_lod(len(df), lod)
+    x = np.arange(len(df))
     
     # Colors
     colors = [palette[mg] for mg in muscle_groups]
     
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14,10))
     
+    placer = LabelPlacer(fig)
+    totals = df["Totals tons"].to_numpy()
+    step = label_step(len(df), lod)
+
     # --- Absolute stacked bars ---
     bottom = np.zeros(len(df))
     for mg, color in zip(muscle_groups, colors):
-        bars = ax1.bar(x, df[mg], bottom=bottom, label=mg, color=color, alpha=0.85)
-        for bar, val, total in zip(bars, df[mg], df["Totals tons"]):
-            if total > 0 and val / total >= 0.05 and val > 0:
-                ax1.text(
-                    bar.get_x() + bar.get_width()/2,
-                    bar.get_y() + val/2,
-                    f"{val:.1f}",
-                    ha="center",
-                    va="center",
-                    fontsize=6,
-                    color="white"
-                )
-        bottom += df[mg]
+        values = df[mg].to_numpy()
+        bar_layer(ax1, x, values, bottom, lod, label=mg, color=color, alpha=0.85)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            keep = (totals > 0) & (values / totals >= 0.05) & (values > 0) & (not lod)
+        placer.add(ax1, x[keep], (bottom + values / 2)[keep], [f"{v:.1f}" for v in values[keep]],
+                   candidates=CENTER, fontsize=6, color="white")
+        bottom += values
     
     # --- Total tons line ---
     line_values = df["Totals tons"].values
-    ax1.plot(x, line_values, color="grey", marker="o", label="Total tons", linewidth=0.75)
-    for xi, total in zip(x, line_values):
-        if total > 0:
-            ax1.text(
-                xi,
-                total + 0.5,
-                f"{total:.1f}",
-                ha="center",
-                va="bottom",
-                fontsize=7,
-                color="grey"
-            )
+    line(ax1, x, line_values, lod, color="grey", marker="o", label="Total tons", linewidth=0.75)
+    keep = (line_values > 0) & (x % step == 0)
+    placer.add(ax1, x[keep], line_values[keep], [f"{t:.1f}" for t in line_values[keep]],
+               candidates=ABOVE, priority=1, fontsize=7, color="grey")
+
+    # --- Volume change points ---
+    if changepoints:
+        changepoint_overlay(ax1, x, line_values, color="grey", label="Volume change point")
+        for mg, color in zip(muscle_groups, colors):
+            changepoint_ticks(ax1, x, df[mg], color)
     
     ax1.set_ylabel("Weight lifted (tons)")
     ax1.set_title(f"Absolute Weekly Muscle Group Volume {title_suffix}")
     ax1.grid(axis="y", alpha=0.2)
     ax1.legend(loc="upper left", fontsize=8)
-    ax1.tick_params(axis='x', rotation=45, labelsize=8)
+    period_axis(ax1, df["Period"], lod)
     ax1.set_ylim(0, df["Totals tons"].max()*1.1)
     ax1.margins(y=0.05)
     
@@ -379,19 +396,12 @@ def plot_stacked_bars(df, muscle_groups, palette, title_suffix=""):
     normalized = df[muscle_groups].div(df["Totals tons"], axis=0)
     bottom = np.zeros(len(df))
     for mg, color in zip(muscle_groups, colors):
-        bars = ax2.bar(x, normalized[mg], bottom=bottom, label=mg, color=color, alpha=0.85)
-        for bar, val in zip(bars, normalized[mg]):
-            if val >= 0.05:
-                ax2.text(
-                    bar.get_x() + bar.get_width()/2,
-                    bar.get_y() + val/2,
-                    f"{val*100:.0f}%",
-                    ha="center",
-                    va="center",
-                    fontsize=6,
-                    color="white"
-                )
-        bottom += normalized[mg]
+        values = normalized[mg].to_numpy()
+        bar_layer(ax2, x, values, bottom, lod, label=mg, color=color, alpha=0.85)
+        keep = (values >= 0.05) & (not lod)
+        placer.add(ax2, x[keep], (bottom + values / 2)[keep], [f"{v*100:.0f}%" for v in values[keep]],
+                   candidates=CENTER, fontsize=6, color="white")
+        bottom += values
     
     ax2.set_ylabel("Relative contribution (%)")
     ax2.set_title(f"Normalized Muscle Group Volume {title_suffix}")
@@ -399,17 +409,27 @@ def plot_stacked_bars(df, muscle_groups, palette, title_suffix=""):
     ax2.legend(loc="upper left", fontsize=8)
     ax2.set_ylim(0, 1.05)
     ax2.margins(y=0.02)
-    plt.xticks(rotation=45, size=8)
+    period_axis(ax2, df["Period"], lod)
     plt.subplots_adjust(top=0.92, bottom=0.12, left=0.02, right=0.98, hspace=0.35)
+    placer.place()
+
+    return fig
     
 # --------------------------
 # Main function
 # --------------------------
-def draw_weekly_and_quarterly_lift_charts(df):
-    # --- Weekly chart ---
+@traced("chart")
+def draw_weekly_lift_chart(df, lod=None, changepoints=True):
     df_weekly = prepare_totals(df, muscle_groups, freq="W")
-    plot_stacked_bars(df_weekly, muscle_groups, palette, title_suffix="(Weekly)")
-    
-    # --- Quarterly chart ---
+    return plot_stacked_bars(df_weekly, muscle_groups, palette, title_suffix="(Weekly)", lod=lod,
+                             changepoints=changepoints)
+
+@traced("chart")
+def draw_quarterly_lift_chart(df, lod=None, changepoints=True):
     df_quarterly = prepare_totals(df, muscle_groups, freq="Q")
-    plot_stacked_bars(df_quarterly, muscle_groups, palette, title_suffix="(Quarterly)")
\ No newline at end of file
+    return plot_stacked_bars(df_quarterly, muscle_groups, palette, title_suffix="(Quarterly)", lod=lod,
+                             changepoints=changepoints)
+
+@traced("chart")
+def draw_weekly_and_quarterly_lift_charts(df):
+    return draw_weekly_lift_chart(df), draw_quarterly_lift_chart(df)
@@ -1,9 +1,20 @@
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from charts.lod import MAX_TICKS, period_axis
+from charts.overlays import changepoint_overlay
+from parsing.workload import ACUTE_DAYS, CHRONIC_DAYS, MONOTONY_DAYS, TOTAL, workload_model
+from utils.changepoints import CHANGEPOINT_COLUMNS
+from utils.correlations import METHODS, correlation_cube, numeric_columns
+from utils.features import FeatureStore, as_feature_store, fatigue_raw
+from utils.profiling import traced
+from utils.projection import (ENERGY_COLUMNS, INTAKE_SPREAD, N_SCENARIOS, PROJECTION_WEEKS, energy_model,
+                              projection_fan, scenario_grid, simulate)
+from utils.regression import CONFIDENCE, bootstrap_band, fit_line
 
+
+@traced("transform")
 def compute_fatigue_proxy(df):
     """
     Fatigue proxy combining lifting, time, and running.
@@ -11,11 +22,7 @@ def compute_fatigue_proxy(df):
     """
     df = df.copy()
 
-    df["Fatigue_raw"] = (
-        df["Totals kg"] * 0.6 +
-        df["Mins gym"] * 0.3 +
-        df["km run"] * 10
-    )
+    df["Fatigue_raw"] = fatigue_raw(df)
 
     # normalize (z-score)
     df["Fatigue"] = (df["Fatigue_raw"] - df["Fatigue_raw"].mean()) / df["Fatigue_raw"].std()
@@ -49,20 +56,55 @@ def compute_fatigue_proxy(df):
 #     ax_fatigue.grid(alpha=0.2)
 
 
+def regression_plot(ax, df, x, y, method="ols", band="analytic", level=CONFIDENCE,
+                    scatter_kws=None, line_kws=None):
+    """
+    Scatter + fitted line + confidence band, drawn directly from a closed-form
+    fit (utils/regression.py) instead of sns.regplot's per-plot bootstrap.
+
+    band is "analytic", "bootstrap" (vectorized resampling) or None;
+    method is "ols" or "huber". Returns the LinearFit (None with < 3 points).
+    """
+    data = df[[x, y]].dropna()
+    line_kws = {"color": "C0", **(line_kws or {})}
+    scatter_kws = {"color": "C0", "alpha": 0.8, **(scatter_kws or {})}
+
+    ax.scatter(data[x], data[y], **scatter_kws)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    if len(data) < 3:
+        return None
+
+    fit = fit_line(data[x], data[y], method)
+    grid = np.linspace(data[x].min(), data[x].max(), 100)
+    ax.plot(grid, fit.predict(grid), **line_kws)
+    if band == "bootstrap":
+        low, high = bootstrap_band(data[x], data[y], grid, level)
+    elif band:
+        low, high = fit.band(grid, level)
+    if band:
+        ax.fill_between(grid, low, high, color=line_kws["color"], alpha=0.15, linewidth=0)
+
+    ax.text(0.02, 0.98, f"slope {fit.slope:.3g}, r\u00b2 {fit.r2:.2f}, p {fit.p_slope:.2g}, n {fit.n}",
+            transform=ax.transAxes, va="top", fontsize=8)
+    return fit
+
+
 # =====================================================
 # 1A — ENERGY vs WEIGHT CHANGE (SCATTER + REGRESSION)
 # =====================================================
-def plot_energy_vs_weight_change(df):
-    df = df.sort_values("Yearweek").copy()
-    df["Weight_change"] = df["Weight avg kg"].diff()
+@traced("chart")
+def plot_energy_vs_weight_change(df, band="analytic", return_fit=False):
+    features = as_feature_store(df)
+    df = features.frame(["Weekly total cal surplus (deficit)", "Weight_change"])
 
     fig, ax = plt.subplots(figsize=(7, 5))
 
-    sns.regplot(
+    fit = regression_plot(
+        ax, df,
         x="Weekly total cal surplus (deficit)",
         y="Weight_change",
-        data=df,
-        ax=ax,
+        band=band,
         scatter_kws={"alpha": 0.7},
         line_kws={"color": "red"}
     )
@@ -75,22 +117,21 @@ def plot_energy_vs_weight_change(df):
 
     plt.tight_layout()
 
+    return (fig, fit) if return_fit else fig
+
 
 
 # =====================================================
 # 3B — RADAR CHART (MUSCLE BALANCE, MONTHLY / QUARTERLY)
 # =====================================================
-def plot_muscle_radar(df, freq="QE"):
-    muscle_cols = ["Leg kg", "Shoulders kg", "Chest kg", "Biceps kg", "Back kg", "Core kg"]
-
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["Year"].astype(str) + "-01-01") + \
-                 pd.to_timedelta((df["Week"] - 1) * 7, unit="D")
+radar_cols = ["Leg kg", "Shoulders kg", "Chest kg", "Biceps kg", "Back kg", "Core kg"]
 
-    grouped = df.groupby(pd.Grouper(key="date", freq=freq))[muscle_cols].sum()
+@traced("chart")
+def plot_muscle_radar(df, freq="QE"):
+    grouped = as_feature_store(df).cube.sum(freq, radar_cols)
     grouped = grouped.div(grouped.sum(axis=1), axis=0)
 
-    labels = muscle_cols
+    labels = radar_cols
     angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
     angles += angles[:1]
 
@@ -99,7 +140,7 @@ def plot_muscle_radar(df, freq="QE"):
     for idx, row in grouped.iterrows():
         values = row.tolist()
         values += values[:1]
-        ax.plot(angles, values, alpha=0.6, label=str(idx.date()))
+        ax.plot(angles, values, alpha=0.6, label=str(idx))
         ax.fill(angles, values, alpha=0.1)
 
     ax.set_thetagrids(np.degrees(angles[:-1]), labels)
@@ -108,6 +149,8 @@ def plot_muscle_radar(df, freq="QE"):
 
     plt.tight_layout()
 
+    return fig
+
 
 
 # =====================================================
@@ -115,25 +158,28 @@ def plot_muscle_radar(df, freq="QE"):
 # =====================================================
 muscle_cols = ["Leg", "Shoulders", "Chest", "Biceps", "Back", "Core"]
 
+@traced("chart")
 def plot_sets_vs_load(df):
-    for muscle in muscle_cols:
-        plot_sets_vs_load_muscle(df, muscle)
+    features = as_feature_store(df)
+    return [plot_sets_vs_load_muscle(features, muscle) for muscle in muscle_cols]
 
-def plot_sets_vs_load_muscle(df, muscle):
+@traced("chart")
+def plot_sets_vs_load_muscle(df, muscle, band="analytic", return_fit=False):
     kg_col = f"{muscle} kg"
     sets_col = f"{muscle} sets"
 
-    df = df.dropna(subset=[kg_col, sets_col]).copy()
-    df["kg_per_set"] = df[kg_col] / df[sets_col]
+    features = as_feature_store(df)
+    df = features.frame(["Yearweek", kg_col, sets_col, f"{muscle} kg per set"])
+    df = df.rename(columns={f"{muscle} kg per set": "kg_per_set"}).dropna(subset=[kg_col, sets_col])
 
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(8, 8), sharex=True)
 
     # Scatter: sets vs kg
-    sns.regplot(
+    fit = regression_plot(
+        ax1, df,
         x=sets_col,
         y=kg_col,
-        data=df,
-        ax=ax1,
+        band=band,
         scatter_kws={"alpha": 0.7}
     )
     ax1.set_title(f"{muscle}: Sets vs Total Load")
@@ -148,12 +194,18 @@ def plot_sets_vs_load_muscle(df, muscle):
 
     plt.tight_layout()
 
+    return (fig, fit) if return_fit else fig
+
 
 
 # =====================================================
 # 5 — RUNNING vs LIFTING TRADEOFFS
 # =====================================================
+@traced("chart")
 def plot_running_vs_lifting(df):
+    features = as_feature_store(df)
+    df = features.frame(["km run", "Totals kg", "Weight_change", "Weekly total cal surplus (deficit)"])
+
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 
     # Running vs lifting volume
@@ -167,9 +219,6 @@ def plot_running_vs_lifting(df):
     axes[0].set_title("Running Distance vs Lifting Volume")
 
     # Running vs weight change
-    df = df.sort_values("Yearweek").copy()
-    df["Weight_change"] = df["Weight avg kg"].diff()
-
     sns.scatterplot(
         x="km run",
         y="Weight_change",
@@ -182,23 +231,25 @@ def plot_running_vs_lifting(df):
 
     plt.tight_layout()
 
+    return fig
+
 
 
 # =====================================================
 # 6 — PROTEIN ANALYSIS
 # =====================================================
-def plot_protein_effect(df):
-    df = df.sort_values("Yearweek").copy()
-    df["Weight_change"] = df["Weight avg kg"].diff()
-    df["Protein_per_kg"] = df["Proteins daily avg"] / df["Weight avg kg"]
+@traced("chart")
+def plot_protein_effect(df, band="analytic", return_fit=False):
+    features = as_feature_store(df)
+    df = features.frame(["Protein_per_kg", "Weight_change"])
 
     fig, ax = plt.subplots(figsize=(7, 5))
 
-    sns.regplot(
+    fit = regression_plot(
+        ax, df,
         x="Protein_per_kg",
         y="Weight_change",
-        data=df,
-        ax=ax
+        band=band
     )
 
     ax.set_title("Protein Intake per kg vs Weight Change")
@@ -208,12 +259,17 @@ def plot_protein_effect(df):
 
     plt.tight_layout()
 
+    return (fig, fit) if return_fit else fig
+
 
 
 # =====================================================
 # 7 — PROJECTED vs ACTUAL WEIGHT (BOTH)
 # =====================================================
+@traced("chart")
 def plot_projection_accuracy(df):
+    df = as_feature_store(df).frame(["Yearweek", "Weight avg kg", "Projected weight kg"])
+
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 
     # Time series
@@ -237,31 +293,217 @@ def plot_projection_accuracy(df):
 
     plt.tight_layout()
 
+    return fig
+
+
+# =====================================================
+# 7B — WHAT-IF WEIGHT PROJECTION (ENERGY BALANCE)
+# =====================================================
+@traced("chart")
+def plot_weight_projection(df, weeks=PROJECTION_WEEKS, history=26, activity_steps=(-200, 0, 200)):
+    """
+    Left: the last `history` weeks of weight and the projection fan of
+    N_SCENARIOS daily intakes around the recent one (utils/projection.py).
+    Right: weight after `weeks` weeks against the daily intake, for the recent
+    activity shifted by each of activity_steps kcal. All scenarios of both
+    panels are simulated in one batch each.
+    """
+    features = as_feature_store(df)
+    data = features.frame(["Yearweek", *ENERGY_COLUMNS])
+    model = energy_model(data)
+    fan = projection_fan(data, weeks=weeks, model=model)
+
+    actual = data.dropna(subset=["Weight avg kg"]).tail(history)
+    n_hist = len(actual)
+    x_fan = np.arange(n_hist - 1, n_hist + weeks)
+
+    fig, axes = plt.subplots(1, 2, figsize=(13, 5), gridspec_kw={"width_ratios": [3, 2]})
+
+    ax = axes[0]
+    ax.plot(np.arange(n_hist), actual["Weight avg kg"], marker="o", color="C0", label="Actual")
+    ax.fill_between(x_fan, fan["q5"], fan["q95"], color="C1", alpha=0.15, linewidth=0, label="5-95%")
+    ax.fill_between(x_fan, fan["q25"], fan["q75"], color="C1", alpha=0.3, linewidth=0, label="25-75%")
+    ax.plot(x_fan, fan["q50"], color="C1", linestyle="--", label="Median")
+    period_axis(ax, [*actual["Yearweek"], *fan["Yearweek"][1:]], labelsize=6)
+    ax.set_title(f"Weight projection: {model.intake:.0f} \u00b1 {INTAKE_SPREAD} kcal/day")
+    ax.set_ylabel("Weight (kg)")
+    ax.legend(fontsize=8)
+    ax.grid(alpha=0.2)
+
+    ax = axes[1]
+    intake = model.intake + np.linspace(-INTAKE_SPREAD, INTAKE_SPREAD, N_SCENARIOS)
+    active = model.active + np.asarray(activity_steps, dtype=float)
+    final = simulate(model, *scenario_grid(intake, active), weeks)[:, -1].reshape(len(intake), len(active))
+    for j, step in enumerate(activity_steps):
+        ax.plot(intake, final[:, j], label=f"active {active[j]:.0f} ({step:+d})")
+    ax.axhline(model.weight, color="grey", linestyle="--", linewidth=0.8)
+    ax.axvline(model.intake, color="grey", linestyle=":", linewidth=0.8)
+    ax.set_title(f"Weight after {weeks} weeks")
+    ax.set_xlabel("Daily intake (kcal)")
+    ax.set_ylabel("Weight (kg)")
+    ax.legend(fontsize=8)
+    ax.grid(alpha=0.2)
+
+    plt.tight_layout()
+
+    return fig
+
 
 # =====================================================
 # 9 — CORRELATION HEATMAP (OVERVIEW)
 # =====================================================
-def plot_correlation_heatmap(df):
-    cols = [
-        "kcals daily avg",
-        "Weekly total cal surplus (deficit)",
-        "Totals kg",
-        "km run",
-        "Mins gym",
-        "Weight avg kg",
-        "Proteins daily avg"
-    ]
-
-    corr = df[cols].corr()
-
-    fig, ax = plt.subplots(figsize=(8, 6))
+heatmap_cols = [
+    "kcals daily avg",
+    "Weekly total cal surplus (deficit)",
+    "Totals kg",
+    "km run",
+    "Mins gym",
+    "Weight avg kg",
+    "Proteins daily avg"
+]
+
+@traced("chart")
+def plot_correlation_heatmap(df, rows=heatmap_cols, columns=None, lag=0, method="pearson"):
+    """
+    One slice of the lagged correlation cube: `rows` this week vs `columns`
+    (default: same as rows) `lag` weeks later.
+    """
+    columns = columns or rows
+    # every slice of the same data shares one cached cube
+    cube = correlation_cube(df, list(dict.fromkeys(numeric_columns(df) + rows + columns)))
+    corr = cube.matrix(method, lag, rows, columns)
+
+    fig, ax = plt.subplots(figsize=(max(8, 0.9 * len(columns)), max(6, 0.6 * len(rows))))
     sns.heatmap(
         corr,
-        annot=True,
+        annot=len(rows) * len(columns) <= 150,
         cmap="coolwarm",
         center=0,
+        vmin=-1,
+        vmax=1,
         ax=ax
     )
 
-    ax.set_title("Correlation Overview")
+    ax.set_title("Correlation Overview" if lag == 0 else
+                 f"Correlation: rows this week vs columns {lag} week(s) later ({method})")
+    if lag:
+        ax.set_xlabel(f"week t + {lag}")
+        ax.set_ylabel("week t")
+    plt.tight_layout()
+
+    return fig
+
+@traced("chart")
+def plot_lagged_correlations(df, x="Weekly total cal surplus (deficit)", y="Weight_change"):
+    """
+    corr(x this week, y k weeks later) for every lag, Pearson and Spearman.
+    """
+    cube = correlation_cube(df, list(dict.fromkeys(numeric_columns(df) + [x, y])))
+    lags = np.array(cube.lags)
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    width = 0.4
+    for k, method in enumerate(METHODS):
+        ax.bar(lags + (k - 0.5) * width, cube.pair(x, y, method), width=width, label=method.capitalize())
+    ax.axhline(0, color="grey", linewidth=0.8)
+    ax.set_xticks(lags)
+    ax.set_xlabel("lag (weeks)")
+    ax.set_ylabel("correlation")
+    ax.set_ylim(-1, 1)
+    ax.set_title(f"{x} vs {y} k weeks later")
+    ax.legend()
+    plt.tight_layout()
+
+    return fig
+
+
+# =====================================================
+# 10 — ACUTE:CHRONIC WORKLOAD (DAILY, FROM THE LOG)
+# =====================================================
+ACWR_SWEET_SPOT = (0.8, 1.3)
+ACWR_DANGER = 1.5
+
+@traced("chart")
+def plot_acute_chronic_workload(df_log, groups=muscle_cols):
+    """
+    Daily load with acute/chronic EWMAs, ACWR per muscle group and
+    monotony/strain. Takes the Full Calendar Log, not the weekly frame, or a
+    FeatureStore carrying it (.log).
+    """
+    if isinstance(df_log, FeatureStore):
+        if df_log.log is None:
+            raise ValueError("The acute:chronic workload chart needs the daily log")
+        df_log = df_log.log
+    if not len(df_log):
+        raise ValueError("No daily log entries in the selected weeks")
+    model = workload_model(df_log)
+    days = model.index
+
+    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 10), sharex=True)
+
+    # Daily load + acute / chronic load (tons)
+    ax1.bar(days, model[("load", TOTAL)] / 1000, width=1.0, color="lightgrey", label="Daily load")
+    ax1.plot(days, model[("acute", TOTAL)] / 1000, label=f"Acute ({ACUTE_DAYS}d EWMA)")
+    ax1.plot(days, model[("chronic", TOTAL)] / 1000, label=f"Chronic ({CHRONIC_DAYS}d EWMA)")
+    ax1.set_ylabel("tons")
+    ax1.set_title("Training load")
+    ax1.legend(fontsize=8)
+
+    # ACWR per muscle group
+    ax2.axhspan(*ACWR_SWEET_SPOT, color="green", alpha=0.1, label="0.8-1.3")
+    ax2.axhline(ACWR_DANGER, color="red", linestyle="--", linewidth=0.8)
+    for muscle in groups:
+        ax2.plot(days, model[("acwr", muscle)], linewidth=0.8, alpha=0.6, label=muscle)
+    ax2.plot(days, model[("acwr", TOTAL)], color="black", linewidth=1.5, label=TOTAL)
+    ax2.set_ylabel("ACWR")
+    ax2.set_title("Acute:chronic workload ratio")
+    ax2.legend(fontsize=7, ncol=4)
+
+    # Monotony / strain
+    ax3.plot(days, model[("monotony", TOTAL)], label="Monotony")
+    ax3.set_ylabel("Monotony")
+    ax3b = ax3.twinx()
+    ax3b.plot(days, model[("strain", TOTAL)] / 1000, color="tab:red", alpha=0.7, label="Strain")
+    ax3b.set_ylabel("Strain (tons)")
+    ax3.set_title(f"Monotony / strain ({MONOTONY_DAYS}d)")
+    ax3.tick_params(axis="x", rotation=45)
+
+    plt.tight_layout()
+
+    return fig
+
+
+# =====================================================
+# 11 — CHANGE POINTS (PLATEAUS / STEP CHANGES)
+# =====================================================
+@traced("chart")
+def plot_changepoints(df, columns=CHANGEPOINT_COLUMNS, method="pelt", lod=None):
+    """
+    One panel per series (weight, total and per-muscle volume, fatigue) with
+    its detected change points and segment means (utils/changepoints.py).
+    lod: None thins the period labels of the narrow panels above MAX_TICKS
+    periods; True / False forces it.
+    """
+    features = as_feature_store(df)
+    df = features.frame(["Yearweek", *columns])
+    x = np.arange(len(df))
+
+    n_cols = 3
+    n_rows = -(-len(columns) // n_cols)
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(15, 3.2 * n_rows), sharex=True, squeeze=False)
+
+    for ax, column in zip(axes.flat, columns):
+        ax.plot(x, df[column], marker="o", markersize=3, linewidth=0.8, color="C0")
+        breaks = changepoint_overlay(ax, x, df[column], color="C3", method=method)
+        ax.set_title(f"{column} ({len(breaks)} change point{'s' if len(breaks) != 1 else ''})", fontsize=10)
+        ax.grid(alpha=0.2)
+    for ax in axes.flat[len(columns):]:
+        ax.set_visible(False)
+    lod = len(df) > MAX_TICKS if lod is None else lod
+    for ax in axes[-1]:
+        period_axis(ax, df["Yearweek"], lod, labelsize=6)
+    axes.flat[0].legend(fontsize=7)
+
     plt.tight_layout()
+
+    return fig
@@ -0,0 +1,146 @@
+import numpy as np
+
+from utils.profiling import traced
+
+# candidate positions: (dx, dy) offset in points from the anchor, ha, va
+CENTER = [(0, 0, "center", "center")]
+ABOVE = [(0, 3, "center", "bottom")]
+ABOVE_OR_BELOW = [(0, 7.5, "center", "bottom"), (0, -7.5, "center", "top")]
+
+CHAR_WIDTH = 0.6    # average glyph width, in font sizes
+
+
+class _Grid:
+    """
+    Uniform spatial hash over display pixels: each accepted box is stored in
+    every cell it touches, so a collision query only looks at nearby boxes.
+    """
+
+    def __init__(self, cell):
+        self.cell = max(float(cell), 1.0)
+        self.cells = {}
+        self.boxes = []
+
+    def _keys(self, box):
+        x0, y0, x1, y1 = (np.array(box) // self.cell).astype(int)
+        return [(i, j) for i in range(x0, x1 + 1) for j in range(y0, y1 + 1)]
+
+    def collides(self, box):
+        near = {k for key in self._keys(box) for k in self.cells.get(key, ())}
+        if not near:
+            return False
+        other = np.array([self.boxes[k] for k in near])
+        return bool(np.any(
+            (other[:, 0] < box[2]) & (other[:, 2] > box[0]) &
+            (other[:, 1] < box[3]) & (other[:, 3] > box[1])
+        ))
+
+    def insert(self, box):
+        self.boxes.append(box)
+        for key in self._keys(box):
+            self.cells.setdefault(key, []).append(len(self.boxes) - 1)
+
+
+class LabelPlacer:
+    """
+    Collect labels for every axes of a figure, then place them all in one pass.
+
+    Anchors are given in data coordinates and transformed to display pixels in
+    one array operation per group; label boxes are estimated from font size and
+    text length, so no canvas draw is needed. Labels are placed greedily by
+    priority (lower first): each one takes its first candidate position that
+    does not overlap an already placed label or obstacle, otherwise it is hidden.
+
+    Call place() after the figure layout is final (tight_layout / subplots_adjust).
+    """
+
+    def __init__(self, fig, padding=1.0):
+        self.fig = fig
+        self.padding = padding
+        self.groups = []
+        self.obstacles = []
+
+    def add(self, ax, x, y, texts, candidates=CENTER, priority=0, fontsize=8, **text_kw):
+        """
+        Register a batch of labels on `ax`; x, y and texts are same-length iterables.
+        Extra keyword arguments are passed to ax.annotate (color, ...).
+        """
+        self.groups.append({
+            "ax": ax,
+            "xy": np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)]),
+            "texts": list(texts),
+            "candidates": candidates,
+            "priority": priority,
+            "fontsize": fontsize,
+            "text_kw": text_kw,
+        })
+
+    def add_obstacles(self, ax, x, y, width_px, height_px):
+        """
+        Areas labels must not cover, centred on data points (e.g. bar tops, markers).
+        """
+        xy = np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+        centre = ax.transData.transform(xy)
+        half = np.broadcast_to(np.asarray([width_px, height_px], dtype=float) / 2, centre.shape)
+        self.obstacles.append(np.hstack([centre - half, centre + half]))
+
+    def _candidate_boxes(self, group):
+        """
+        (N, K, 4) pixel boxes [x0, y0, x1, y1] for N labels and K candidates.
+        """
+        px = self.fig.dpi / 72
+        anchors = group["ax"].transData.transform(group["xy"])
+        lengths = np.array([len(t) for t in group["texts"]], dtype=float)
+        w = lengths * group["fontsize"] * CHAR_WIDTH * px + 2 * self.padding
+        h = np.full_like(w, group["fontsize"] * px + 2 * self.padding)
+
+        boxes = np.empty((len(lengths), len(group["candidates"]), 4))
+        for k, (dx, dy, ha, va) in enumerate(group["candidates"]):
+            x0 = anchors[:, 0] + dx * px - {"left": 0.0, "center": 0.5, "right": 1.0}[ha] * w
+            y0 = anchors[:, 1] + dy * px - {"bottom": 0.0, "center": 0.5, "top": 1.0}[va] * h
+            boxes[:, k] = np.column_stack([x0, y0, x0 + w, y0 + h])
+        return boxes
+
+    @traced("layout", name="charts.labels.LabelPlacer.place")
+    def place(self):
+        """
+        Resolve collisions across all registered labels and draw the survivors.
+        Returns the created annotations.
+        """
+        if not self.groups:
+            return []
+
+        groups = sorted(self.groups, key=lambda g: g["priority"])
+        all_boxes = [self._candidate_boxes(g) for g in groups]
+
+        sizes = [b[..., 2:] - b[..., :2] for b in all_boxes if b.size]
+        cell = max((s.max() for s in sizes), default=1.0)
+        grid = _Grid(cell)
+        for obstacle in self.obstacles:
+            for box in obstacle[np.isfinite(obstacle).all(axis=1)]:
+                grid.insert(box)
+
+        placed = []
+        for group, boxes in zip(groups, all_boxes):
+            ax = group["ax"]
+            valid = np.isfinite(boxes).all(axis=(1, 2))
+            for i in np.flatnonzero(valid):
+                for k, (dx, dy, ha, va) in enumerate(group["candidates"]):
+                    if grid.collides(boxes[i, k]):
+                        continue
+                    grid.insert(boxes[i, k])
+                    placed.append(ax.annotate(
+                        group["texts"][i],
+                        tuple(group["xy"][i]),
+                        xytext=(dx, dy),
+                        textcoords="offset points",
+                        ha=ha,
+                        va=va,
+                        fontsize=group["fontsize"],
+                        **group["text_kw"]
+                    ))
+                    break
+
+        self.groups = []
+        self.obstacles = []
+        return placed
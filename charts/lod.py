@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.ticker import Formatter, MaxNLocator
+
+# above this many periods (two years of weeks) the charts switch to level-of-detail drawing
+LOD_THRESHOLD = 104
+# line series are cut to about this many points (a min and a max per bucket)
+MAX_LINE_POINTS = 400
+# at most this many value labels per series, and x ticks per axis
+MAX_LABELS = 52
+MAX_TICKS = 26
+
+
+def use_lod(n_periods, lod=None):
+    """
+    lod=None switches automatically above LOD_THRESHOLD periods; True / False forces it.
+    """
+    return n_periods > LOD_THRESHOLD if lod is None else bool(lod)
+
+
+def label_step(n_periods, lod):
+    """
+    Label every step-th period: 1 in full detail, at most MAX_LABELS labels in LOD mode.
+    """
+    return max(1, math.ceil(n_periods / MAX_LABELS)) if lod else 1
+
+
+def minmax_indices(y, n_out=MAX_LINE_POINTS):
+    """
+    Indices of a min/max-preserving decimation of y: the series is cut into
+    n_out / 2 buckets and each keeps its lowest and highest point (plus the
+    first and last point overall), so peaks and dips survive the downsampling.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    n_buckets = max(n_out // 2, 1)
+    size = math.ceil(n / n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    missing = np.isnan(blocks)
+    # an all-NaN bucket keeps its first (NaN) point, so gaps stay gaps
+    offsets = np.arange(n_buckets) * size
+    lo = np.where(missing, np.inf, blocks).argmin(axis=1) + offsets
+    hi = np.where(missing, -np.inf, blocks).argmax(axis=1) + offsets
+    idx = np.unique(np.concatenate([[0, n - 1], lo, hi]))
+    return idx[idx < n]
+
+
+# --------------------------
+# Drawing
+# --------------------------
+def bar_layer(ax, x, heights, bottom=0, lod=False, width=0.8, **kwargs):
+    """
+    One layer of a stacked bar chart at numeric positions x.
+
+    Full detail is ax.bar (one Rectangle per bar); in LOD mode the whole layer
+    is a single PolyCollection. color / alpha / label work the same in both.
+    """
+    if not lod:
+        return ax.bar(x, heights, bottom=bottom, width=width, **kwargs)
+
+    x = np.asarray(x, dtype=float)
+    heights = np.nan_to_num(np.asarray(heights, dtype=float))
+    bottom = np.broadcast_to(np.asarray(bottom, dtype=float), x.shape)
+    left, right, top = x - width / 2, x + width / 2, bottom + heights
+    verts = np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, top]),
+        np.column_stack([right, top]),
+        np.column_stack([right, bottom]),
+    ], axis=1)
+    layer = PolyCollection(verts, facecolors=kwargs.pop("color", None), edgecolors="none", **kwargs)
+    ax.add_collection(layer)
+    ax.autoscale_view()
+    return layer
+
+
+def line(ax, x, y, lod=False, **kwargs):
+    """
+    ax.plot(x, y) at numeric positions x. In LOD mode the series is min/max
+    decimated (without markers) and decimated again from the full data whenever
+    the x range changes, so zooming in brings back every point.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if not lod:
+        return ax.plot(x, y, **kwargs)[0]
+
+    kwargs.pop("marker", None)
+    idx = minmax_indices(y)
+    artist, = ax.plot(x[idx], y[idx], **kwargs)
+    refine = _Refine(artist, x, y)
+    ax.callbacks.connect("xlim_changed", refine)
+    # callbacks are not pickled with the figure: kept on the axes for reattach()
+    ax._lod_refiners = getattr(ax, "_lod_refiners", []) + [refine]
+    return artist
+
+
+def reattach(fig):
+    """
+    Connect the LOD refiners of an unpickled figure again (pickling drops
+    the xlim_changed callbacks line() registered). Returns fig.
+    """
+    for ax in fig.axes:
+        for refine in getattr(ax, "_lod_refiners", []):
+            ax.callbacks.connect("xlim_changed", refine)
+    return fig
+
+
+class _Refine:
+    """
+    xlim_changed callback of line(): re-decimate the visible part of the full
+    series. A class rather than a closure so figures stay picklable.
+    """
+
+    def __init__(self, artist, x, y):
+        self.artist = artist
+        self.x = x
+        self.y = y
+
+    def __call__(self, ax):
+        x0, x1 = sorted(ax.get_xlim())
+        i0 = max(int(np.searchsorted(self.x, x0)) - 1, 0)
+        i1 = min(int(np.searchsorted(self.x, x1)) + 1, len(self.x))
+        visible = i0 + minmax_indices(self.y[i0:i1])
+        self.artist.set_data(self.x[visible], self.y[visible])
+
+
+class PeriodFormatter(Formatter):
+    """
+    Tick label of integer position i: labels[i] (blank between periods and
+    outside the range). Picklable, unlike a FuncFormatter around a lambda.
+    """
+
+    def __init__(self, labels):
+        self.labels = list(labels)
+
+    def __call__(self, v, pos=None):
+        return self.labels[int(v)] if v == int(v) and 0 <= v < len(self.labels) else ""
+
+
+def period_axis(ax, labels, lod=False, rotation=45, labelsize=8):
+    """
+    Label positions 0..n-1 of the x axis with the period names. Full detail
+    ticks every period; LOD mode shows at most MAX_TICKS, re-chosen on zoom.
+    """
+    labels = [str(label) for label in labels]
+    if lod:
+        ax.xaxis.set_major_locator(MaxNLocator(MAX_TICKS, integer=True))
+        ax.xaxis.set_major_formatter(PeriodFormatter(labels))
+    else:
+        ax.set_xticks(np.arange(len(labels)), labels)
+    ax.tick_params(axis="x", rotation=rotation, labelsize=labelsize)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from utils.changepoints import changepoints, segment_means
+
+BREAK_STYLE = {"linestyle": ":", "linewidth": 1.0, "alpha": 0.8}
+
+
+def changepoint_overlay(ax, x, values, color="black", label="Change point", means=True, method="pelt"):
+    """
+    Detect change points of `values` (utils/changepoints.py) and mark them on
+    ax at numeric positions x: a vertical line between the last week of a
+    level and the first of the next, plus the segment means as a step line.
+    Returns the break positions (indices into values).
+    """
+    x = np.asarray(x, dtype=float)
+    values = np.asarray(values, dtype=float)
+    breaks = changepoints(values, method)
+    for i, b in enumerate(breaks):
+        ax.axvline((x[b - 1] + x[b]) / 2, color=color, label=label if i == 0 else None, **BREAK_STYLE)
+    if means and breaks:
+        ax.plot(x, segment_means(values, breaks), color=color, linewidth=1.2, alpha=0.6,
+                drawstyle="steps-mid", label="Segment mean")
+    return breaks
+
+
+def changepoint_ticks(ax, x, values, color, method="pelt"):
+    """
+    Compact marker variant for stacked series: a small triangle at the top
+    edge of ax over each change point of `values`.
+    """
+    x = np.asarray(x, dtype=float)
+    breaks = changepoints(np.asarray(values, dtype=float), method)
+    if breaks:
+        positions = [(x[b - 1] + x[b]) / 2 for b in breaks]
+        ax.plot(positions, [1.0] * len(positions), linestyle="none", marker="v", markersize=5, color=color,
+                transform=ax.get_xaxis_transform(), clip_on=False)
+    return breaks
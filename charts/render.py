@@ -0,0 +1,317 @@
+import hashlib
+import io
+import os
+import pickle
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+import charts.draw_descriptive_charts as dwdesc
+import charts.draw_statistical_charts as dwstat
+import utils.profiling as profiling
+from charts.lod import reattach
+from charts.render_cache import RenderCache, render_key
+from utils.correlations import numeric_columns
+from utils.features import as_feature_store
+
+# every chart takes the weekly frame (after compute_fatigue_proxy) and returns its figure(s)
+CHARTS = {
+    "weekly_weight_kcals": dwdesc.draw_weekly_weight_kcals,
+    "weekly_lift": dwdesc.draw_weekly_lift_chart,
+    "quarterly_lift": dwdesc.draw_quarterly_lift_chart,
+    "energy_vs_weight_change": dwstat.plot_energy_vs_weight_change,
+    "muscle_radar": dwstat.plot_muscle_radar,
+    "sets_vs_load": dwstat.plot_sets_vs_load,
+    "running_vs_lifting": dwstat.plot_running_vs_lifting,
+    "protein_effect": dwstat.plot_protein_effect,
+    "projection_accuracy": dwstat.plot_projection_accuracy,
+    "weight_projection": dwstat.plot_weight_projection,
+    "correlation_heatmap": dwstat.plot_correlation_heatmap,
+    "lagged_correlations": dwstat.plot_lagged_correlations,
+    "changepoints": dwstat.plot_changepoints,
+    "acute_chronic_workload": dwstat.plot_acute_chronic_workload,
+}
+
+
+def _frame(*columns):
+    return lambda s: s.frame(list(columns))
+
+
+def _log(s):
+    if s.log is None:
+        raise ValueError("The daily log was not loaded")
+    return s.log
+
+# name -> function(FeatureStore) returning exactly the data the chart reads:
+# part of its render cache key, so a chart is only redrawn when that data changes
+CHART_INPUTS = {
+    "weekly_weight_kcals": _frame("Yearweek", "kcals daily avg", "Resting energy kcal", "Active energy kcal",
+                                  "Weight avg kg", "Weight_rolling4", "kcals_rolling4"),
+    "weekly_lift": lambda s: s.cube.sum("W", dwdesc.muscle_groups),
+    "quarterly_lift": lambda s: s.cube.sum("Q", dwdesc.muscle_groups),
+    "energy_vs_weight_change": _frame("Weekly total cal surplus (deficit)", "Weight_change"),
+    "muscle_radar": lambda s: s.cube.sum("QE", dwstat.radar_cols),
+    "sets_vs_load": _frame("Yearweek", *[f"{m} {c}" for m in dwstat.muscle_cols
+                                         for c in ("kg", "sets", "kg per set")]),
+    "running_vs_lifting": _frame("km run", "Totals kg", "Weight_change", "Weekly total cal surplus (deficit)"),
+    "protein_effect": _frame("Protein_per_kg", "Weight_change"),
+    "projection_accuracy": _frame("Yearweek", "Weight avg kg", "Projected weight kg"),
+    "weight_projection": _frame("Yearweek", *dwstat.ENERGY_COLUMNS),
+    "correlation_heatmap": lambda s: s.frame(list(dict.fromkeys(numeric_columns(s) + dwstat.heatmap_cols))),
+    "lagged_correlations": lambda s: s.frame(numeric_columns(s)),
+    "changepoints": _frame("Yearweek", *dwstat.CHANGEPOINT_COLUMNS),
+    "acute_chronic_workload": _log,
+}
+# charts drawn from the daily log (FeatureStore.log) rather than the weekly frame
+LOG_CHARTS = ["acute_chronic_workload"]
+
+DESCRIPTIVE_CHARTS = ["weekly_weight_kcals", "weekly_lift", "quarterly_lift"]
+STATISTICAL_CHARTS = [
+    "energy_vs_weight_change",
+    "muscle_radar",
+    "running_vs_lifting",
+    "protein_effect",
+    "projection_accuracy",
+    "weight_projection",
+]
+
+
+def use_headless():
+    """
+    Switch pyplot to the non-interactive Agg backend.
+    """
+    plt.switch_backend("Agg")
+
+
+def as_figures(result):
+    """
+    Normalize what a chart function returns (Figure, list/tuple of Figures) to a list.
+    """
+    if result is None:
+        return []
+    if isinstance(result, Figure):
+        return [result]
+    return list(result)
+
+
+def figure_bytes(fig, fmt, dpi=None):
+    """
+    One figure rendered to bytes; fmt "pickle" gives the pickled Figure.
+    """
+    if fmt == "pickle":
+        return pickle.dumps(fig)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, **({"dpi": dpi} if dpi else {}))
+    return buffer.getvalue()
+
+
+def chart_key(features, name, fmt, dpi=None):
+    """
+    render_key() of a chart under its current inputs; None if it declares none.
+    """
+    if name not in CHART_INPUTS:
+        return None
+    return render_key(name, CHARTS[name], CHART_INPUTS[name](features), fmt, dpi=dpi)
+
+
+def render_pages(features, name, formats=("png",), cache=None, dpi=None, optional=()):
+    """
+    Pages of one chart as bytes, {fmt: [page, ...]}, drawn only for the formats
+    the RenderCache (if any) has no entry for under the chart's current inputs.
+    A format in `optional` that fails to convert (e.g. a figure that cannot be
+    pickled) is left out of the result instead of failing the whole chart.
+    """
+    keys, pages = {}, {}
+    if cache is not None and name in CHART_INPUTS:
+        for fmt in formats:
+            keys[fmt] = chart_key(features, name, fmt, dpi)
+            hit = cache.get(keys[fmt])
+            if hit is not None:
+                pages[fmt] = hit
+
+    missing = [fmt for fmt in formats if fmt not in pages]
+    if missing:
+        figs = as_figures(CHARTS[name](features))
+        try:
+            for fmt in missing:
+                try:
+                    pages[fmt] = [figure_bytes(fig, fmt, dpi) for fig in figs]
+                except Exception:
+                    if fmt not in optional:
+                        raise
+                    continue
+                if fmt in keys:
+                    cache.put(keys[fmt], pages[fmt], fmt)
+        finally:
+            for fig in figs:
+                plt.close(fig)
+    return pages
+
+
+def write_pages(pages, name, output_dir, formats=("png",)):
+    """
+    Write render_pages() output like save_figures(); returns the written paths.
+    """
+    files = []
+    count = max((len(pages[fmt]) for fmt in formats), default=0)
+    for i in range(count):
+        suffix = f"_{i + 1}" if count > 1 else ""
+        for fmt in formats:
+            target = os.path.join(output_dir, f"{name}{suffix}.{fmt}")
+            with open(target, "wb") as fh:
+                fh.write(pages[fmt][i])
+            files.append(target)
+    return files
+
+
+def save_figures(figs, name, output_dir, formats=("png",)):
+    """
+    Write figures as <output_dir>/<name>[_<i>].<fmt>; returns the written paths.
+    """
+    files = []
+    for i, fig in enumerate(figs):
+        suffix = f"_{i + 1}" if len(figs) > 1 else ""
+        for fmt in formats:
+            target = os.path.join(output_dir, f"{name}{suffix}.{fmt}")
+            fig.savefig(target, format=fmt)
+            files.append(target)
+    return files
+
+
+# --------------------------
+# Worker side
+# --------------------------
+_worker_df = None
+_worker_cache = None
+
+def _init_worker(df, profile=False, cache_dir=None):
+    # the frame is shipped once per worker, not once per chart;
+    # derived columns are then shared by the charts that worker renders
+    global _worker_df, _worker_cache
+    use_headless()
+    profiling.reset()
+    if profile:
+        profiling.enable()
+    _worker_df = as_feature_store(df)
+    _worker_cache = RenderCache(cache_dir) if cache_dir else None
+
+def _render_in_worker(name, output_dir, formats, keep_figures):
+    # the PDF report is assembled from pickled figures, cached like the files;
+    # a figure that cannot be pickled comes back as None and is redrawn by the parent
+    wanted = list(formats) + (["pickle"] if keep_figures else [])
+    pages = render_pages(_worker_df, name, wanted, _worker_cache, optional=("pickle",))
+    with profiling.stage(f"save:{name}", "output"):
+        files = write_pages(pages, name, output_dir, formats)
+    # events recorded in this process travel back with the result
+    return files, pages.get("pickle") if keep_figures else [], profiling.drain()
+
+
+def _report_figures(features, name, blobs):
+    """
+    The figures of one chart for the PDF report: unpickled from the worker, or
+    drawn again here when the worker could not pickle them.
+    """
+    if blobs is None:
+        return as_figures(CHARTS[name](features))
+    return [reattach(pickle.loads(blob)) for blob in blobs]
+
+
+# --------------------------
+# Main function
+# --------------------------
+def render_charts(df, names=None, output_dir="reports", formats=("png",), pdf=None, max_workers=None,
+                  cache_dir=None):
+    """
+    Render independent charts concurrently in worker processes (Agg backend).
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Weekly frame, after compute_fatigue_proxy()
+    names : list of str
+        Keys of CHARTS, default all
+    output_dir : str
+        Folder for the per-chart files
+    formats : iterable of str
+        Per-chart file formats, e.g. ("png", "svg"); empty for PDF only
+    pdf : str
+        Optional path of a multi-page PDF report with every figure, in `names` order
+    max_workers : int
+        Process pool size, default one per core
+    cache_dir : str
+        Optional RenderCache directory: charts whose inputs, code and style
+        are unchanged are copied from it instead of being redrawn
+
+    Returns
+    -------
+    dict
+        name -> list of written files. A failing chart is reported with a
+        warning and skipped; the other charts are still rendered. The PDF is
+        assembled after the per-chart files are written: a page that fails
+        only leaves a gap in the report.
+    """
+    names = list(names or CHARTS)
+    unknown = [n for n in names if n not in CHARTS]
+    if unknown:
+        raise ValueError(f"Unknown charts: {unknown}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # the PDF report is cached as a whole, under the keys of the charts it holds
+    df = as_feature_store(df)
+    cache = RenderCache(cache_dir) if cache_dir else None
+    report_key = None
+    if pdf is not None and cache is not None:
+        keys = [chart_key(df, name, "pdf") for name in names]
+        if None not in keys:
+            report_key = hashlib.sha256("|".join(keys).encode()).hexdigest()[:40]
+    cached_report = cache.get(report_key) if report_key else None
+
+    results = {}
+    workers = max(1, min(len(names), max_workers or os.cpu_count()))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(df, profiling.is_enabled(), cache_dir)) as pool:
+        futures = {
+            name: pool.submit(_render_in_worker, name, output_dir, tuple(formats),
+                              pdf is not None and cached_report is None)
+            for name in names
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+                profiling.merge(results[name][2])
+            except Exception as exc:
+                warnings.warn(f"Chart '{name}' failed: {exc!r}")
+
+    files = {name: res[0] for name, res in results.items()}
+
+    if cached_report is not None:
+        with open(pdf, "wb") as fh:
+            fh.write(cached_report[0])
+        files["report"] = [pdf]
+    elif pdf is not None:
+        # figures were pickled by the workers (or are redrawn here); only the PDF pages are written here
+        complete = len(results) == len(names)
+        with PdfPages(pdf) as report:
+            for name in names:
+                if name not in results:
+                    continue
+                figs = []
+                try:
+                    figs = _report_figures(df, name, results[name][1])
+                    for fig in figs:
+                        report.savefig(fig)
+                except Exception as exc:
+                    complete = False
+                    warnings.warn(f"Chart '{name}' left out of the report: {exc!r}")
+                finally:
+                    for fig in figs:
+                        plt.close(fig)
+        files["report"] = [pdf]
+        if report_key and complete:
+            with open(pdf, "rb") as fh:
+                cache.put(report_key, [fh.read()], "pdf")
+
+    return files
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import sys
+
+import matplotlib
+import pandas as pd
+
+# bump whenever chart helpers outside the chart's own module (labels, lod, ...) draw differently
+CACHE_VERSION = 1
+
+RENDER_DIR_NAME = "renders"
+MAX_BYTES = 256 * 1024 * 1024
+
+_source_hashes = {}
+
+
+def _source_hash(func):
+    """
+    sha256 of the source file defining func (palettes and constants included).
+    """
+    file = getattr(sys.modules.get(func.__module__), "__file__", None)
+    if file not in _source_hashes:
+        sha = hashlib.sha256()
+        if file:
+            with open(file, "rb") as fh:
+                sha.update(fh.read())
+        _source_hashes[file] = sha.hexdigest()
+    return _source_hashes[file]
+
+
+def _style_hash():
+    # rcParams carry the seaborn theme / matplotlib style; the backend does not change the bytes
+    items = sorted((k, repr(v)) for k, v in matplotlib.rcParams.items() if not k.startswith("backend"))
+    return hashlib.sha256(repr(items).encode()).hexdigest()
+
+
+def data_hash(data):
+    """
+    sha256 of a DataFrame / Series slice: values, index and column names.
+    """
+    sha = hashlib.sha256(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    columns = data.columns if isinstance(data, pd.DataFrame) else [data.name]
+    sha.update(repr(list(columns)).encode())
+    return sha.hexdigest()
+
+
+def render_key(name, func, data, fmt, **params):
+    """
+    Cache key of one rendered chart: the chart function (name + source), the
+    exact data it consumes, the output format / parameters and the style.
+    """
+    parts = [
+        f"v{CACHE_VERSION}", name, func.__module__, func.__qualname__, _source_hash(func),
+        data_hash(data), fmt, repr(sorted(params.items())), matplotlib.__version__, _style_hash(),
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:40]
+
+
+class RenderCache:
+    """
+    Rendered chart pages on disk, content addressed by render_key().
+
+    An entry is one file per page (<key>_<i>.<fmt>) plus <key>.json listing
+    them, written last so a present manifest means a complete entry. Hits
+    touch the manifest, and put() evicts the least recently used entries
+    above max_bytes. Several render processes can share the directory: an
+    entry evicted under a reader is just a miss.
+    """
+
+    def __init__(self, directory, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get(self, key):
+        """
+        List of page bytes, or None on a miss.
+        """
+        manifest = self._path(key + ".json")
+        try:
+            with open(manifest) as fh:
+                files = json.load(fh)["files"]
+            pages = []
+            for name in files:
+                with open(self._path(name), "rb") as fh:
+                    pages.append(fh.read())
+            os.utime(manifest)
+        except (OSError, ValueError, KeyError):
+            return None
+        return pages
+
+    def put(self, key, pages, fmt):
+        files = []
+        for i, page in enumerate(pages):
+            files.append(f"{key}_{i + 1}.{fmt}")
+            self._write(files[-1], page)
+        self._write(key + ".json", json.dumps({"files": files}).encode())
+        self.evict()
+
+    def _write(self, name, body):
+        target = self._path(name)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(body)
+        os.replace(tmp, target)
+
+    def evict(self):
+        """
+        Drop least recently used entries until the directory fits in max_bytes.
+        """
+        entries = {}
+        total = 0
+        for item in os.scandir(self.directory):
+            if not item.is_file():
+                continue
+            stat = item.stat()
+            total += stat.st_size
+            key = item.name.split("_", 1)[0].split(".", 1)[0]
+            entry = entries.setdefault(key, {"size": 0, "used": 0.0, "files": []})
+            entry["size"] += stat.st_size
+            entry["files"].append(item.path)
+            if item.name.endswith(".json"):
+                entry["used"] = stat.st_mtime
+        for key, entry in sorted(entries.items(), key=lambda kv: kv[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            for path in entry["files"]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= entry["size"]
+
+    def clear(self):
+        for item in os.scandir(self.directory):
+            if item.is_file():
+                os.remove(item.path)
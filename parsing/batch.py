@@ -0,0 +1,205 @@
+import argparse
+import csv
+import glob
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+matplotlib.use("Agg")   # workers never open windows
+
+import charts.draw_statistical_charts as dwstat
+import charts.render as render
+import matplotlib.pyplot as plt
+import parsing.cache as stats_cache
+import utils.profiling as profiling
+from parsing.main import STATS, open_stats, write_stat
+from utils.features import FeatureStore
+
+DEFAULT_CHARTS = render.STATISTICAL_CHARTS
+
+
+def find_workbooks(source):
+    """
+    Workbooks in a directory (*.xlsx), or matching a glob pattern.
+    Excel lock files (~$name.xlsx) are skipped.
+    """
+    pattern = os.path.join(source, "*.xlsx") if os.path.isdir(source) else source
+    files = sorted(glob.glob(pattern))
+    return [f for f in files if not os.path.basename(f).startswith("~$")]
+
+
+def athlete_name(file, root=None):
+    """
+    The workbook's path relative to root, without extension (the file stem
+    when root is its own folder).
+    """
+    root = root or os.path.dirname(file)
+    return os.path.splitext(os.path.relpath(file, root))[0]
+
+
+def athlete_names(files):
+    """
+    {file: athlete name}, unique across files: paths relative to their common
+    folder, so team/alice/stats.xlsx and team/bob/stats.xlsx become
+    alice/stats and bob/stats.
+    """
+    if not files:
+        return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+    return {f: athlete_name(os.path.abspath(f), root) for f in files}
+
+
+@profiling.traced("batch")
+def process_workbook(file, charts, stats, output_dir, fmt="png", athlete=None):
+    """
+    Worker: load one workbook, write the selected stats tables (<stat>.csv) and
+    render the selected charts into <output_dir>/<athlete>/.
+    Never raises: failures are reported in the returned dict.
+    """
+    athlete = athlete or athlete_name(file)
+    result = {"athlete": athlete, "file": file, "ok": True, "error": None,
+              "stats": {}, "files": [], "failed_charts": {}}
+    start = time.perf_counter()
+
+    try:
+        # same cache as the CLI / watch mode; each workbook has its own manifest there
+        df_sheets = open_stats(file, cache_dir=stats_cache.default_cache_dir(file))
+        df = dwstat.compute_fatigue_proxy(df_sheets['Weekly Calendar summary'])
+        features = FeatureStore(df, log=df_sheets.get('Full Calendar Log'))
+
+        athlete_dir = os.path.join(output_dir, athlete)
+        os.makedirs(athlete_dir, exist_ok=True)
+        for name in stats:
+            target = os.path.join(athlete_dir, f"{name}.csv")
+            write_stat(name, features, target)
+            result["stats"][name] = target
+            result["files"].append(target)
+        for name in charts:
+            before = set(plt.get_fignums())
+            try:
+                figs = render.as_figures(render.CHARTS[name](features))
+                result["files"] += render.save_figures(figs, name, athlete_dir, (fmt,))
+            except Exception:
+                # one broken chart does not lose the rest of the athlete's report
+                result["failed_charts"][name] = traceback.format_exc()
+            finally:
+                for num in set(plt.get_fignums()) - before:
+                    plt.close(num)
+    except Exception:
+        result["ok"] = False
+        result["error"] = traceback.format_exc()
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _init_worker(profile):
+    # forked workers inherit the parent's recorded events: start from a clean slate
+    profiling.reset()
+    if profile:
+        profiling.enable()
+
+def _process_in_worker(*args):
+    return process_workbook(*args), profiling.drain()
+
+
+def _failed(file, athlete, error):
+    return {"athlete": athlete, "file": file, "ok": False, "error": error, "stats": {}, "files": [],
+            "failed_charts": {}, "seconds": None}
+
+
+def _collect(futures, names, results):
+    """
+    Store the finished futures' results; {file: traceback} of those whose pool broke.
+    """
+    broken = {}
+    for future in as_completed(futures):
+        file = futures[future]
+        try:
+            results[file], events = future.result()
+            profiling.merge(events)
+        except BrokenProcessPool:
+            broken[file] = traceback.format_exc()
+        except Exception:
+            results[file] = _failed(file, names[file], traceback.format_exc())
+    return broken
+
+
+def run_batch(source, charts=DEFAULT_CHARTS, stats=("fatigue",), output_dir="reports",
+              max_workers=None, fmt="png"):
+    """
+    Fan process_workbook() out over a process pool, one task per workbook.
+
+    Returns
+    -------
+    list of dict
+        One result per workbook, in input order. A worker process that dies
+        (OOM, segfault) breaks the whole pool; the workbooks left unfinished
+        are then rerun one per single-worker pool, so only the one that kills
+        its worker again is marked as failed.
+    """
+    unknown = [c for c in charts if c not in render.CHARTS] + [s for s in stats if s not in STATS]
+    if unknown:
+        raise ValueError(f"Unknown chart/stat names: {unknown}")
+
+    files = find_workbooks(source)
+    names = athlete_names(files)
+    workers = max_workers or os.cpu_count()
+    results = {}
+
+    def new_pool(size):
+        return ProcessPoolExecutor(max_workers=size, initializer=_init_worker, initargs=(profiling.is_enabled(),))
+
+    def submit(pool, file):
+        return pool.submit(_process_in_worker, file, list(charts), list(stats), output_dir, fmt, names[file])
+
+    with new_pool(workers) as pool:
+        broken = list(_collect({submit(pool, f): f for f in files}, names, results))
+
+    for i in range(0, len(broken), workers):
+        pools = {f: new_pool(1) for f in broken[i:i + workers]}
+        try:
+            futures = {submit(pool, f): f for f, pool in pools.items()}
+            for file, error in _collect(futures, names, results).items():
+                results[file] = _failed(file, names[file], error)
+        finally:
+            for pool in pools.values():
+                pool.shutdown()
+
+    return [results[f] for f in files]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render charts/stats for many athletes' workbooks.")
+    parser.add_argument("source", help="directory of .xlsx workbooks or a glob pattern")
+    parser.add_argument("--charts", nargs="*", default=DEFAULT_CHARTS, choices=sorted(render.CHARTS))
+    parser.add_argument("--stats", nargs="*", default=["fatigue"], choices=sorted(STATS))
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", default="png", choices=["png", "svg", "pdf"])
+    args = parser.parse_args()
+
+    results = run_batch(args.source, args.charts, args.stats, args.output_dir, args.workers, args.format)
+    for res in results:
+        status = "ok" if res["ok"] and not res["failed_charts"] else "FAILED"
+        print(f"{res['athlete']}: {status}, {len(res['files'])} files")
+        if res["error"]:
+            print(res["error"])
+        for name, error in res["failed_charts"].items():
+            print(f"  {name}: {error.strip().splitlines()[-1]}")
+
+    # one row per workbook, next to the per-athlete folders
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary = os.path.join(args.output_dir, "batch_summary.csv")
+    with open(summary, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["athlete", "file", "ok", "files", "failed_charts", "seconds", "error"])
+        for res in results:
+            error = res["error"].strip().splitlines()[-1] if res["error"] else ""
+            seconds = f"{res['seconds']:.2f}" if res["seconds"] is not None else ""
+            writer.writerow([res["athlete"], res["file"], res["ok"] and not res["failed_charts"], len(res["files"]),
+                             " ".join(res["failed_charts"]), seconds, error])
+    print(summary)
@@ -0,0 +1,233 @@
+import glob
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# bump whenever open_stats() derives columns differently, so old entries are ignored
+CACHE_VERSION = 3
+
+CACHE_DIR_NAME = ".stats_cache"
+# one manifest per workbook (manifest-<workbook_tag>.json): workbooks sharing
+# a folder, e.g. a batch run's workers, never rewrite each other's manifest
+MANIFEST_PATTERN = "manifest-{}.json"
+# cached workbook versions kept per cache folder, across all manifests (LRU)
+MAX_ENTRIES = 64
+
+
+def workbook_key(file):
+    """
+    Cache key of a workbook: sha256 of its bytes + mtime (ns) + cache version.
+    """
+    sha = hashlib.sha256()
+    with open(file, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            sha.update(chunk)
+    mtime_ns = os.stat(file).st_mtime_ns
+    return f"v{CACHE_VERSION}-{sha.hexdigest()[:32]}-{mtime_ns}"
+
+
+def default_cache_dir(file):
+    return os.path.join(os.path.dirname(os.path.abspath(file)), CACHE_DIR_NAME)
+
+
+def workbook_tag(file):
+    """
+    File-name-safe id of a workbook: its name plus a hash of its absolute
+    path, for the per-workbook files kept in a shared cache folder.
+    """
+    source = os.path.abspath(file)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return f"{stem}-{hashlib.sha256(source.encode()).hexdigest()[:8]}"
+
+
+# --------------------------
+# Columnar (npz) frame storage
+# --------------------------
+def save_frame(df, target):
+    """
+    Store one DataFrame column by column in an uncompressed .npz file.
+    Column names and dtypes go in a small JSON header so the frame
+    comes back exactly as open_stats() built it.
+    """
+    arrays = {f"c{i}": df[col].to_numpy() for i, col in enumerate(df.columns)}
+    meta = {
+        "columns": [str(c) for c in df.columns],
+        "dtypes": [str(t) for t in df.dtypes],
+        "index": df.index.to_numpy(),
+    }
+    arrays["__index__"] = meta.pop("index")
+    arrays["__meta__"] = np.array(json.dumps(meta))
+
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, **arrays)
+    os.replace(tmp, target)
+
+
+def load_frame(source):
+    """
+    Inverse of save_frame().
+    """
+    with np.load(source, allow_pickle=True) as npz:
+        meta = json.loads(str(npz["__meta__"]))
+        data = {}
+        for i, (col, dtype) in enumerate(zip(meta["columns"], meta["dtypes"])):
+            values = npz[f"c{i}"]
+            if dtype == "object":
+                data[col] = pd.Series(values, dtype=object)
+            else:
+                data[col] = pd.Series(values).astype(dtype)
+        df = pd.DataFrame(data)
+        df.index = pd.Index(npz["__index__"])
+    return df
+
+
+# --------------------------
+# Manifest
+# --------------------------
+def _manifest_path(cache_dir, file):
+    return os.path.join(cache_dir, MANIFEST_PATTERN.format(workbook_tag(file)))
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {"entries": {}}
+
+
+def _write_manifest(target, manifest):
+    tmp = target + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(tmp, target)
+
+
+def _drop_entry(cache_dir, manifest, key):
+    entry = manifest["entries"].pop(key, None)
+    if entry is None:
+        return
+    for name in entry["sheets"].values():
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            pass
+
+
+def _evict(cache_dir, manifest_path, manifest, max_entries):
+    """
+    Least-recently-used eviction down to max_entries over every workbook's
+    manifest in cache_dir. `manifest` (at manifest_path) is the one being
+    written by the caller; the others are rewritten, or removed once empty.
+    """
+    manifests = {manifest_path: manifest}
+    for path in glob.glob(os.path.join(cache_dir, MANIFEST_PATTERN.format("*"))):
+        if path not in manifests:
+            manifests[path] = _read_manifest(path)
+    by_age = sorted((entry["last_used"], path, key) for path, m in manifests.items()
+                    for key, entry in m["entries"].items())
+
+    changed = set()
+    for _, path, key in by_age[:max(0, len(by_age) - max_entries)]:
+        _drop_entry(cache_dir, manifests[path], key)
+        changed.add(path)
+    for path in changed - {manifest_path}:
+        if manifests[path]["entries"]:
+            _write_manifest(path, manifests[path])
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# --------------------------
+# Public API
+# --------------------------
+def load_or_build(file, builder, cache_dir=None, max_entries=MAX_ENTRIES):
+    """
+    Return the sheets dict for `file`, from cache when the workbook is unchanged.
+
+    Parameters
+    ----------
+    file : str
+        Path of the workbook
+    builder : callable
+        builder(file) -> dict of DataFrames, called on a cache miss
+    cache_dir : str
+        Cache location, defaults to a `.stats_cache` folder next to the workbook
+    max_entries : int
+        Number of cached workbook versions kept in cache_dir, all workbooks
+        together (LRU)
+
+    Invalidation: an entry is only reused when content hash AND mtime match.
+    When a workbook changes, its previous entries are removed on the next load.
+    """
+    cache_dir = cache_dir or default_cache_dir(file)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    source = os.path.abspath(file)
+    key = workbook_key(file)
+    manifest_path = _manifest_path(cache_dir, file)
+    manifest = _read_manifest(manifest_path)
+    entry = manifest["entries"].get(key)
+
+    if entry is not None:
+        try:
+            df_sheets = {
+                sheet: load_frame(os.path.join(cache_dir, name))
+                for sheet, name in entry["sheets"].items()
+            }
+            entry["last_used"] = time.time()
+            _write_manifest(manifest_path, manifest)
+            return df_sheets
+        except (OSError, ValueError, KeyError):
+            # corrupt or partially written entry: rebuild below
+            _drop_entry(cache_dir, manifest, key)
+
+    df_sheets = builder(file)
+
+    # stale versions of the same workbook are invalid from now on
+    for old_key in [k for k, e in manifest["entries"].items() if e["source"] == source]:
+        _drop_entry(cache_dir, manifest, old_key)
+
+    sheets = {}
+    for i, (sheet, df) in enumerate(df_sheets.items()):
+        name = f"{workbook_tag(file)}-{key}-{i}.npz"
+        save_frame(df, os.path.join(cache_dir, name))
+        sheets[sheet] = name
+
+    manifest["entries"][key] = {
+        "source": source,
+        "sheets": sheets,
+        "last_used": time.time(),
+    }
+    _evict(cache_dir, manifest_path, manifest, max_entries)
+    _write_manifest(manifest_path, manifest)
+
+    return df_sheets
+
+
+def clear_cache(file=None, cache_dir=None):
+    """
+    Remove cached entries: all of them, or only those built from `file`.
+    """
+    if cache_dir is None:
+        if file is None:
+            raise ValueError("clear_cache needs a workbook path or a cache_dir")
+        cache_dir = default_cache_dir(file)
+    if file is not None:
+        paths = [_manifest_path(cache_dir, file)]
+    else:
+        paths = glob.glob(os.path.join(cache_dir, MANIFEST_PATTERN.format("*")))
+    for path in paths:
+        manifest = _read_manifest(path)
+        for key in list(manifest["entries"]):
+            _drop_entry(cache_dir, manifest, key)
+        if os.path.isdir(cache_dir):
+            _write_manifest(path, manifest)
@@ -0,0 +1,138 @@
+import json
+import os
+
+import pandas as pd
+
+from parsing.cache import load_frame, save_frame, workbook_tag
+from utils.aggregates import AggregationCube, measure_columns
+from utils.online import OUTPUT_COLUMNS, OnlineWeeklyStats
+from utils.utils import TONS_COLUMNS, add_tons_columns
+
+# formatted with "-<workbook_tag>", so workbooks sharing a cache folder keep separate snapshots
+SNAPSHOT_FRAME = "weekly_snapshot{}.npz"
+SNAPSHOT_STATE = "weekly_snapshot{}.json"
+SNAPSHOT_CUBE = "weekly_cube{}.npz"
+
+DERIVED_COLUMNS = list(TONS_COLUMNS.values()) + ["Fatigue"] + OUTPUT_COLUMNS
+
+
+# --------------------------
+# Helpers
+# --------------------------
+def _first_changed(old, new, raw_cols):
+    """
+    Position in `new` of the first appended or modified week.
+    Returns 0 when a full rebuild is needed, len(new) when nothing changed.
+    """
+    if old is None or [c for c in old.columns if c not in DERIVED_COLUMNS] != raw_cols:
+        return 0, list(new["Yearweek"])
+
+    old_raw = old[raw_cols].set_index("Yearweek")
+    new_raw = new[raw_cols].set_index("Yearweek")
+    if not new_raw.index.is_unique or not old_raw.index.isin(new_raw.index).all():
+        # duplicated or removed weeks: positions no longer line up
+        return 0, list(new["Yearweek"])
+
+    current = new_raw.loc[old_raw.index]
+    same = ((current == old_raw) | (current.isna() & old_raw.isna())).all(axis=1)
+
+    changed = old_raw.index[~same.to_numpy()].union(new_raw.index.difference(old_raw.index))
+    if changed.empty:
+        return len(new), []
+    return new_raw.index.get_indexer(changed).min(), list(changed)
+
+
+# --------------------------
+# Snapshot persistence
+# --------------------------
+def _snapshot_path(snapshot_dir, pattern, workbook):
+    return os.path.join(snapshot_dir, pattern.format(f"-{workbook_tag(workbook)}" if workbook else ""))
+
+
+def _read_snapshot(snapshot_dir, workbook=None):
+    try:
+        old = load_frame(_snapshot_path(snapshot_dir, SNAPSHOT_FRAME, workbook))
+        with open(_snapshot_path(snapshot_dir, SNAPSHOT_STATE, workbook)) as fh:
+            state = json.load(fh)
+        return old, OnlineWeeklyStats.from_state(state["engine"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, None
+
+
+def _write_snapshot(snapshot_dir, df, engine, workbook=None):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    save_frame(df, _snapshot_path(snapshot_dir, SNAPSHOT_FRAME, workbook))
+    target = _snapshot_path(snapshot_dir, SNAPSHOT_STATE, workbook)
+    with open(target + ".tmp", "w") as fh:
+        json.dump({"engine": engine.to_state()}, fh)
+    os.replace(target + ".tmp", target)
+
+
+def load_cube(snapshot_dir, workbook=None):
+    """
+    The AggregationCube maintained by ingest_weekly() (for the same workbook), or None.
+    """
+    try:
+        return AggregationCube.load(_snapshot_path(snapshot_dir, SNAPSHOT_CUBE, workbook))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _update_cube(snapshot_dir, df, start, workbook=None):
+    cube = load_cube(snapshot_dir, workbook) if start else None
+    if cube is None or cube.columns != measure_columns(df):
+        cube = AggregationCube.build(df)
+    else:
+        # only the re-derived weeks change their periods' sums
+        cube.update(df.iloc[start:])
+    cube.save(_snapshot_path(snapshot_dir, SNAPSHOT_CUBE, workbook))
+
+
+# --------------------------
+# Main function
+# --------------------------
+def ingest_weekly(df_weekly, snapshot_dir, workbook=None):
+    """
+    Incremental version of open_stats() + compute_fatigue_proxy() for the weekly sheet.
+
+    The frame is diffed by Yearweek against the snapshot persisted in `snapshot_dir`.
+    Derived columns are only recomputed from the first appended/modified week onwards,
+    with the online engine (utils/online.py): appended weeks resume from the persisted
+    engine state in O(1) each; an edit in the past rebuilds the state from the rows
+    before it. Fatigue is the full-history z-score (one vectorized rescale),
+    Fatigue_causal the z-score as of each week. The week/month/quarter/year
+    aggregation cube is updated with the same weeks (see load_cube()).
+    The snapshot files are named after `workbook` (its path), when given, so
+    several workbooks can share one snapshot_dir.
+
+    Returns
+    -------
+    (DataFrame, list)
+        Weekly frame in chronological order with derived columns, and the Yearweeks that
+        were appended or modified since the previous snapshot.
+    """
+    new = df_weekly.drop(columns=DERIVED_COLUMNS, errors="ignore")
+    # Yearweek is not zero-padded (20261 < 202433), so order chronologically
+    new = new.sort_values(["Year", "Week"], kind="stable").reset_index(drop=True)
+    raw_cols = list(new.columns)
+
+    old, engine = _read_snapshot(snapshot_dir, workbook)
+    start, changed = _first_changed(old, new, raw_cols)
+    if start == len(new):
+        if not os.path.exists(_snapshot_path(snapshot_dir, SNAPSHOT_CUBE, workbook)):
+            _update_cube(snapshot_dir, old, 0, workbook)
+        return old, changed
+
+    if engine is None or start < len(old):
+        engine = OnlineWeeklyStats.from_history(old.iloc[:start]) if start else OnlineWeeklyStats()
+
+    tail = new.iloc[start:].copy()
+    add_tons_columns(tail)
+    tail = pd.concat([tail, engine.run(tail)], axis=1)
+    df = pd.concat([old.iloc[:start], tail], ignore_index=True) if start else tail.reset_index(drop=True)
+
+    df["Fatigue"] = engine.fatigue(df["Fatigue_raw"])
+
+    _write_snapshot(snapshot_dir, df, engine, workbook)
+    _update_cube(snapshot_dir, df, start, workbook)
+    return df, changed
@@ -1,48 +1,324 @@
+import argparse
 import os
+import sys
 
-import charts.draw_descriptive_charts as dwdesc
-import charts.draw_statistical_charts as dwstat
-import matplotlib.pyplot as plt
-import pandas as pd
+from utils.profiling import stage, traced
 
+# heavy modules (pandas, matplotlib, seaborn) are imported inside the commands
+# that need them: listing weeks or exporting stats never loads the plotting stack
 
-DRAW_DESCRIPTIVE = False
-DRAW_STATISTICAL = True
+WEEKLY_SHEET = 'Weekly Calendar summary'
+LOG_SHEET = 'Full Calendar Log'
 
-path = os.environ['ECLIPSE_WORKSPACE']
 
-def open_stats():
-    file = path + 'fitness_stats/data/fitness_stats.xlsx'
-    df_sheets = pd.read_excel(file, sheet_name=['Full Calendar Log', 'Weekly Calendar summary'], engine='openpyxl')
+def _projection(s):
+    from utils.projection import projection_fan
+    return projection_fan(s)
+
+
+def _changepoints(s):
+    from utils.changepoints import changepoint_table
+    return changepoint_table(s)
+
+
+def _changepoint_inputs(s):
+    from utils.changepoints import CHANGEPOINT_COLUMNS
+    return s.frame(["Yearweek", *CHANGEPOINT_COLUMNS])
+
+
+# name -> function(FeatureStore) returning a DataFrame
+STATS = {
+    "fatigue": lambda s: s.frame(["Year", "Week", "Yearweek", "Fatigue_raw", "Fatigue", "Fatigue_causal"]),
+    "describe": lambda s: s.frame(list(dict.fromkeys([*s.base.columns, "Fatigue_raw", "Fatigue"]))).describe(),
+    "projection": _projection,
+    "changepoints": _changepoints,
+}
+# name -> function(FeatureStore) returning the data the table is computed from
+# (watch mode only recomputes a table when this changes)
+STAT_INPUTS = {
+    "fatigue": lambda s: s.frame(["Year", "Week", "Yearweek", "Totals kg", "Mins gym", "km run"]),
+    "describe": lambda s: s.base,
+    "projection": lambda s: s.frame(["Yearweek", "Weight avg kg", "Weekly total cal surplus (deficit)",
+                                     "Resting energy kcal", "Active energy kcal"]),
+    "changepoints": _changepoint_inputs,
+}
+
+
+def default_file():
+    """
+    Workbook path under $ECLIPSE_WORKSPACE, read when needed rather than at import.
+    """
+    return os.environ.get('ECLIPSE_WORKSPACE', '') + 'fitness_stats/data/fitness_stats.xlsx'
+
+@traced("load")
+def open_stats(file=None, use_cache=True, cache_dir=None):
+    """
+    Load both workbook sheets and add the derived tons columns.
+    Unchanged workbooks are served from the columnar cache (see parsing/cache.py).
+    """
+    if file is None:
+        file = default_file()
+    if use_cache:
+        import parsing.cache as stats_cache
+        return stats_cache.load_or_build(file, read_stats, cache_dir=cache_dir)
+    return read_stats(file)
+
+@traced("load")
+def read_stats(file, sheets=(LOG_SHEET, WEEKLY_SHEET)):
+    import pandas as pd
+    import parsing.schema as schema
+    from utils.utils import add_tons_columns
+
+    with stage("read_excel", "load"):
+        df_sheets = pd.read_excel(file, sheet_name=list(sheets), engine='openpyxl')
+
+    # --- compact dtypes (small ints, float32, categories), bad cells reported ---
+    with stage("apply_schemas", "transform"):
+        df_sheets, _ = schema.apply_schemas(df_sheets)
 
     # --- convert kg to tons ---
-    df_sheets['Weekly Calendar summary']["Totals tons"] = df_sheets['Weekly Calendar summary']["Totals kg"] / 1000 
-    df_sheets['Weekly Calendar summary']["Leg tons"] = df_sheets['Weekly Calendar summary']["Leg kg"] / 1000 
-    df_sheets['Weekly Calendar summary']["Chest tons"] = df_sheets['Weekly Calendar summary']["Chest kg"] / 1000 
-    df_sheets['Weekly Calendar summary']["Back tons"] = df_sheets['Weekly Calendar summary']["Back kg"] / 1000 
-    df_sheets['Weekly Calendar summary']["Shoulders tons"] = df_sheets['Weekly Calendar summary']["Shoulders kg"] / 1000 
-    df_sheets['Weekly Calendar summary']["Biceps tons"] = df_sheets['Weekly Calendar summary']["Biceps kg"] / 1000 
-    df_sheets['Weekly Calendar summary']["Core tons"] = df_sheets['Weekly Calendar summary']["Core kg"] / 1000 
-    
+    if WEEKLY_SHEET in df_sheets:
+        add_tons_columns(df_sheets[WEEKLY_SHEET])
+
     return df_sheets
 
+def load_weekly(args):
+    """
+    FeatureStore over the weekly sheet for the CLI options: optionally rebuilt
+    from the daily log, optionally updated incrementally (with the persisted
+    aggregation cube in that case), optionally limited to a Yearweek window.
+    With --db the window is read from the SQLite store instead of the workbook.
+    """
+    from utils.features import FeatureStore
+    from utils.isoweeks import dates_to_yearweek, yearweek_mask
+
+    if args.db:
+        # only the requested weeks are read, through the (athlete, Year, Week) index
+        from parsing.sqlite_store import StatsStore
+        with StatsStore(args.db) as store:
+            return FeatureStore(store.weeks(args.from_week, args.to_week, athlete=args.athlete),
+                                log=store.log_weeks(args.from_week, args.to_week, athlete=args.athlete))
+
+    file = args.file or default_file()
+    df_sheets = open_stats(file, use_cache=not args.no_cache)
+    if args.derive_weekly:
+        # weekly formula columns rebuilt from the daily log
+        import parsing.weekly_engine as weekly_engine
+        df_sheets = weekly_engine.rebuild_weekly_sheet(df_sheets)
+
+    if args.incremental:
+        # only weeks added/edited since the last run are re-derived
+        import parsing.cache as stats_cache
+        import parsing.incremental as incremental
+        snapshot_dir = stats_cache.default_cache_dir(file)
+        weekly, _ = incremental.ingest_weekly(df_sheets[WEEKLY_SHEET], snapshot_dir, file)
+        cube = incremental.load_cube(snapshot_dir, file)
+    else:
+        weekly, cube = df_sheets[WEEKLY_SHEET], None
+    log = df_sheets.get(LOG_SHEET)
+
+    if args.from_week is not None or args.to_week is not None:
+        weekly = weekly[yearweek_mask(weekly["Yearweek"], args.from_week, args.to_week)]
+        if log is not None:
+            log = log.dropna(subset=["Date"])
+            log = log[yearweek_mask(dates_to_yearweek(log["Date"])[2], args.from_week, args.to_week)]
+        # the persisted cube covers every week
+        cube = None
+    features = FeatureStore(weekly, log=log)
+    if cube is not None:
+        features.cube = cube
+    return features
+
+
+def render_cache_dir(args):
+    """
+    Rendered charts are cached next to the workbook cache, unless --no-cache.
+    """
+    if args.no_cache:
+        return None
+    import parsing.cache as stats_cache
+    from charts.render_cache import RENDER_DIR_NAME
+    return os.path.join(stats_cache.default_cache_dir(args.file or default_file()), RENDER_DIR_NAME)
+
+
+# --------------------------
+# Commands
+# --------------------------
+def cmd_weeks(args):
+    from utils.isoweeks import week_start_dates
+
+    weeks = load_weekly(args).frame(["Year", "Week", "Yearweek", "Weight avg kg"])
+    weeks.insert(3, "Monday", week_start_dates(weeks["Yearweek"]).date)
+    if args.last:
+        weeks = weeks.tail(args.last)
+    print(weeks.to_string(index=False))
+
+
+def write_stat(name, features, out, fmt="csv"):
+    table = STATS[name](features)
+    if fmt == "json":
+        table.to_json(out, orient="table", indent=1)
+    else:
+        table.to_csv(out, index=name == "describe")
+
+
+def cmd_stats(args):
+    write_stat(args.stat, load_weekly(args), args.output or sys.stdout, args.format)
+
+
+def cmd_list_charts(args):
+    import charts.render as render
+
+    for name in render.CHARTS:
+        group = "descriptive" if name in render.DESCRIPTIVE_CHARTS else \
+                "statistical" if name in render.STATISTICAL_CHARTS else "extra"
+        print(f"{name:<28}{group}")
+
+
+def chart_names(args):
+    """
+    Chart names selected by the positional names and --descriptive/--statistical/--all.
+    """
+    import charts.render as render
+
+    names = list(args.names)
+    if args.descriptive or args.all:
+        names += render.DESCRIPTIVE_CHARTS
+    if args.statistical or args.all:
+        names += render.STATISTICAL_CHARTS
+    names = list(dict.fromkeys(names or render.STATISTICAL_CHARTS))
+    unknown = [n for n in names if n not in render.CHARTS]
+    if unknown:
+        sys.exit(f"Unknown charts: {', '.join(unknown)} (see list-charts)")
+    return names
+
+
+def cmd_charts(args):
+    import charts.render as render
+
+    names = chart_names(args)
+
+    # derived columns and aggregates are computed once and shared by all the plots
+    features = load_weekly(args)
+
+    if args.show:
+        import matplotlib.pyplot as plt
+
+        for name in names:
+            render.CHARTS[name](features)
+        plt.show()
+        return
+
+    # files only: worker processes with the non-interactive backend
+    render.use_headless()
+    pdf = args.pdf if args.pdf is not None else os.path.join(args.output_dir, 'report.pdf')
+    files = render.render_charts(features, names, args.output_dir, formats=args.format,
+                                 pdf=pdf or None, max_workers=args.workers, cache_dir=render_cache_dir(args))
+    for name, written in files.items():
+        print(name, *written)
+
+
+def cmd_serve(args):
+    import parsing.server as server
+
+    # the workbook is loaded once and kept in memory, reloaded when its file changes
+    server.serve(lambda: load_weekly(args), args.file or default_file(), args.host, args.port,
+                 cache_dir=render_cache_dir(args))
+
+
+def cmd_watch(args):
+    import asyncio
+    import parsing.watch as watch
+
+    watcher = watch.WorkbookWatcher(args.file or default_file(), chart_names(args), args.output_dir,
+                                    formats=args.format, derive_weekly=args.derive_weekly,
+                                    cache_dir=render_cache_dir(args), max_workers=args.workers)
+    print(f"Watching {watcher.file} (Ctrl+C to stop)")
+    try:
+        asyncio.run(watch.watch(watcher.file, watcher.update, args.interval, args.debounce))
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_sync_db(args):
+    from parsing.sqlite_store import StatsStore, default_db
+
+    file = args.file or default_file()
+    df_sheets = open_stats(file, use_cache=not args.no_cache)
+    if args.derive_weekly:
+        import parsing.weekly_engine as weekly_engine
+        df_sheets = weekly_engine.rebuild_weekly_sheet(df_sheets)
+
+    db = args.db or default_db(file)
+    with StatsStore(db) as store:
+        written = store.sync(df_sheets, athlete=args.athlete)
+    for sheet, rows in written.items():
+        print(f"{sheet:<28}{rows if rows else 'unchanged'}")
+    print(db)
+
+
+def add_chart_selection(parser):
+    parser.add_argument("names", nargs="*", help="chart names, see list-charts")
+    parser.add_argument("--descriptive", action="store_true", help="add the descriptive charts")
+    parser.add_argument("--statistical", action="store_true", help="add the statistical charts")
+    parser.add_argument("--all", action="store_true", help="descriptive + statistical charts")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--format", nargs="*", default=["png"], help="per-chart file formats, e.g. png svg")
+    parser.add_argument("--workers", type=int, default=None)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m parsing.main",
+                                     description="Fitness stats: weekly tables and charts.")
+    parser.add_argument("--file", help="workbook path (default: $ECLIPSE_WORKSPACE/fitness_stats/data/fitness_stats.xlsx)")
+    parser.add_argument("--no-cache", action="store_true", help="always re-read the workbook and redraw the charts")
+    parser.add_argument("--derive-weekly", action="store_true", help="rebuild weekly formula columns from the daily log")
+    parser.add_argument("--incremental", action="store_true", help="re-derive only weeks changed since the last run")
+    parser.add_argument("--db", help="SQLite store to read the weekly data from instead of the workbook (sync-db writes it; default for sync-db: next to the workbook)")
+    parser.add_argument("--athlete", default="", help="athlete in the SQLite store (default: unnamed)")
+    parser.add_argument("--from-week", type=int, help="first Yearweek to use, e.g. 202501")
+    parser.add_argument("--to-week", type=int, help="last Yearweek to use, e.g. 20268")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    weeks = sub.add_parser("weeks", help="list the weeks in the workbook")
+    weeks.add_argument("--last", type=int, help="only the N most recent weeks")
+    weeks.set_defaults(func=cmd_weeks)
+
+    stats = sub.add_parser("stats", help="export a stats table")
+    stats.add_argument("stat", choices=sorted(STATS))
+    stats.add_argument("--format", choices=["csv", "json"], default="csv")
+    stats.add_argument("--output", help="file to write (default: stdout)")
+    stats.set_defaults(func=cmd_stats)
+
+    list_charts = sub.add_parser("list-charts", help="list the available chart names")
+    list_charts.set_defaults(func=cmd_list_charts)
+
+    charts = sub.add_parser("charts", help="draw charts (default: the statistical set)")
+    add_chart_selection(charts)
+    charts.add_argument("--show", action="store_true", help="open interactive windows instead of writing files")
+    charts.add_argument("--pdf", help="multi-page PDF report path (default: <output-dir>/report.pdf, '' for none)")
+    charts.set_defaults(func=cmd_charts)
+
+    watch = sub.add_parser("watch", help="redraw charts and stats tables whenever the workbook is saved")
+    add_chart_selection(watch)
+    watch.add_argument("--interval", type=float, default=1.0, help="seconds between mtime checks")
+    watch.add_argument("--debounce", type=float, default=2.0, help="seconds the file must stay unchanged")
+    watch.set_defaults(func=cmd_watch)
+
+    sync_db = sub.add_parser("sync-db", help="copy the workbook into the SQLite store (only changed sheets)")
+    sync_db.set_defaults(func=cmd_sync_db)
+
+    serve = sub.add_parser("serve", help="serve charts (PNG/SVG) and tables (JSON) over HTTP")
+    serve.add_argument("--host", default="127.0.0.1", help="bind address, 0.0.0.0 for the LAN")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
 if __name__ == '__main__':
-    df_sheets = open_stats()
-    
-    # descriptive charts
-    if DRAW_DESCRIPTIVE:
-        dwdesc.draw_weekly_weight_kcals(df_sheets['Weekly Calendar summary'])
-        dwdesc.draw_weekly_and_quarterly_lift_charts(df_sheets['Weekly Calendar summary'])
-
-    # statistical charts
-    if DRAW_STATISTICAL:
-        df = dwstat.compute_fatigue_proxy(df_sheets['Weekly Calendar summary'])
-        dwstat.plot_energy_vs_weight_change(df)
-        dwstat.plot_muscle_radar(df)
-        # dwstat.plot_sets_vs_load(df)
-        dwstat.plot_running_vs_lifting(df)
-        dwstat.plot_protein_effect(df)
-        dwstat.plot_projection_accuracy(df)
-        # dwstat.plot_correlation_heatmap(df)
-        
-    plt.show()
\ No newline at end of file
+    main()
@@ -0,0 +1,131 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+WEEKLY_SHEET = "Weekly Calendar summary"
+LOG_SHEET = "Full Calendar Log"
+
+# declared column types per sheet; any other numeric column is a float measurement
+SCHEMA = {
+    WEEKLY_SHEET: {
+        "ints": {"Year": "int16", "Week": "int8", "Yearweek": "int32"},
+        "categories": [],
+        "dates": [],
+    },
+    LOG_SHEET: {
+        "ints": {"Week": "int8", "Day.1": "int8"},
+        "categories": ["Group", "Exercise", "Where", "Day", "Cycle", "Type", "Where.1", "Notes"],
+        "dates": ["Date"],
+    },
+}
+
+RANGES = {"Week": (1, 53), "Day.1": (1, 7)}
+
+def _float_column(values):
+    # float32 only when lossless (whole kcal / kg counts, halves, ...): a decimal
+    # like 69.8 would come back as 69.80000305 in every table and export
+    as64 = values.astype(np.float64)
+    as32 = as64.astype(np.float32)
+    if np.array_equal(as32.astype(np.float64), as64, equal_nan=True):
+        return as32
+    return as64
+
+
+def _int_column(values, dtype):
+    if values.isna().any():
+        # nullable variant keeps the missing cells (they are reported separately)
+        return values.astype(dtype.capitalize())
+    return values.astype(dtype)
+
+
+def _category_column(values):
+    # mixed cells (e.g. Day: 3 and "1, 2, 3") become strings; blanks stay missing
+    return values.where(values.isna(), values.astype(str)).astype("category")
+
+
+def _bad_cells(sheet, df, column, mask, problem):
+    rows = np.flatnonzero(mask.to_numpy())
+    return pd.DataFrame({
+        "sheet": sheet,
+        "row": df.index[rows],
+        "column": column,
+        "value": df[column].iloc[rows].astype(object).to_numpy(),
+        "problem": problem,
+    })
+
+
+def apply_schema(df, sheet):
+    """
+    Cast one sheet to its compact declared dtypes.
+
+    Returns
+    -------
+    (DataFrame, DataFrame)
+        The typed sheet and a report of bad cells (sheet, row, column, value, problem):
+        text in numeric columns, unparsable dates, missing integer keys and
+        out-of-range weeks/days. Bad numeric cells become NaN.
+    """
+    spec = SCHEMA.get(sheet, {"ints": {}, "categories": [], "dates": []})
+    out = {}
+    problems = []
+
+    for column in df.columns:
+        values = df[column]
+
+        if column in spec["categories"]:
+            out[column] = _category_column(values)
+            continue
+
+        if column in spec["dates"]:
+            parsed = pd.to_datetime(values, errors="coerce")
+            problems.append(_bad_cells(sheet, df, column, values.notna() & parsed.isna(), "not a date"))
+            out[column] = parsed
+            continue
+
+        numeric = pd.to_numeric(values, errors="coerce")
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            bad = values.notna() & numeric.isna()
+            if not numeric.notna().any():
+                # genuinely textual, undeclared column: leave it alone
+                out[column] = values
+                continue
+            problems.append(_bad_cells(sheet, df, column, bad, "not a number"))
+
+        if column in RANGES:
+            lo, hi = RANGES[column]
+            problems.append(_bad_cells(sheet, df, column, (numeric < lo) | (numeric > hi), f"outside {lo}-{hi}"))
+
+        if column in spec["ints"]:
+            problems.append(_bad_cells(sheet, df, column, numeric.isna(), "missing"))
+            out[column] = _int_column(numeric, spec["ints"][column])
+        else:
+            out[column] = pd.Series(_float_column(numeric.to_numpy()), index=df.index)
+
+    report = pd.concat(problems, ignore_index=True) if problems else pd.DataFrame(
+        columns=["sheet", "row", "column", "value", "problem"])
+    return pd.DataFrame(out, index=df.index), report
+
+
+def apply_schemas(df_sheets):
+    """
+    apply_schema() on every sheet; bad cells are reported in one warning.
+    Returns (df_sheets, report).
+    """
+    typed, reports = {}, []
+    for sheet, df in df_sheets.items():
+        typed[sheet], report = apply_schema(df, sheet)
+        reports.append(report)
+
+    report = pd.concat(reports, ignore_index=True)
+    if len(report):
+        summary = report.groupby(["sheet", "column", "problem"]).size()
+        warnings.warn(f"{len(report)} bad cells in workbook:\n{summary.to_string()}")
+    return typed, report
+
+
+def memory_usage(df_sheets):
+    """
+    Deep memory footprint in bytes, per sheet.
+    """
+    return {sheet: int(df.memory_usage(deep=True).sum()) for sheet, df in df_sheets.items()}
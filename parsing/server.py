@@ -0,0 +1,240 @@
+import hashlib
+import html
+import json
+import os
+import threading
+import traceback
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import charts.render as render
+from charts.render_cache import RenderCache, data_hash
+from parsing.main import STATS
+from utils.profiling import traced
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+DEFAULT_DPI = 100
+MAX_DPI = 300
+# rendered bodies kept in memory, by ETag
+MAX_CACHED = 64
+
+
+class RequestError(ValueError):
+    """
+    A request parameter the server cannot honour (answered with 400).
+    """
+
+
+def int_param(query, name, default):
+    """
+    Positive integer query parameter `name`, or default when absent.
+    """
+    value = query.get(name, [str(default)])[0]
+    try:
+        number = int(value)
+    except ValueError:
+        raise RequestError(f"{name} must be an integer, not {value!r}") from None
+    if number < 1:
+        raise RequestError(f"{name} must be at least 1")
+    return number
+
+
+def features_hash(features):
+    """
+    Hex digest of everything served: the weekly frame and the daily log.
+    """
+    parts = [data_hash(features.base), data_hash(features.log) if features.log is not None else "no log"]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def etag(digest, *params):
+    """
+    Strong ETag of a response: a content hash plus the request parameters.
+    """
+    key = hashlib.sha256(f"{digest}|{params!r}".encode()).hexdigest()[:32]
+    return f'"{key}"'
+
+
+class ChartService:
+    """
+    The weekly data held in memory and the rendered responses.
+
+    `load` is called again when the workbook's mtime changes, so edits show
+    up on the next request. A chart's ETag is its render cache key (the data
+    the chart reads, daily log included, its source and the style), a table's
+    the hash of the weekly frame and log, so stale browser copies are never
+    revalidated as current. With a cache_dir, charts come from the on-disk
+    RenderCache shared with `charts` runs.
+    """
+
+    def __init__(self, load, file=None, cache_dir=None):
+        self._load = load
+        self.file = file
+        self.render_cache = RenderCache(cache_dir) if cache_dir else None
+        self._mtime = None
+        # pyplot and the lazily filled FeatureStore are shared: one build at a time
+        self._lock = threading.RLock()
+        self._cache = {}
+        # (chart, format, dpi) -> render cache key under the current data
+        self._keys = {}
+        self.features = None
+        self.digest = None
+        self.refresh()
+
+    def refresh(self):
+        mtime = os.path.getmtime(self.file) if self.file and os.path.exists(self.file) else None
+        if self.features is not None and mtime == self._mtime:
+            return
+        with self._lock:
+            if self.features is not None and mtime == self._mtime:
+                return
+            self.features = self._load()
+            self.digest = features_hash(self.features)
+            self._mtime = mtime
+            self._cache.clear()
+            self._keys.clear()
+
+    def _cached(self, tag, build):
+        with self._lock:
+            body = self._cache.get(tag)
+            if body is None:
+                if len(self._cache) >= MAX_CACHED:
+                    self._cache.clear()
+                body = self._cache[tag] = build()
+            return body
+
+    # --------------------------
+    # Responses: (ETag, builder of the body)
+    # --------------------------
+    def chart(self, name, fmt="png", page=1, dpi=DEFAULT_DPI):
+        with self._lock:
+            key = self._keys.get((name, fmt, dpi))
+            if key is None:
+                key = self._keys[name, fmt, dpi] = render.chart_key(self.features, name, fmt, dpi)
+        tag = etag(key, "chart", page)
+        return tag, lambda: self._cached(tag, lambda: self._render(name, fmt, page, dpi))
+
+    def table(self, name):
+        tag = etag(self.digest, "table", name)
+        return tag, lambda: self._cached(tag, lambda: STATS[name](self.features).to_json(
+            orient="table", indent=1).encode())
+
+    @traced("chart")
+    def _render(self, name, fmt, page, dpi):
+        pages = render.render_pages(self.features, name, [fmt], self.render_cache, dpi)[fmt]
+        if not 1 <= page <= len(pages):
+            raise RequestError(f"{name} has {len(pages)} figure(s)")
+        return pages[page - 1]
+
+    def index(self):
+        def links(prefix, names, ext):
+            return "".join(f'<li><a href="/{prefix}/{html.escape(n)}.{ext}">{html.escape(n)}</a></li>'
+                           for n in names)
+
+        return (
+            "<!doctype html><title>Fitness stats</title>"
+            "<h1>Charts</h1><ul>" + links("charts", render.CHARTS, "png") + "</ul>"
+            "<h1>Tables</h1><ul>" + links("tables", STATS, "json") + "</ul>"
+        ).encode()
+
+
+# --------------------------
+# HTTP
+# --------------------------
+class ChartRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /                          index page
+    GET /charts                    chart names (JSON)
+    GET /charts/<name>.<png|svg>   a chart; ?page=N for multi-figure charts, ?dpi=N for PNG
+    GET /tables/<name>.json        a stats table (pandas 'table' orient)
+
+    Charts and tables carry an ETag; a matching If-None-Match gets 304 without
+    rendering anything.
+    """
+
+    service = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        try:
+            self.service.refresh()
+            if not parts:
+                return self._send(HTTPStatus.OK, "text/html; charset=utf-8", self.service.index())
+            if parts == ["charts"]:
+                return self._send(HTTPStatus.OK, "application/json", json.dumps(list(render.CHARTS)).encode())
+            if len(parts) != 2 or "." not in parts[1]:
+                return self._error(HTTPStatus.NOT_FOUND)
+
+            name, ext = parts[1].rsplit(".", 1)
+            if parts[0] == "charts" and name in render.CHARTS and ext in FORMATS:
+                page = int_param(query, "page", 1)
+                dpi = min(int_param(query, "dpi", DEFAULT_DPI), MAX_DPI)
+                tag, build = self.service.chart(name, ext, page, dpi)
+                return self._send_tagged(tag, FORMATS[ext], build)
+            if parts[0] == "tables" and name in STATS and ext == "json":
+                tag, build = self.service.table(name)
+                return self._send_tagged(tag, "application/json", build)
+            return self._error(HTTPStatus.NOT_FOUND)
+        except RequestError as exc:
+            return self._error(HTTPStatus.BAD_REQUEST, str(exc))
+        except ConnectionError:
+            # the client went away mid-response: nothing left to answer
+            return
+        except Exception:
+            # loading or rendering failed: the client gets a short 500, the log the traceback
+            self.log_error("%s failed:\n%s", self.path, traceback.format_exc())
+            return self._error(HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def _send_tagged(self, tag, content_type, build):
+        tags = [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+        if tag in tags or "*" in tags:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", tag)
+            self.end_headers()
+            return
+        self._send(HTTPStatus.OK, content_type, build(), tag)
+
+    def _send(self, status, content_type, body, tag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if tag:
+            self.send_header("ETag", tag)
+            # always revalidate: a 304 costs nothing and new data shows up at once
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message=None):
+        self._send(status, "text/plain; charset=utf-8", (message or status.phrase).encode())
+
+
+# --------------------------
+# Main function
+# --------------------------
+def serve(load, file=None, host="127.0.0.1", port=8000, cache_dir=None):
+    """
+    Serve the charts and tables over HTTP until interrupted.
+
+    Parameters
+    ----------
+    load : callable
+        Returns the FeatureStore to serve; called at start and when `file` changes
+    file : str
+        Workbook whose mtime triggers a reload
+    host, port : str, int
+        Address to bind ('0.0.0.0' to reach it from the LAN)
+    cache_dir : str
+        Optional RenderCache directory
+    """
+    render.use_headless()
+    handler = type("Handler", (ChartRequestHandler,), {"service": ChartService(load, file, cache_dir)})
+    with ThreadingHTTPServer((host, port), handler) as httpd:
+        print(f"Serving charts on http://{host}:{httpd.server_address[1]}/")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
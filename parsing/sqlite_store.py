@@ -0,0 +1,233 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from parsing.schema import LOG_SHEET, WEEKLY_SHEET, apply_schema
+from utils.isoweeks import dates_to_yearweek, iso_week_start, split_yearweek
+
+DB_NAME = "fitness_stats.sqlite"
+
+# sheet -> table, and the indexes each table gets (all lead with the athlete)
+TABLES = {WEEKLY_SHEET: "weekly", LOG_SHEET: "log"}
+INDEXES = {
+    "weekly": [("athlete", "Year", "Week"), ("athlete", "Yearweek")],
+    "log": [("athlete", "Date"), ("athlete", "Yearweek")],
+}
+
+
+def default_db(file):
+    """
+    Database next to the workbook.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(file)), DB_NAME)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _rows(df):
+    """
+    Rows as tuples of Python scalars: NaN / NA -> NULL, dates -> ISO text.
+    """
+    columns = []
+    for name in df.columns:
+        values = df[name]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime("%Y-%m-%d %H:%M:%S")
+        columns.append(values.astype(object).where(values.notna(), None).to_numpy())
+    return list(zip(*columns)) if columns else []
+
+
+def frame_digest(df):
+    sha = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    sha.update(repr(list(df.columns)).encode())
+    return sha.hexdigest()
+
+
+class StatsStore:
+    """
+    Weekly summaries and daily log entries of one or more athletes in SQLite.
+
+    sync() copies open_stats() output in (a sheet is rewritten only when its
+    content changed); weeks() and log() read back just a range, through the
+    (athlete, Year, Week) and (athlete, Date) indexes, as frames with the
+    workbook's column names and compact dtypes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources "
+            "(athlete TEXT, sheet TEXT, digest TEXT, rows INTEGER, synced REAL, PRIMARY KEY (athlete, sheet))"
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------------------------
+    # Writing
+    # --------------------------
+    def _columns(self, table):
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def _types(self, table):
+        return {row[1]: row[2] for row in self.conn.execute(f"PRAGMA table_info({_quote(table)})")}
+
+    def _ensure_table(self, table, df):
+        existing = self._columns(table)
+        if not existing:
+            columns = ", ".join(f"{_quote(c)} {_sql_type(df[c].dtype)}" for c in df.columns)
+            self.conn.execute(f"CREATE TABLE {_quote(table)} (athlete TEXT NOT NULL, {columns})")
+        else:
+            # columns added to the workbook since the table was created
+            for c in df.columns:
+                if c not in existing:
+                    self.conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(c)} {_sql_type(df[c].dtype)}")
+        for columns in INDEXES[table]:
+            name = f"idx_{table}_{'_'.join(c.lower() for c in columns)}"
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {_quote(table)} "
+                              f"({', '.join(_quote(c) for c in columns)})")
+
+    def sync(self, df_sheets, athlete=""):
+        """
+        Replace the athlete's rows of every sheet whose content changed since the
+        last sync (one transaction).
+
+        Returns
+        -------
+        dict
+            sheet -> rows written (0 when the sheet was unchanged).
+        """
+        written = {}
+        with self.conn:
+            for sheet, table in TABLES.items():
+                if sheet not in df_sheets:
+                    continue
+                df = df_sheets[sheet]
+                if table == "log" and "Yearweek" not in df.columns:
+                    # week lookups on the log without scanning dates
+                    df = df.assign(Yearweek=dates_to_yearweek(pd.to_datetime(df["Date"]))[2])
+                digest = frame_digest(df)
+                known = self.conn.execute("SELECT digest FROM sources WHERE athlete = ? AND sheet = ?",
+                                          (athlete, sheet)).fetchone()
+                if known and known[0] == digest:
+                    written[sheet] = 0
+                    continue
+
+                self._ensure_table(table, df)
+                self.conn.execute(f"DELETE FROM {_quote(table)} WHERE athlete = ?", (athlete,))
+                columns = ", ".join(["athlete", *map(_quote, df.columns)])
+                marks = ", ".join("?" * (len(df.columns) + 1))
+                self.conn.executemany(f"INSERT INTO {_quote(table)} ({columns}) VALUES ({marks})",
+                                      ((athlete, *row) for row in _rows(df)))
+                self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                                  (athlete, sheet, digest, len(df), time.time()))
+                written[sheet] = len(df)
+        return written
+
+    # --------------------------
+    # Queries
+    # --------------------------
+    def athletes(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT athlete FROM sources ORDER BY athlete")]
+
+    def _select(self, table, where, params, columns, order):
+        if columns is not None:
+            available = self._columns(table)
+            missing = [c for c in columns if c not in available]
+            if missing:
+                raise KeyError(f"Unknown {table} columns: {missing}")
+        selected = "*" if columns is None else ", ".join(["athlete", *map(_quote, columns)])
+        sql = f"SELECT {selected} FROM {_quote(table)}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return pd.read_sql_query(sql + f" ORDER BY {order}", self.conn, params=params)
+
+    def _typed(self, df, table, sheet, athlete):
+        # all-NULL numeric columns come back as objects
+        types = self._types(table)
+        for c in df.columns:
+            if types.get(c) in ("REAL", "INTEGER") and df[c].dtype == object:
+                df[c] = pd.to_numeric(df[c]).astype(np.float64)
+        if "Date" in df.columns:
+            df["Date"] = pd.to_datetime(df["Date"])
+        if athlete is not None:
+            df = df.drop(columns="athlete")
+        df, _ = apply_schema(df, sheet)
+        return df
+
+    def weeks(self, start=None, end=None, athlete="", columns=None):
+        """
+        Weekly rows with start <= Yearweek <= end (chronologically: Yearweek is
+        not zero padded, so the bounds are compared as (Year, Week)).
+
+        Parameters
+        ----------
+        start, end : int
+            Yearweek codes, open when None
+        athlete : str
+            One athlete (default: the unnamed one), None for all with an 'athlete' column
+        columns : list of str
+            Sheet columns to read, default all
+        """
+        where, params = [], []
+        if athlete is not None:
+            where.append("athlete = ?")
+            params.append(athlete)
+        for bound, op in ((start, ">="), (end, "<=")):
+            if bound is not None:
+                year, week = split_yearweek([bound])
+                where.append(f"(Year, Week) {op} (?, ?)")
+                params += [int(year[0]), int(week[0])]
+        if columns is not None:
+            columns = list(dict.fromkeys(["Year", "Week", "Yearweek", *columns]))
+        df = self._select("weekly", where, params, columns, "athlete, Year, Week")
+        return self._typed(df, "weekly", WEEKLY_SHEET, athlete)
+
+    def log(self, start=None, end=None, athlete="", columns=None):
+        """
+        Log entries with start <= Date <= end (date-like bounds, days inclusive).
+        Same athlete / columns arguments as weeks().
+        """
+        where, params = [], []
+        if athlete is not None:
+            where.append("athlete = ?")
+            params.append(athlete)
+        if start is not None:
+            where.append("Date >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            where.append("Date < ?")
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+        if columns is not None:
+            columns = list(dict.fromkeys(["Date", *columns]))
+        df = self._select("log", where, params, columns, "athlete, Date")
+        return self._typed(df, "log", LOG_SHEET, athlete)
+
+    def log_weeks(self, start=None, end=None, athlete="", columns=None):
+        """
+        Log entries of the ISO weeks start..end (Yearweek codes).
+        """
+        first = iso_week_start(*split_yearweek([start]))[0] if start is not None else None
+        last = iso_week_start(*split_yearweek([end]))[0] + np.timedelta64(6, "D") if end is not None else None
+        return self.log(first, last, athlete, columns)
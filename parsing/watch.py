@@ -0,0 +1,193 @@
+import asyncio
+import os
+import posixpath
+import warnings
+import xml.etree.ElementTree as ET
+import zipfile
+
+import charts.render as render
+import parsing.cache as stats_cache
+import parsing.incremental as incremental
+from charts.render_cache import data_hash
+from parsing.main import LOG_SHEET, STAT_INPUTS, STATS, WEEKLY_SHEET, read_stats, write_stat
+from utils.features import FeatureStore
+
+POLL_INTERVAL = 1.0
+DEBOUNCE = 2.0
+
+# workbook parts shared by every sheet (cell strings, number formats): a change reloads all
+SHARED_PARTS = ["xl/sharedStrings.xml", "xl/styles.xml"]
+NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+
+# --------------------------
+# What changed
+# --------------------------
+def sheet_fingerprints(file):
+    """
+    {sheet name: CRC-32 of its worksheet part}, plus SHARED_PARTS by part name.
+    Read from the xlsx zip directory: no cell is parsed.
+    """
+    with zipfile.ZipFile(file) as book:
+        crcs = {info.filename: info.CRC for info in book.infolist()}
+        workbook = ET.fromstring(book.read("xl/workbook.xml"))
+        rels = ET.fromstring(book.read("xl/_rels/workbook.xml.rels"))
+
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.findall("rel:Relationship", NS)}
+    prints = {}
+    for sheet in workbook.findall("main:sheets/main:sheet", NS):
+        target = targets.get(sheet.get(R_ID), "")
+        part = target[1:] if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+        prints[sheet.get("name")] = crcs.get(part)
+    prints.update({part: crcs.get(part) for part in SHARED_PARTS})
+    return prints
+
+
+def changed_sheets(old, new, sheets):
+    """
+    The sheets among `sheets` whose worksheet part differs between two fingerprints
+    (all of them on the first run or when a shared part changed).
+    """
+    if old is None or any(old.get(part) != new.get(part) for part in SHARED_PARTS):
+        return list(sheets)
+    return [sheet for sheet in sheets if old.get(sheet) != new.get(sheet)]
+
+
+class WorkbookWatcher:
+    """
+    The state of the last update: loaded sheets, sheet fingerprints, the
+    weekly FeatureStore and the input hash of every chart and stats table.
+
+    update() after a save reloads only the changed sheets, re-derives only the
+    changed weeks (parsing/incremental.py) and redraws only the charts, and
+    rewrites only the tables, whose inputs (render.CHART_INPUTS, STAT_INPUTS)
+    now hash differently. Unchanged charts are not even submitted for rendering.
+    """
+
+    def __init__(self, file, names, output_dir="reports", formats=("png",), derive_weekly=False,
+                 cache_dir=None, max_workers=None):
+        self.file = file
+        self.names = list(names)
+        self.output_dir = output_dir
+        self.formats = list(formats)
+        self.derive_weekly = derive_weekly
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.snapshot_dir = stats_cache.default_cache_dir(file)
+        # the log is only read when it feeds the weekly sheet or a chart drawn from it
+        self.uses_log = any(name in render.LOG_CHARTS for name in self.names)
+        self.sheets = [LOG_SHEET, WEEKLY_SHEET] if derive_weekly or self.uses_log else [WEEKLY_SHEET]
+
+        self.df_sheets = {}
+        self.fingerprints = None
+        self.features = None
+        self.hashes = {}
+
+    def _changed(self, key, data):
+        digest = data_hash(data)
+        if self.hashes.get(key) == digest:
+            return False
+        self.hashes[key] = digest
+        return True
+
+    def update(self):
+        """
+        Bring the outputs up to date with the workbook.
+
+        Returns
+        -------
+        dict
+            'sheets' reloaded, 'weeks' (Yearweeks) re-derived, 'charts' redrawn
+            and 'stats' rewritten.
+        """
+        summary = {"sheets": [], "weeks": [], "charts": [], "stats": []}
+        prints = sheet_fingerprints(self.file)
+        summary["sheets"] = changed_sheets(self.fingerprints, prints, self.sheets)
+        if not summary["sheets"]:
+            self.fingerprints = prints
+            return summary
+
+        self.df_sheets.update(read_stats(self.file, summary["sheets"]))
+        self.fingerprints = prints
+        df_sheets = self.df_sheets
+        if self.derive_weekly:
+            import parsing.weekly_engine as weekly_engine
+            df_sheets = weekly_engine.rebuild_weekly_sheet(df_sheets)
+
+        df, summary["weeks"] = incremental.ingest_weekly(df_sheets[WEEKLY_SHEET], self.snapshot_dir, self.file)
+        log_changed = self.uses_log and LOG_SHEET in summary["sheets"]
+        if not summary["weeks"] and not log_changed and self.features is not None:
+            return summary
+
+        features = FeatureStore(df, log=self.df_sheets.get(LOG_SHEET) if self.uses_log else None)
+        features.cube = incremental.load_cube(self.snapshot_dir, self.file)
+        self.features = features
+
+        summary["charts"] = [
+            name for name in self.names
+            if self._changed(f"chart:{name}", render.CHART_INPUTS.get(name, lambda s: s.base)(features))
+        ]
+        summary["stats"] = [name for name in STATS if self._changed(f"stat:{name}", STAT_INPUTS[name](features))]
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        if summary["charts"]:
+            render.render_charts(features, summary["charts"], self.output_dir, self.formats,
+                                 max_workers=self.max_workers, cache_dir=self.cache_dir)
+        for name in summary["stats"]:
+            write_stat(name, features, os.path.join(self.output_dir, f"{name}.csv"))
+        return summary
+
+
+def format_summary(summary):
+    if not summary["sheets"]:
+        return "no sheet changed"
+    weeks = summary["weeks"]
+    shown = ", ".join(str(w) for w in weeks[:8]) + (", ..." if len(weeks) > 8 else "")
+    return (f"sheets: {', '.join(summary['sheets'])} | weeks: {len(weeks)} ({shown or '-'}) | "
+            f"charts: {', '.join(summary['charts']) or '-'} | stats: {', '.join(summary['stats']) or '-'}")
+
+
+# --------------------------
+# Main function
+# --------------------------
+def _signature(file):
+    try:
+        stat = os.stat(file)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def watch(file, on_save, interval=POLL_INTERVAL, debounce=DEBOUNCE):
+    """
+    Poll `file` and call on_save() once per save, until cancelled.
+
+    A change of mtime / size starts a debounce: the file must then stay the
+    same for `debounce` seconds, so a burst of writes (Excel writes a temporary
+    file, then renames it) is one update; a save made during an update is picked
+    up by the next poll. on_save() runs in a worker thread, off the event loop,
+    and is also called once at start. Errors (e.g. a half-written zip) are
+    reported and the next save is waited for.
+    """
+    loop = asyncio.get_running_loop()
+    handled = None
+    while True:
+        signature = _signature(file)
+        if signature is not None and signature != handled:
+            while True:
+                await asyncio.sleep(debounce)
+                settled = _signature(file)
+                if settled == signature:
+                    break
+                signature = settled
+            handled = signature
+            try:
+                summary = await loop.run_in_executor(None, on_save)
+                print(format_summary(summary), flush=True)
+            except Exception as exc:
+                warnings.warn(f"Update of {file} failed: {exc!r}")
+        await asyncio.sleep(interval)
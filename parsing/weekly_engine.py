@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from utils.features import MUSCLES
+from utils.isoweeks import dates_to_yearweek
+from utils.utils import add_tons_columns
+
+WEEKLY_SHEET = "Weekly Calendar summary"
+LOG_SHEET = "Full Calendar Log"
+
+# daily log column -> (weekly column, how days are combined within the week)
+DAILY_FIELDS = {
+    "Duration mins": ("Mins gym", "sum"),
+    "km run": ("km run", "sum"),
+    "Weight": ("Weight avg kg", "mean"),
+    "kcals": ("kcals daily avg", "mean"),
+    "Proteins": ("Proteins daily avg", "mean"),
+    "Resting energy kcal": ("Resting energy kcal", "mean"),
+    "Active energy kcal": ("Active energy kcal", "mean"),
+}
+
+
+def exercise_totals(df_log):
+    """
+    kg lifted per log row: the 'Total' (Series * Reps * kg) formula, recomputed
+    where the workbook did not cache it. Returns a float array.
+    """
+    total = df_log["Total"].astype(float)
+    recomputed = df_log["Volume set Series"] * df_log["Volume set Reps"] * df_log["Volume set kg"]
+    return total.fillna(recomputed).fillna(0.0).to_numpy(dtype=float)
+
+
+def derive_weekly_summary(df_log):
+    """
+    Rebuild the Weekly Calendar summary columns from the Full Calendar Log.
+
+    All work is groupby/unstack over the whole log (no per-row Python).
+    Muscle kg/sets and Totals kg come from exercise rows; gym minutes, km,
+    weight and energy are per-day values, taken once per date.
+    Columns whose daily source is missing from the log are NaN.
+    """
+    log = df_log[df_log["Date"].notna()]
+    dates = pd.to_datetime(log["Date"])
+    year, week, yearweek = dates_to_yearweek(dates)
+
+    total = exercise_totals(log)
+
+    group = log["Group"].to_numpy()
+    in_muscles = np.isin(group, MUSCLES)
+
+    lifts = pd.DataFrame({
+        "Yearweek": yearweek[in_muscles],
+        "Group": group[in_muscles],
+        "kg": total[in_muscles],
+        "sets": log["Volume set Series"].fillna(0).to_numpy(dtype=float)[in_muscles],
+    })
+    per_muscle = lifts.groupby(["Yearweek", "Group"])[["kg", "sets"]].sum().unstack("Group", fill_value=0.0)
+    per_muscle = per_muscle.reindex(columns=pd.MultiIndex.from_product([["kg", "sets"], MUSCLES]), fill_value=0.0)
+    per_muscle.columns = [f"{m} {measure}" for measure, m in per_muscle.columns]
+
+    weeks = pd.DataFrame({"Year": year, "Week": week, "Yearweek": yearweek}).drop_duplicates("Yearweek")
+    weekly = weeks.set_index("Yearweek").join(per_muscle)
+    weekly[per_muscle.columns] = weekly[per_muscle.columns].fillna(0.0)
+    weekly["Totals kg"] = weekly[[f"{m} kg" for m in MUSCLES]].sum(axis=1)
+
+    # per-day values: one row per date, then combined per week
+    present = [c for c in DAILY_FIELDS if c in log.columns]
+    days = log[present].assign(Date=dates.to_numpy(), Yearweek=yearweek).groupby("Date").first()
+    for src, (dst, how) in DAILY_FIELDS.items():
+        if src in present:
+            weekly[dst] = days.groupby("Yearweek")[src].agg(how).astype(float)
+        else:
+            weekly[dst] = np.nan
+
+    # weekly sheet units: kcals daily avg in thousands, surplus over 7 days
+    weekly["kcals daily avg"] = weekly["kcals daily avg"] / 1000
+    weekly["Weekly total cal surplus (deficit)"] = 7 * (
+        weekly["kcals daily avg"] * 1000 - weekly["Resting energy kcal"] - weekly["Active energy kcal"]
+    )
+
+    weekly = weekly.reset_index().sort_values(["Year", "Week"]).reset_index(drop=True)
+    weekly = weekly[["Year", "Week"] + [c for c in weekly.columns if c not in ("Year", "Week")]]
+    return add_tons_columns(weekly)
+
+
+def rebuild_weekly_sheet(df_sheets):
+    """
+    Replace the weekly sheet's formula columns with values derived from the log.
+    Weeks or columns the log cannot provide keep their spreadsheet values.
+    """
+    sheet = df_sheets[WEEKLY_SHEET].set_index("Yearweek")
+    derived = derive_weekly_summary(df_sheets[LOG_SHEET]).set_index("Yearweek")
+
+    columns = list(df_sheets[WEEKLY_SHEET].columns)
+    columns += [c for c in derived.reset_index().columns if c not in columns]
+
+    weekly = derived.combine_first(sheet).reset_index()[columns]
+    weekly = weekly.sort_values(["Year", "Week"]).reset_index(drop=True)
+    weekly[["Year", "Week"]] = weekly[["Year", "Week"]].astype(np.int64)
+
+    df_sheets = dict(df_sheets)
+    df_sheets[WEEKLY_SHEET] = add_tons_columns(weekly)
+    return df_sheets
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from parsing.weekly_engine import exercise_totals
+from utils.features import MUSCLES
+
+# EWMA time constants in days (alpha = 2 / (N + 1), as in the EWMA-ACWR literature)
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+# Foster monotony / strain window
+MONOTONY_DAYS = 7
+
+TOTAL = "Total"
+GROUPS = MUSCLES + [TOTAL]
+METRICS = ["load", "acute", "chronic", "acwr", "monotony", "strain"]
+
+
+def team_log(logs):
+    """
+    One Full Calendar Log for several athletes: {athlete: df_log} -> df with an 'Athlete' column.
+    """
+    return pd.concat(logs, names=["Athlete", None]).reset_index(level="Athlete")
+
+
+def daily_load(df_log, athlete_col=None):
+    """
+    kg lifted per calendar day and muscle group (plus Total); rest days are 0.
+
+    Rows are scattered straight into a days x (athlete, group) matrix with
+    one bincount, instead of a groupby over string keys.
+
+    Returns
+    -------
+    (DataFrame, Series)
+        Days x groups (or x (athlete, group) with `athlete_col`), and each
+        column's first training day.
+    """
+    group = pd.Index(MUSCLES).get_indexer(df_log["Group"])
+    keep = (group >= 0) & df_log["Date"].notna().to_numpy()
+    log = df_log[keep]
+    group = group[keep]
+
+    dates = pd.to_datetime(log["Date"]).dt.normalize().to_numpy()
+    start = dates.min()
+    day = ((dates - start) // np.timedelta64(1, "D")).astype(np.int64)
+    n_days = int(day.max()) + 1
+    if athlete_col:
+        athlete, athletes = pd.factorize(log[athlete_col].astype(str), sort=True)
+    else:
+        athlete, athletes = np.zeros(len(log), dtype=np.int64), pd.Index([""])
+
+    n_cols = len(athletes) * len(MUSCLES)
+    flat = day * n_cols + athlete * len(MUSCLES) + group
+    matrix = np.bincount(flat, weights=exercise_totals(log), minlength=n_days * n_cols)
+    matrix = matrix.reshape(n_days, len(athletes), len(MUSCLES))
+    matrix = np.concatenate([matrix, matrix.sum(axis=2, keepdims=True)], axis=2)
+
+    first_day = np.full(len(athletes), n_days, dtype=np.int64)
+    np.minimum.at(first_day, athlete, day)
+    first = np.repeat(start + first_day.astype("timedelta64[D]"), len(GROUPS))
+
+    index = pd.date_range(start, periods=n_days, freq="D", name="Date")
+    if athlete_col:
+        columns = pd.MultiIndex.from_product([athletes, GROUPS], names=["Athlete", "Group"])
+    else:
+        columns = pd.Index(GROUPS, name="Group")
+    load = pd.DataFrame(matrix.reshape(n_days, -1), index=index, columns=columns)
+    return load, pd.Series(first, index=columns)
+
+
+def workload_model(df_log, athlete_col=None):
+    """
+    Daily acute:chronic workload model per muscle group from the Full Calendar Log.
+
+    acute / chronic are EWMAs of the daily load (ACUTE_DAYS, CHRONIC_DAYS), both
+    started from zero load; acwr = acute / chronic. monotony = mean / std of the
+    last MONOTONY_DAYS daily loads, strain = their sum * monotony (Foster).
+    Everything is a column-wise recursive filter or rolling window over the
+    days x series matrix, so a whole team is processed at once.
+
+    Returns
+    -------
+    DataFrame
+        Indexed by day, columns (metric, group) or (metric, athlete, group).
+        Days before an athlete's first session are NaN.
+    """
+    load, first = daily_load(df_log, athlete_col)
+
+    # a zero-load day in front: every EWMA starts from rest, not from the first session
+    padded = pd.concat([pd.DataFrame(0.0, index=[load.index[0] - pd.Timedelta(days=1)], columns=load.columns),
+                        load])
+    acute = padded.ewm(alpha=2 / (ACUTE_DAYS + 1), adjust=False).mean().iloc[1:]
+    chronic = padded.ewm(alpha=2 / (CHRONIC_DAYS + 1), adjust=False).mean().iloc[1:]
+
+    window = load.rolling(MONOTONY_DAYS, min_periods=MONOTONY_DAYS)
+    week_sum, week_std = window.sum(), window.std()
+    monotony = (week_sum / MONOTONY_DAYS) / week_std.where(week_std > 0)
+
+    metrics = {
+        "load": load,
+        "acute": acute,
+        "chronic": chronic,
+        "acwr": acute / chronic.where(chronic > 0),
+        "monotony": monotony,
+        "strain": week_sum * monotony,
+    }
+    model = pd.concat(metrics, axis=1, names=["metric"])
+
+    # monotony / strain also need a full window of the athlete's own days
+    warmup = {m: pd.Timedelta(days=MONOTONY_DAYS - 1) if m in ("monotony", "strain") else pd.Timedelta(0)
+              for m in METRICS}
+    starts = np.concatenate([(first + warmup[m]).to_numpy() for m in METRICS])
+    return model.mask(model.index.to_numpy()[:, None] < starts[None, :])
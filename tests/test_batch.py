@@ -0,0 +1,30 @@
+import os
+
+import parsing.batch as batch
+
+
+def test_athlete_names_unique_across_folders(tmp_path):
+    files = [str(tmp_path / "team" / a / "fitness_stats.xlsx") for a in ("alice", "bob")]
+    names = batch.athlete_names(files)
+    assert sorted(names.values()) == [os.path.join("alice", "fitness_stats"), os.path.join("bob", "fitness_stats")]
+    assert batch.athlete_names([str(tmp_path / "carol.xlsx")]) == {str(tmp_path / "carol.xlsx"): "carol"}
+
+
+def fake_workbook(file, charts, stats, output_dir, fmt="png", athlete=None):
+    if os.path.basename(file) == "crash.xlsx":
+        os._exit(1)
+    return {"athlete": athlete, "file": file, "ok": True, "error": None, "stats": {}, "files": [],
+            "failed_charts": {}, "seconds": 0.0}
+
+
+def test_crashed_worker_fails_only_its_workbook(tmp_path, monkeypatch):
+    # forked workers inherit the patched worker function
+    monkeypatch.setattr(batch, "process_workbook", fake_workbook)
+    for name in ("a", "b", "crash", "c", "d"):
+        (tmp_path / f"{name}.xlsx").touch()
+
+    results = batch.run_batch(str(tmp_path), charts=[], stats=[], output_dir=str(tmp_path), max_workers=2)
+
+    assert [r["athlete"] for r in results] == ["a", "b", "c", "crash", "d"]
+    assert [r["ok"] for r in results] == [True, True, True, False, True]
+    assert "BrokenProcessPool" in results[3]["error"]
@@ -0,0 +1,28 @@
+import glob
+import os
+
+import pandas as pd
+
+from parsing.cache import load_or_build
+
+
+def build(file):
+    return {"sheet": pd.DataFrame({"a": [1.0, 2.0]})}
+
+
+def test_max_entries_spans_workbooks(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    files = []
+    for i in range(4):
+        files.append(str(tmp_path / f"w{i}.xlsx"))
+        with open(files[-1], "wb") as fh:
+            fh.write(bytes([i]))
+        load_or_build(files[-1], build, cache_dir, max_entries=2)
+
+    assert len(glob.glob(os.path.join(cache_dir, "*.npz"))) == 2
+    assert len(glob.glob(os.path.join(cache_dir, "manifest-*.json"))) == 2
+    # the evicted workbook is rebuilt, the recent ones come from the cache
+    built = []
+    load_or_build(files[0], lambda f: built.append(f) or build(f), cache_dir, max_entries=2)
+    load_or_build(files[0], lambda f: built.append(f) or build(f), cache_dir, max_entries=2)
+    assert built == [files[0]]
@@ -0,0 +1,38 @@
+import numpy as np
+
+from utils.changepoints import SegmentCost, binary_segmentation, pelt
+
+
+def objective(x, breaks, penalty):
+    cost = SegmentCost(x)
+    bounds = [0, *breaks, len(x)]
+    return sum(cost(s, e) for s, e in zip(bounds[:-1], bounds[1:])) + penalty * len(breaks)
+
+
+def optimal_objective(x, penalty, min_size):
+    # O(n^2) dynamic program over every admissible last segment
+    cost = SegmentCost(x)
+    best = np.full(len(x) + 1, np.inf)
+    best[0] = -penalty
+    for end in range(min_size, len(x) + 1):
+        for start in [0, *range(min_size, end - min_size + 1)]:
+            best[end] = min(best[end], best[start] + cost(start, end) + penalty)
+    return best[len(x)]
+
+
+def test_pelt_is_optimal():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(4, 30))
+        x = rng.normal(0, 1, n) + np.repeat(rng.normal(0, 2, 3), n)[:n]
+        penalty = rng.uniform(0.5, 6)
+        for min_size in (1, 2, 3):
+            breaks = pelt(x, penalty, min_size)
+            assert all(b - a >= min_size for a, b in zip([0, *breaks], [*breaks, n]))
+            assert np.isclose(objective(x, breaks, penalty), optimal_objective(x, penalty, min_size))
+
+
+def test_clear_shift_found_by_both_searches():
+    x = np.r_[np.zeros(20), np.full(20, 5.0)] + np.random.default_rng(1).normal(0, 0.1, 40)
+    assert pelt(x) == [20]
+    assert binary_segmentation(x) == [20]
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.correlations import CorrelationCube
+
+
+def weekly_frame(n=60):
+    rng = np.random.default_rng(0)
+    a = rng.normal(0, 1, n)
+    df = pd.DataFrame({"a": a, "b": np.r_[0, 0, a[:-2]] + rng.normal(0, 0.5, n), "c": rng.normal(0, 1, n)})
+    # missing weeks at different places in each column
+    df.loc[[3, 17, 40], "a"] = np.nan
+    df.loc[[8, 17, 55], "b"] = np.nan
+    return df
+
+
+def test_lagged_pearson_matches_pandas():
+    df = weekly_frame()
+    cube = CorrelationCube(df, max_lag=4)
+    for x in df:
+        for y in df:
+            for lag in cube.lags:
+                expected = df[x].corr(df[y].shift(-lag))
+                assert cube.pair(x, y)[lag] == pytest.approx(expected)
+    # b follows a two weeks later
+    assert cube.strongest(lag=None, top=1)[["lag", "x", "y"]].values.tolist() == [[2, "a", "b"]]
+
+
+def test_spearman_matches_pandas_without_gaps():
+    df = weekly_frame().fillna(0.0)
+    cube = CorrelationCube(df, max_lag=0)
+    np.testing.assert_allclose(cube.matrix("spearman"), df.corr("spearman"))
+
+
+def test_min_periods():
+    df = pd.DataFrame({"a": [1.0, 2.0, np.nan, 4.0], "b": [2.0, 1.0, 3.0, np.nan]})
+    assert np.isnan(CorrelationCube(df, max_lag=0, min_periods=3).pair("a", "b")[0])
@@ -0,0 +1,52 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from charts.labels import ABOVE, ABOVE_OR_BELOW, CENTER, LabelPlacer
+
+plt.switch_backend("Agg")
+
+
+def overlaps(a, b):
+    return a.x0 < b.x1 and b.x0 < a.x1 and a.y0 < b.y1 and b.y0 < a.y1
+
+
+def rendered_boxes(fig, annotations):
+    fig.canvas.draw()
+    renderer = fig.canvas.get_renderer()
+    # a pixel of slack for anti-aliased glyph edges
+    return [a.get_window_extent(renderer).padded(-1) for a in annotations]
+
+
+def test_no_overlapping_labels():
+    rng = np.random.default_rng(0)
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(6, 3))
+    for ax in (ax1, ax2):
+        ax.set_xlim(0, 10)
+        ax.set_ylim(0, 10)
+    placer = LabelPlacer(fig)
+    x, y = rng.uniform(0, 10, 300), rng.uniform(0, 10, 300)
+    placer.add(ax1, x, y, [f"{v:.1f}" for v in y], ABOVE_OR_BELOW)
+    placer.add(ax2, x, y, [f"{v:.0f} kg" for v in x], CENTER, priority=1)
+    placer.add(ax2, [5.0], [5.0], ["first"], ABOVE, priority=0)
+    fig.tight_layout()
+    placed = placer.place()
+
+    # dense enough that some labels are hidden, the highest priority one is kept
+    assert 0 < len(placed) < 600
+    assert any(a.get_text() == "first" for a in placed)
+    boxes = rendered_boxes(fig, placed)
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            assert not overlaps(boxes[i], boxes[j]), (placed[i].get_text(), placed[j].get_text())
+    plt.close(fig)
+
+
+def test_obstacles_are_avoided():
+    fig, ax = plt.subplots()
+    ax.set_xlim(0, 10)
+    ax.set_ylim(0, 10)
+    placer = LabelPlacer(fig)
+    placer.add_obstacles(ax, [5.0], [5.0], 200, 200)
+    placer.add(ax, [5.0, 1.0], [5.0, 1.0], ["hidden", "shown"])
+    assert [a.get_text() for a in placer.place()] == ["shown"]
+    plt.close(fig)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from parsing.incremental import ingest_weekly
+from utils.online import ROLLING_COLUMNS
+from utils.utils import TONS_COLUMNS
+
+
+def weekly_frame(n=10):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Year": 2025, "Week": np.arange(1, n + 1)})
+    df["Yearweek"] = np.where(df["Week"] < 10, 20250 + df["Week"], 202500 + df["Week"])
+    df["Weight avg kg"] = 70 + 0.1 * np.arange(n)
+    df["kcals daily avg"] = 2.5 + rng.normal(0, 0.1, n)
+    df["Mins gym"] = rng.uniform(60, 180, n)
+    df["km run"] = rng.uniform(0, 10, n)
+    for kg in TONS_COLUMNS:
+        df[kg] = rng.uniform(1000, 5000, n)
+    return df
+
+
+def test_edit_within_first_window(tmp_path):
+    # a week with fewer than window - 1 weeks before it reseeds the rolling means from all of them
+    df = weekly_frame()
+    ingest_weekly(df, str(tmp_path / "incremental"))
+    df.loc[2, ["Weight avg kg", "kcals daily avg", "Totals kg"]] = [71.0, 3.1, 9000.0]
+
+    incremental, changed = ingest_weekly(df, str(tmp_path / "incremental"))
+    full, _ = ingest_weekly(df, str(tmp_path / "full"))
+
+    assert changed == [20253]
+    for column in ROLLING_COLUMNS.values():
+        np.testing.assert_allclose(incremental[column], full[column])
+
+
+def test_workbooks_share_snapshot_dir(tmp_path):
+    # two workbooks in one folder keep their own snapshots
+    snapshot_dir = str(tmp_path / "cache")
+    first, second = weekly_frame(), weekly_frame()
+    second["Weight avg kg"] += 10
+    ingest_weekly(first, snapshot_dir, str(tmp_path / "a.xlsx"))
+    ingest_weekly(second, snapshot_dir, str(tmp_path / "b.xlsx"))
+
+    again, changed = ingest_weekly(first, snapshot_dir, str(tmp_path / "a.xlsx"))
+
+    assert changed == []
+    np.testing.assert_allclose(again["Weight avg kg"], first["Weight avg kg"])
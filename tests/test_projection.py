@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.projection import EnergyModel, energy_model, future_yearweeks, projection_fan, simulate
+
+
+def step_loop(model, intake, active, weeks):
+    path = [model.weight]
+    for _ in range(weeks):
+        w = path[-1]
+        path.append(w + 7 * (intake - model.resting_per_kg * w - active) / model.kcal_per_kg)
+    return np.array(path)
+
+
+def test_simulate_closed_form_matches_recurrence():
+    model = EnergyModel(80.0, 202510, 2600.0, 500.0, 22.0)
+    intake = np.array([2000.0, 2600.0, 3100.0])
+    active = np.array([[300.0], [700.0]])
+    paths = simulate(model, intake, active, weeks=30)
+    assert paths.shape == (2, 3, 31)
+    for i in range(2):
+        for j in range(3):
+            np.testing.assert_allclose(paths[i, j], step_loop(model, intake[j], active[i, 0], 30))
+    # no resting rate: linear drift
+    flat = EnergyModel(80.0, 202510, 2600.0, 500.0, 0.0)
+    np.testing.assert_allclose(simulate(flat, weeks=5), step_loop(flat, 2600.0, 500.0, 5))
+
+
+def test_energy_model_recovers_intake():
+    n = 10
+    weight = np.linspace(80, 79, n)
+    resting = 22.0 * weight
+    df = pd.DataFrame({
+        "Yearweek": [20251 + i if i < 9 else 202501 + i for i in range(n)],
+        "Weight avg kg": weight,
+        "Resting energy kcal": resting,
+        "Active energy kcal": 400.0,
+        # surplus is weekly: 7 * (intake - resting - active)
+        "Weekly total cal surplus (deficit)": 7 * (2300.0 - resting - 400.0),
+    })
+    df.loc[n - 1, "Active energy kcal"] = np.nan
+    model = energy_model(df, weeks=5)
+    assert model.intake == pytest.approx(2300.0)
+    assert model.active == pytest.approx(400.0)
+    assert model.resting_per_kg == pytest.approx(22.0)
+    assert model.weight == weight[-1] and model.yearweek == 202510
+
+    fan = projection_fan(df, weeks=4, model=model)
+    assert fan["Yearweek"].tolist() == [202510, 202511, 202512, 202513, 202514]
+    assert (fan["q5"] <= fan["q50"]).all() and (fan["q50"] <= fan["q95"]).all()
+
+
+def test_future_yearweeks_cross_year():
+    assert future_yearweeks(202052, 3).tolist() == [202052, 202053, 20211, 20212]
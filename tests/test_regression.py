@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils.regression import ols, robust, t_critical, t_pvalue
+
+# two-sided 95% / 99% quantiles of Student's t (tables)
+T_975 = {1: 12.706204736, 5: 2.570581836, 10: 2.228138852, 30: 2.042272456}
+T_995 = {20: 2.845339710}
+
+
+def test_t_quantiles():
+    for dof, t in T_975.items():
+        assert t_pvalue(t, dof) == pytest.approx(0.05, abs=1e-8)
+        assert t_critical(0.95, dof) == pytest.approx(t, rel=1e-8)
+    for dof, t in T_995.items():
+        assert t_pvalue(t, dof) == pytest.approx(0.01, abs=1e-8)
+    # one degree of freedom is the Cauchy distribution
+    for t in (0.3, 1.0, 4.0):
+        assert t_pvalue(t, 1) == pytest.approx(1 - 2 / math.pi * math.atan(t))
+
+
+def test_ols_against_lstsq():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 10, 40)
+    y = 3 + 0.5 * x + rng.normal(0, 1, 40)
+    fit = ols(np.r_[x, np.nan], np.r_[y, 1.0])
+
+    design = np.column_stack([np.ones_like(x), x])
+    coef, rss, _, _ = np.linalg.lstsq(design, y, rcond=None)
+    sigma2 = rss[0] / (len(x) - 2)
+    se = np.sqrt(np.diag(sigma2 * np.linalg.inv(design.T @ design)))
+
+    assert fit.n == 40
+    np.testing.assert_allclose([fit.intercept, fit.slope], coef)
+    np.testing.assert_allclose([fit.se_intercept, fit.se_slope], se)
+    assert fit.r2 == pytest.approx(np.corrcoef(x, y)[0, 1] ** 2)
+    assert fit.p_slope == pytest.approx(t_pvalue(coef[1] / se[1], 38))
+    low, high = fit.band([fit.x_mean])
+    half = t_critical(0.95, 38) * math.sqrt(sigma2 / len(x))
+    np.testing.assert_allclose([low[0], high[0]], fit.predict([fit.x_mean])[0] + np.array([-half, half]))
+
+
+def test_huber_resists_outliers():
+    x = np.arange(30, dtype=float)
+    y = 1 + 2 * x + np.random.default_rng(1).normal(0, 0.5, 30)
+    y[[5, 20]] += 60
+    assert abs(robust(x, y).slope - 2) < abs(ols(x, y).slope - 2)
+    assert robust(x, y).slope == pytest.approx(2, abs=0.1)
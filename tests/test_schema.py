@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from parsing.cache import load_frame, save_frame
+from parsing.schema import LOG_SHEET, WEEKLY_SHEET, apply_schema, apply_schemas
+
+
+def weekly_sheet():
+    return pd.DataFrame({
+        "Year": [2025, 2025, 2025],
+        "Week": [1, 2, 54],
+        "Yearweek": [20251, 20252, 202554],
+        "Totals kg": [1500.0, 2250.5, np.nan],
+        "Weight avg kg": [69.8, 70.1, 70.3],
+        "Notes": ["x", "y", None],
+        "km run": ["5", "n/a", 7.5],
+    })
+
+
+def test_float_downcast_is_lossless():
+    typed, _ = apply_schema(weekly_sheet(), WEEKLY_SHEET)
+    assert typed["Totals kg"].dtype == np.float32
+    # 69.8 has no exact float32: kept as float64, so it prints as 69.8
+    assert typed["Weight avg kg"].dtype == np.float64
+    assert typed["Weight avg kg"].tolist() == [69.8, 70.1, 70.3]
+    np.testing.assert_array_equal(typed["Totals kg"].astype(np.float64), weekly_sheet()["Totals kg"])
+    assert typed["Year"].dtype == np.int16 and typed["Yearweek"].dtype == np.int32
+
+
+def test_npz_round_trip(tmp_path):
+    typed, _ = apply_schema(weekly_sheet(), WEEKLY_SHEET)
+    save_frame(typed, str(tmp_path / "weekly.npz"))
+    pd.testing.assert_frame_equal(load_frame(str(tmp_path / "weekly.npz")), typed)
+
+
+def test_bad_cells_reported():
+    log = pd.DataFrame({"Date": ["2025-01-06", "soon"], "Week": [2, None], "Day.1": [1, 9],
+                        "Group": ["Leg", 3], "Total": [100.0, 200.0]})
+    with pytest.warns(UserWarning, match="bad cells"):
+        typed, report = apply_schemas({WEEKLY_SHEET: weekly_sheet(), LOG_SHEET: log})
+    weekly, typed_log = typed[WEEKLY_SHEET], typed[LOG_SHEET]
+
+    problems = set(zip(report["sheet"], report["column"], report["problem"]))
+    assert problems == {
+        (WEEKLY_SHEET, "Week", "outside 1-53"),
+        (WEEKLY_SHEET, "km run", "not a number"),
+        (LOG_SHEET, "Date", "not a date"),
+        (LOG_SHEET, "Week", "missing"),
+        (LOG_SHEET, "Day.1", "outside 1-7"),
+    }
+    assert weekly["km run"].tolist()[0] == 5.0 and np.isnan(weekly["km run"].iloc[1])
+    assert weekly["Notes"].tolist()[:2] == ["x", "y"]
+    assert str(typed_log["Week"].dtype) == "Int8" and typed_log["Week"].isna().tolist() == [False, True]
+    assert typed_log["Group"].dtype == "category" and typed_log["Group"].tolist() == ["Leg", "3"]
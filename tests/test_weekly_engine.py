@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from parsing.main import read_stats
+from parsing.weekly_engine import LOG_SHEET, WEEKLY_SHEET, derive_weekly_summary, rebuild_weekly_sheet
+from utils.features import MUSCLES
+
+WORKBOOK = os.path.join(os.path.dirname(__file__), os.pardir, "data", "fitness_stats.xlsx")
+# the sheet's formulas over the log; body weight and energy also come from other sources
+LOG_COLUMNS = ["Totals kg", "Mins gym"] + [f"{m} {c}" for m in MUSCLES for c in ("kg", "sets", "tons")]
+
+
+def test_matches_workbook_weekly_sheet():
+    sheets = read_stats(WORKBOOK)
+    derived = derive_weekly_summary(sheets[LOG_SHEET])
+    sheet = sheets[WEEKLY_SHEET].set_index("Yearweek").loc[derived["Yearweek"]]
+    assert len(derived)
+    np.testing.assert_allclose(derived[LOG_COLUMNS].astype(float), sheet[LOG_COLUMNS].astype(float), rtol=1e-6)
+
+    rebuilt = rebuild_weekly_sheet(sheets)[WEEKLY_SHEET]
+    assert list(rebuilt.columns) == list(sheets[WEEKLY_SHEET].columns)
+    # weeks the log does not cover keep their spreadsheet values
+    other = ~rebuilt["Yearweek"].isin(derived["Yearweek"])
+    pd.testing.assert_frame_equal(
+        rebuilt.loc[other, LOG_COLUMNS].astype(float).reset_index(drop=True),
+        sheets[WEEKLY_SHEET].loc[other.to_numpy(), LOG_COLUMNS].astype(float).reset_index(drop=True))
+
+
+def test_daily_values_counted_once_per_date():
+    log = pd.DataFrame({
+        "Date": pd.to_datetime(["2025-03-03", "2025-03-03", "2025-03-04", "2025-03-10"]),
+        "Group": ["Leg", "Chest", "Leg", "Back"],
+        "Total": [100.0, np.nan, 300.0, 50.0],
+        "Volume set Series": [3, 2, 4, 1],
+        "Volume set Reps": [10, 10, 10, 10],
+        "Volume set kg": [5.0, 10.0, 7.5, 5.0],
+        "Duration mins": [60.0, 60.0, 45.0, 30.0],
+        "Weight": [70.0, 70.0, 71.0, 72.0],
+    })
+    weekly = derive_weekly_summary(log)
+    assert weekly["Yearweek"].tolist() == [202510, 202511]
+    assert weekly["Chest kg"].tolist() == [200.0, 0.0]    # recomputed from the volume set
+    assert weekly["Leg sets"].tolist() == [7.0, 0.0]
+    assert weekly["Totals kg"].tolist() == [600.0, 50.0]
+    assert weekly["Mins gym"].tolist() == [105.0, 30.0]
+    assert weekly["Weight avg kg"].tolist() == [70.5, 72.0]
+    assert weekly["km run"].isna().all()
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from parsing.workload import team_log, workload_model
+
+
+def log_frame(rows):
+    df = pd.DataFrame(rows, columns=["Date", "Group", "Total"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    for part in ("Series", "Reps", "kg"):
+        df[f"Volume set {part}"] = np.nan
+    return df
+
+
+LOG = log_frame([
+    ("2025-03-03", "Leg", 1000.0),
+    ("2025-03-04", "Chest", 500.0),
+    ("2025-03-04", "Cardio", 900.0),   # not a muscle group: ignored
+    ("2025-03-05", "Leg", 1000.0),
+    ("2025-03-09", "Leg", 700.0),
+])
+
+
+def test_acwr_by_hand():
+    model = workload_model(LOG)
+    leg = model.xs("Leg", axis=1, level="Group")
+    assert leg["load"].tolist() == [1000.0, 0, 1000.0, 0, 0, 0, 700.0]
+
+    # EWMAs from a rest day: alpha 2/8 (acute), 2/29 (chronic)
+    acute = [250.0, 187.5, 390.625]
+    chronic = [2000 / 29]
+    chronic += [chronic[-1] * 27 / 29, chronic[-1] * 27 / 29 * 27 / 29 + 2000 / 29]
+    np.testing.assert_allclose(leg["acute"][:3], acute)
+    np.testing.assert_allclose(leg["chronic"][:3], chronic)
+    assert leg["acwr"].iloc[0] == pytest.approx(3.625)
+    np.testing.assert_allclose(leg["acwr"][:3], np.divide(acute, chronic))
+
+    # the chest has no load on the first day: no ratio yet
+    assert np.isnan(model[("acwr", "Chest")].iloc[0])
+    np.testing.assert_allclose(model[("load", "Total")], [1000.0, 500.0, 1000.0, 0, 0, 0, 700.0])
+
+
+def test_monotony_and_strain():
+    leg = workload_model(LOG).xs("Leg", axis=1, level="Group")
+    assert leg["monotony"][:6].isna().all()
+    week = np.array([1000.0, 0, 1000.0, 0, 0, 0, 700.0])
+    assert leg["monotony"].iloc[6] == pytest.approx(week.mean() / week.std(ddof=1))
+    assert leg["strain"].iloc[6] == pytest.approx(week.sum() * week.mean() / week.std(ddof=1))
+
+
+def test_team_matches_single_athletes():
+    other = log_frame([("2025-03-05", "Back", 800.0), ("2025-03-06", "Back", 400.0)])
+    team = workload_model(team_log({"ann": LOG, "bob": other}), athlete_col="Athlete")
+    ann = workload_model(LOG)
+    pd.testing.assert_series_equal(team[("acwr", "ann", "Leg")], ann[("acwr", "Leg")], check_names=False)
+    # bob's days before his first session are empty
+    assert team[("acute", "bob", "Back")][:2].isna().all()
+    assert team[("acute", "bob", "Back")].iloc[2] == pytest.approx(200.0)
@@ -0,0 +1,136 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.isoweeks import split_yearweek, week_start_dates
+
+# level -> pandas period frequency of the week's Monday (week level is keyed by Yearweek)
+LEVELS = {"week": None, "month": "M", "quarter": "Q", "year": "Y"}
+FREQ_ALIASES = {"W": "week", "M": "month", "ME": "month", "Q": "quarter", "QE": "quarter",
+                "Y": "year", "YE": "year"}
+
+KEY_COLUMNS = ["Year", "Week", "Yearweek"]
+# full-history z-score: every appended week rescales all past values, so it cannot be
+# summed incrementally (period sums follow from the Fatigue_raw sums and counts)
+NON_ADDITIVE = ["Fatigue"]
+
+
+def level_name(freq):
+    """
+    "quarter", "Q" or "QE" -> "quarter".
+    """
+    return freq if freq in LEVELS else FREQ_ALIASES[freq]
+
+
+def measure_columns(df):
+    """
+    Numeric weekly columns the cube aggregates.
+    """
+    return [c for c in df.columns
+            if c not in KEY_COLUMNS + NON_ADDITIVE and pd.api.types.is_numeric_dtype(df[c])]
+
+
+def _chronological(index):
+    year, week = split_yearweek(index.to_numpy())
+    return index[np.lexsort((week, year))]
+
+
+class AggregationCube:
+    """
+    Sums and non-missing counts of every measure column per week, month, quarter
+    and year (by the ISO week's Monday). Means are sums / counts.
+
+    update() takes new or edited weekly rows and only adds the difference to
+    the periods they fall in, so appending a week touches four cells per column.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.sums = {}
+        self.counts = {}
+        for level in LEVELS:
+            index = pd.Index([], dtype=np.int64, name="Yearweek") if level == "week" else \
+                pd.PeriodIndex([], freq=LEVELS[level], name=level)
+            self.sums[level] = pd.DataFrame(0.0, index=index, columns=self.columns)
+            self.counts[level] = pd.DataFrame(0, index=index, columns=self.columns, dtype=np.int32)
+
+    @classmethod
+    def build(cls, df):
+        cube = cls(measure_columns(df))
+        cube.update(df)
+        return cube
+
+    def _keys(self, yearweeks, level):
+        if level == "week":
+            return pd.Index(yearweeks, name="Yearweek")
+        return week_start_dates(yearweeks).to_period(LEVELS[level]).rename(level)
+
+    def update(self, rows):
+        """
+        Add new weeks / replace edited ones (rows of the weekly frame).
+        """
+        rows = rows.drop_duplicates("Yearweek", keep="last")
+        yearweeks = rows["Yearweek"].to_numpy(dtype=np.int64)
+        values = rows.reindex(columns=self.columns).astype(np.float64)
+
+        weeks = pd.Index(yearweeks, name="Yearweek")
+        old_sums = self.sums["week"].reindex(weeks, fill_value=0.0).to_numpy()
+        old_counts = self.counts["week"].reindex(weeks, fill_value=0).to_numpy()
+        delta_sums = values.fillna(0.0).to_numpy() - old_sums
+        delta_counts = values.notna().to_numpy(dtype=np.int32) - old_counts
+
+        for level in LEVELS:
+            keys = self._keys(yearweeks, level)
+            ds = pd.DataFrame(delta_sums, index=keys, columns=self.columns).groupby(level=0).sum()
+            dc = pd.DataFrame(delta_counts, index=keys, columns=self.columns).groupby(level=0).sum()
+            sums = self.sums[level].add(ds, fill_value=0.0)
+            counts = self.counts[level].add(dc, fill_value=0).astype(np.int32)
+            order = _chronological(sums.index) if level == "week" else sums.index.sort_values()
+            self.sums[level], self.counts[level] = sums.loc[order], counts.loc[order]
+        return self
+
+    # --------------------------
+    # Queries
+    # --------------------------
+    def sum(self, level="week", columns=None):
+        return self.sums[level_name(level)][columns or self.columns]
+
+    def count(self, level="week", columns=None):
+        return self.counts[level_name(level)][columns or self.columns]
+
+    def mean(self, level="week", columns=None):
+        counts = self.count(level, columns)
+        return self.sum(level, columns) / counts.where(counts > 0)
+
+    def labels(self, level="week"):
+        """
+        Period labels as strings: Yearweek codes, '2025-03', '2025Q1', '2025'.
+        """
+        return self.sums[level_name(level)].index.astype(str)
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    def save(self, file):
+        arrays = {"columns": np.array(self.columns, dtype=str)}
+        for level in LEVELS:
+            index = self.sums[level].index
+            arrays[f"{level}_index"] = index.to_numpy(dtype=np.int64) if level == "week" else index.asi8
+            arrays[f"{level}_sums"] = self.sums[level].to_numpy()
+            arrays[f"{level}_counts"] = self.counts[level].to_numpy()
+        with open(file + ".tmp", "wb") as fh:
+            np.savez_compressed(fh, **arrays)
+        os.replace(file + ".tmp", file)
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file) as data:
+            cube = cls(data["columns"].tolist())
+            for level in LEVELS:
+                raw = data[f"{level}_index"]
+                index = pd.Index(raw, name="Yearweek") if level == "week" else \
+                    pd.PeriodIndex.from_ordinals(raw, freq=LEVELS[level]).rename(level)
+                cube.sums[level] = pd.DataFrame(data[f"{level}_sums"], index=index, columns=cube.columns)
+                cube.counts[level] = pd.DataFrame(data[f"{level}_counts"], index=index, columns=cube.columns)
+        return cube
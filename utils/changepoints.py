@@ -0,0 +1,205 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.features import MUSCLES
+
+CHANGEPOINT_COLUMNS = ["Weight avg kg", "Totals kg", *[f"{m} kg" for m in MUSCLES], "Fatigue"]
+METHODS = ["pelt", "binseg"]
+# shortest segment (weeks); a plateau needs at least two weeks to be one
+MIN_SIZE = 2
+# penalty per change point, in units of noise variance * log(n) (2 is BIC)
+PENALTY_SCALE = 3.0
+
+
+# --------------------------
+# Segment cost
+# --------------------------
+class SegmentCost:
+    """
+    Sum of squared deviations from the segment mean (Gaussian change in mean)
+    of any x[start:end], in O(1) from cumulative sums of x and x**2. Works on
+    arrays of starts / ends at once.
+    """
+
+    def __init__(self, x):
+        x = np.asarray(x, dtype=float)
+        # centered, so the cumulative sums do not lose precision on long series
+        x = x - x.mean() if len(x) else x
+        self.n = len(x)
+        self.s1 = np.concatenate([[0.0], np.cumsum(x)])
+        self.s2 = np.concatenate([[0.0], np.cumsum(x * x)])
+
+    def __call__(self, start, end):
+        length = end - start
+        total = self.s1[end] - self.s1[start]
+        return self.s2[end] - self.s2[start] - total * total / length
+
+
+def noise_variance(x):
+    """
+    Robust variance of the noise around a piecewise-constant mean: MAD of the
+    first differences (a shift only moves one difference), / sqrt(2).
+    """
+    diff = np.diff(np.asarray(x, dtype=float))
+    if len(diff) == 0:
+        return 0.0
+    sigma = 1.4826 * np.median(np.abs(diff - np.median(diff))) / math.sqrt(2)
+    if not sigma > 0:
+        sigma = np.std(diff) / math.sqrt(2)
+    return sigma * sigma
+
+
+def default_penalty(x, scale=PENALTY_SCALE):
+    return scale * noise_variance(x) * math.log(max(len(x), 2))
+
+
+# --------------------------
+# Search
+# --------------------------
+def pelt(x, penalty=None, min_size=MIN_SIZE):
+    """
+    Exact penalized segmentation (Killick et al. 2012, PELT): minimizes the
+    total segment cost + penalty per change point. Candidates that can no
+    longer start the last segment are pruned, which keeps it near O(n);
+    with a minimum segment length a candidate is only pruned once the split
+    that beats it can itself start a segment (min_size weeks later);
+    each step evaluates all remaining candidates in one vectorized cost call.
+
+    Returns
+    -------
+    list of int
+        Positions where a new segment starts (0 < position < len(x)).
+    """
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    if n < 2 * min_size:
+        return []
+    penalty = default_penalty(x) if penalty is None else penalty
+    cost = SegmentCost(x)
+
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    last = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+    # starts beaten by a split at `end`, dropped once that split can be used (end + min_size)
+    beaten = {}
+    for end in range(min_size, n + 1):
+        start = end - min_size
+        if start >= min_size:
+            candidates = np.append(candidates[~np.isin(candidates, beaten.pop(start))], start)
+        fits = best[candidates] + cost(candidates, end)
+        k = np.argmin(fits)
+        best[end] = fits[k] + penalty
+        last[end] = candidates[k]
+        beaten[end] = candidates[fits > best[end]]
+
+    breaks = []
+    end = last[n]
+    while end > 0:
+        breaks.append(int(end))
+        end = last[end]
+    return breaks[::-1]
+
+
+def binary_segmentation(x, penalty=None, min_size=MIN_SIZE):
+    """
+    Greedy top-down segmentation: split a segment at its best point while the
+    cost drops by more than the penalty. The gains of all split points of a
+    segment come from one vectorized cost call, so a balanced split tree is
+    O(n log n). Faster than pelt() but not guaranteed optimal.
+    """
+    x = np.asarray(x, dtype=float)
+    penalty = default_penalty(x) if penalty is None else penalty
+    cost = SegmentCost(x)
+
+    breaks = []
+    stack = [(0, len(x))]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2 * min_size:
+            continue
+        splits = np.arange(start + min_size, end - min_size + 1)
+        gains = cost(start, end) - cost(start, splits) - cost(splits, end)
+        k = np.argmax(gains)
+        if gains[k] <= penalty:
+            continue
+        breaks.append(int(splits[k]))
+        stack += [(start, int(splits[k])), (int(splits[k]), end)]
+    return sorted(breaks)
+
+
+SEARCHES = {"pelt": pelt, "binseg": binary_segmentation}
+
+
+def changepoints(values, method="pelt", penalty=None, min_size=MIN_SIZE):
+    """
+    Change points of a series with gaps: missing values are skipped and the
+    positions refer back to the original series.
+
+    Parameters
+    ----------
+    values : array-like
+    method : str
+        "pelt" (exact) or "binseg" (binary segmentation)
+    penalty : float
+        Cost of one change point, default PENALTY_SCALE * noise variance * log(n)
+    min_size : int
+        Shortest segment, in observed values
+
+    Returns
+    -------
+    list of int
+        Positions in `values` where a new segment starts.
+    """
+    values = np.asarray(values, dtype=float)
+    observed = np.flatnonzero(np.isfinite(values))
+    breaks = SEARCHES[method](values[observed], penalty, min_size)
+    return [int(observed[b]) for b in breaks]
+
+
+def segment_means(values, breaks):
+    """
+    Mean of every segment between consecutive breaks, repeated over the
+    segment (NaN where values are missing): the piecewise-constant fit.
+    """
+    values = np.asarray(values, dtype=float)
+    fitted = np.full(len(values), np.nan)
+    bounds = [0, *breaks, len(values)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        segment = values[start:end]
+        if np.isfinite(segment).any():
+            fitted[start:end] = np.nanmean(segment)
+    return np.where(np.isfinite(values), fitted, np.nan)
+
+
+# --------------------------
+# Weekly series
+# --------------------------
+def detect(df, columns=CHANGEPOINT_COLUMNS, method="pelt", penalty_scale=PENALTY_SCALE, min_size=MIN_SIZE):
+    """
+    {column: change point positions} for weekly columns of a FeatureStore
+    (derived columns such as Fatigue included) or DataFrame, in base order.
+    """
+    found = {}
+    for column in columns:
+        values = np.asarray(df[column], dtype=float)
+        observed = values[np.isfinite(values)]
+        found[column] = changepoints(values, method, default_penalty(observed, penalty_scale), min_size)
+    return found
+
+
+def changepoint_table(df, columns=CHANGEPOINT_COLUMNS, method="pelt"):
+    """
+    One row per change point: the series, the Yearweek where the new level
+    starts and the segment means before / after.
+    """
+    rows = []
+    yearweeks = np.asarray(df["Yearweek"])
+    for column, breaks in detect(df, columns, method).items():
+        fitted = pd.Series(segment_means(df[column], breaks)).ffill().bfill().to_numpy()
+        for b in breaks:
+            rows.append({"Series": column, "Yearweek": int(yearweeks[b]),
+                         "Before": fitted[b - 1], "After": fitted[b], "Shift": fitted[b] - fitted[b - 1]})
+    return pd.DataFrame(rows, columns=["Series", "Yearweek", "Before", "After", "Shift"])
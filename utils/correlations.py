@@ -0,0 +1,133 @@
+import hashlib
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from utils.features import as_feature_store
+
+METHODS = ["pearson", "spearman"]
+MAX_LAG = 4
+MIN_PERIODS = 3
+KEY_COLUMNS = ["Year", "Week", "Yearweek"]
+# derived columns worth correlating along with the sheet's numeric columns
+EXTRA_COLUMNS = ["Weight_change", "Fatigue"]
+
+MAX_CACHED = 16
+_cube_cache = {}
+
+
+def _standardize(values):
+    """
+    NaN-aware z-scores per column; missing cells become 0 plus a validity mask.
+    """
+    mask = ~np.isnan(values)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        # all-empty columns just come out as NaN correlations
+        warnings.simplefilter("ignore", RuntimeWarning)
+        z = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0)
+    return np.where(mask, z, 0.0), mask.astype(float)
+
+
+def _lagged_corr(z, mask, lag, min_periods):
+    """
+    Pairwise-complete Pearson r of every column at t vs every column at t + lag,
+    as a handful of matrix products (no per-pair loop).
+    """
+    x, mx = z[:len(z) - lag], mask[:len(z) - lag]
+    y, my = z[lag:], mask[lag:]
+
+    n = mx.T @ my
+    sx, sy = x.T @ my, mx.T @ y
+    sxx, syy = (x * x).T @ my, mx.T @ (y * y)
+    sxy = x.T @ y
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sy
+        var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        r = cov / np.sqrt(var)
+    r[(n < min_periods) | ~(var > 0)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+class CorrelationCube:
+    """
+    Correlations of every column pair at lags 0..max_lag, for each method.
+
+    values[method][k, i, j] = corr(column i this week, column j k weeks later).
+    Spearman ranks each column once over all its weeks (pandas ranks per pair),
+    which only differs when two columns have missing weeks at different places.
+    """
+
+    def __init__(self, frame, max_lag=MAX_LAG, min_periods=MIN_PERIODS):
+        self.columns = list(frame.columns)
+        self.lags = list(range(max_lag + 1))
+        data = {"pearson": frame.to_numpy(dtype=float),
+                "spearman": frame.rank().to_numpy(dtype=float)}
+        self.values = {}
+        for method, values in data.items():
+            z, mask = _standardize(values)
+            self.values[method] = np.stack([_lagged_corr(z, mask, lag, min_periods) for lag in self.lags])
+
+    def matrix(self, method="pearson", lag=0, rows=None, columns=None):
+        """
+        One lag as a DataFrame: rows at week t, columns at week t + lag.
+        """
+        r = pd.DataFrame(self.values[method][self.lags.index(lag)], index=self.columns, columns=self.columns)
+        return r.loc[rows or self.columns, columns or self.columns]
+
+    def pair(self, x, y, method="pearson"):
+        """
+        corr(x this week, y k weeks later) for every lag k.
+        """
+        i, j = self.columns.index(x), self.columns.index(y)
+        return pd.Series(self.values[method][:, i, j], index=pd.Index(self.lags, name="lag"), name=f"{x} -> {y}")
+
+    def strongest(self, method="pearson", lag=None, top=10):
+        """
+        Strongest |r| pairs (diagonal excluded at lag 0), as a long table.
+        """
+        cube = self.values[method]
+        k, i, j = np.meshgrid(self.lags, range(len(self.columns)), range(len(self.columns)), indexing="ij")
+        table = pd.DataFrame({
+            "lag": k.ravel(),
+            "x": np.array(self.columns, dtype=object)[i.ravel()],
+            "y": np.array(self.columns, dtype=object)[j.ravel()],
+            "r": cube.ravel(),
+        })
+        table = table[~((table["lag"] == 0) & (table["x"] == table["y"])) & table["r"].notna()]
+        if lag is not None:
+            table = table[table["lag"] == lag]
+        return table.reindex(table["r"].abs().sort_values(ascending=False).index).head(top)
+
+
+def numeric_columns(df):
+    """
+    Numeric weekly columns (keys excluded) plus EXTRA_COLUMNS.
+    """
+    features = as_feature_store(df)
+    base = features.base
+    cols = [c for c in base.columns
+            if c not in KEY_COLUMNS and pd.api.types.is_numeric_dtype(base[c])]
+    return cols + [c for c in EXTRA_COLUMNS if c not in cols and c in features]
+
+
+def correlation_cube(df, columns=None, max_lag=MAX_LAG, min_periods=MIN_PERIODS):
+    """
+    CorrelationCube of the weekly frame (chronological order), cached by a hash
+    of the data, the columns and the parameters.
+    """
+    features = as_feature_store(df)
+    frame = features.frame(columns or numeric_columns(features)).astype(float)
+
+    digest = hashlib.sha256(np.ascontiguousarray(frame.to_numpy()).tobytes())
+    digest.update(repr((list(frame.columns), max_lag, min_periods)).encode())
+    key = digest.hexdigest()
+
+    cube = _cube_cache.get(key)
+    if cube is None:
+        if len(_cube_cache) >= MAX_CACHED:
+            _cube_cache.clear()
+        cube = CorrelationCube(frame, max_lag, min_periods)
+        _cube_cache[key] = cube
+    return cube
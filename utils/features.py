@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import AggregationCube
+from utils.isoweeks import week_start_dates
+from utils.utils import TONS_COLUMNS
+
+MUSCLES = ["Leg", "Chest", "Back", "Shoulders", "Biceps", "Core"]
+ROLLING_WINDOW = 4
+
+# name -> function(store) returning a Series aligned with store.base.
+# Dependencies are read through the store, so they are computed lazily too.
+FEATURES = {}
+
+
+def feature(name):
+    def register(func):
+        FEATURES[name] = func
+        return func
+    return register
+
+
+def fatigue_raw(df):
+    """
+    Unscaled fatigue proxy: weighted lifting, gym time and running.
+    """
+    return (
+        df["Totals kg"] * 0.6 +
+        df["Mins gym"] * 0.3 +
+        df["km run"] * 10
+    )
+
+
+# --------------------------
+# Feature definitions
+# --------------------------
+for _kg, _tons in TONS_COLUMNS.items():
+    FEATURES[_tons] = lambda s, kg=_kg: s[kg] / 1000
+
+for _m in MUSCLES:
+    FEATURES[f"{_m} kg per set"] = lambda s, m=_m: s[f"{m} kg"] / s[f"{m} sets"]
+
+@feature("Weight_change")
+def _weight_change(s):
+    return s["Weight avg kg"].diff()
+
+@feature("Protein_per_kg")
+def _protein_per_kg(s):
+    return s["Proteins daily avg"] / s["Weight avg kg"]
+
+@feature("Fatigue_raw")
+def _fatigue_raw(s):
+    return fatigue_raw(s)
+
+@feature("Fatigue")
+def _fatigue(s):
+    raw = s["Fatigue_raw"]
+    return (raw - raw.mean()) / raw.std()
+
+@feature("Fatigue_causal")
+def _fatigue_causal(s):
+    # z-score against the weeks up to and including each week (no look-ahead)
+    raw = s["Fatigue_raw"]
+    expanding = raw.expanding()
+    return (raw - expanding.mean()) / expanding.std()
+
+for _src, _dst in [("Weight avg kg", "Weight_rolling4"),
+                   ("kcals daily avg", "kcals_rolling4"),
+                   ("Fatigue", "Fatigue_rolling4")]:
+    FEATURES[_dst] = lambda s, src=_src: s[src].rolling(ROLLING_WINDOW, min_periods=1).mean()
+
+for _src, _dst in [("Weight avg kg", "Weight_ewm4"), ("Fatigue_raw", "Fatigue_raw_ewm4")]:
+    FEATURES[_dst] = lambda s, src=_src: s[src].ewm(span=ROLLING_WINDOW, adjust=False, ignore_na=True).mean()
+
+
+class FeatureStore:
+    """
+    Weekly frame + lazily derived columns, shared by every chart.
+
+    The base frame is put in chronological order once (Yearweek is not zero
+    padded, so it does not sort correctly as a number). Each derived column in
+    FEATURES is computed at most once, on first access. frame() hands out
+    column selections of the shared data instead of full copies; with pandas
+    copy-on-write a caller modifying them never touches the store.
+
+    log optionally carries the daily log (Full Calendar Log) for the charts
+    working on days rather than weeks; None when it was not loaded.
+    """
+
+    def __init__(self, df, log=None):
+        order = np.argsort(week_start_dates(df["Yearweek"]).to_numpy(), kind="stable")
+        if np.all(order[1:] > order[:-1]):
+            self.base = df
+        else:
+            self.base = df.iloc[order].reset_index(drop=True)
+        self.log = log
+        self._computed = {}
+        self._cube = None
+
+    def __getitem__(self, name):
+        if name in self.base.columns:
+            return self.base[name]
+        if name not in self._computed:
+            if name not in FEATURES:
+                raise KeyError(name)
+            self._computed[name] = FEATURES[name](self).rename(name)
+        return self._computed[name]
+
+    def __contains__(self, name):
+        return name in self.base.columns or name in FEATURES
+
+    @property
+    def computed(self):
+        """
+        Names of the derived columns materialized so far.
+        """
+        return list(self._computed)
+
+    @property
+    def cube(self):
+        """
+        Week/month/quarter/year aggregates of the base columns (plus the tons
+        columns when the sheet lacks them), built on first access unless one was
+        handed over (e.g. the incrementally updated one).
+        """
+        if self._cube is None:
+            tons = [c for c in TONS_COLUMNS.values() if c not in self.base.columns]
+            self._cube = AggregationCube.build(self.frame(list(self.base.columns) + tons))
+        return self._cube
+
+    @cube.setter
+    def cube(self, cube):
+        self._cube = cube
+
+    def frame(self, columns):
+        """
+        DataFrame with the requested base and derived columns, in base order.
+        """
+        return pd.DataFrame({c: self[c] for c in columns}, index=self.base.index, copy=False)
+
+
+def as_feature_store(df):
+    """
+    Accept either a FeatureStore or a weekly DataFrame (wrapped on the fly).
+    """
+    return df if isinstance(df, FeatureStore) else FeatureStore(df)
+
+
+def as_frame(df):
+    """
+    Plain weekly DataFrame for functions working on the whole sheet.
+    """
+    return df.base if isinstance(df, FeatureStore) else df
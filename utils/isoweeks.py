@@ -0,0 +1,101 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MAX_CACHED = 32
+
+_dates_cache = {}
+
+
+def to_yearweek(year, week):
+    """
+    Workbook Yearweek code, not zero padded: (2026, 1) -> 20261, (2025, 48) -> 202548.
+    Works on scalars and arrays.
+    """
+    year = np.asarray(year, dtype=np.int64)
+    week = np.asarray(week, dtype=np.int64)
+    return np.where(week < 10, year * 10 + week, year * 100 + week)
+
+
+def split_yearweek(yearweeks):
+    """
+    Inverse of to_yearweek(): (year, week) int arrays.
+    """
+    yw = np.asarray(yearweeks, dtype=np.int64)
+    long = yw >= 100000
+    return np.where(long, yw // 100, yw // 10), np.where(long, yw % 100, yw % 10)
+
+
+def yearweek_mask(yearweeks, start=None, end=None):
+    """
+    Boolean mask of start <= Yearweek <= end, compared as (year, week) since
+    the codes are not zero padded; a None bound is open.
+    """
+    year, week = split_yearweek(yearweeks)
+    key = year * 100 + week
+    mask = np.ones(len(key), dtype=bool)
+    for bound, keep in ((start, np.greater_equal), (end, np.less_equal)):
+        if bound is not None:
+            y, w = split_yearweek(bound)
+            mask &= keep(key, y * 100 + w)
+    return mask
+
+
+def dates_to_yearweek(dates):
+    """
+    ISO (Year, Week, Yearweek) arrays for a datetime Series.
+    """
+    iso = dates.dt.isocalendar()
+    year = iso["year"].to_numpy(dtype=np.int64)
+    week = iso["week"].to_numpy(dtype=np.int64)
+    return year, week, to_yearweek(year, week)
+
+
+@lru_cache(maxsize=8)
+def _week1_mondays(first_year, last_year):
+    """
+    Lookup table: Monday of ISO week 1 for every year in [first_year, last_year].
+    """
+    jan4 = (np.arange(first_year, last_year + 1) - 1970).astype("datetime64[Y]").astype("datetime64[D]") + 3
+    weekday = (jan4.astype(np.int64) + 3) % 7     # 1970-01-01 was a Thursday; Monday = 0
+    return jan4 - weekday
+
+
+def iso_week_start(year, week):
+    """
+    Monday of ISO (year, week), as datetime64[D] array.
+    Week 53 of a 52-week ISO year (the workbook numbers some year-end weeks
+    that way) lands on the Monday of the next year's week 1 instead of failing.
+    """
+    year = np.asarray(year, dtype=np.int64)
+    week = np.asarray(week, dtype=np.int64)
+    if year.size == 0:
+        return np.array([], dtype="datetime64[D]")
+    y0 = int(year.min())
+    table = _week1_mondays(y0, int(year.max()))
+    return table[year - y0] + (week - 1) * 7
+
+
+def week_start_dates(yearweeks):
+    """
+    Memoized DatetimeIndex of ISO Monday dates for a Yearweek array.
+    The same array (by content) always returns the same, shared index.
+    """
+    yw = np.ascontiguousarray(yearweeks, dtype=np.int64)
+    key = yw.tobytes()
+    dates = _dates_cache.get(key)
+    if dates is None:
+        if len(_dates_cache) >= MAX_CACHED:
+            _dates_cache.clear()
+        dates = pd.DatetimeIndex(iso_week_start(*split_yearweek(yw)).astype("datetime64[ns]"))
+        _dates_cache[key] = dates
+    return dates
+
+
+def week_months(yearweeks):
+    return week_start_dates(yearweeks).to_period("M")
+
+
+def week_quarters(yearweeks):
+    return week_start_dates(yearweeks).to_period("Q")
@@ -0,0 +1,190 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from utils.features import ROLLING_WINDOW, fatigue_raw
+
+# source column -> rolling-mean column
+ROLLING_COLUMNS = {
+    "Weight avg kg": "Weight_rolling4",
+    "kcals daily avg": "kcals_rolling4",
+    "Fatigue_raw": "Fatigue_raw_rolling4",
+}
+# source column -> EWMA column (span = ROLLING_WINDOW)
+EWMA_COLUMNS = {
+    "Weight avg kg": "Weight_ewm4",
+    "Fatigue_raw": "Fatigue_raw_ewm4",
+}
+OUTPUT_COLUMNS = ["Fatigue_raw", "Fatigue_causal", *ROLLING_COLUMNS.values(), *EWMA_COLUMNS.values()]
+
+
+def _missing(x):
+    return x is None or (isinstance(x, float) and math.isnan(x)) or x is pd.NA
+
+
+# --------------------------
+# Building blocks
+# --------------------------
+class RunningMoments:
+    """
+    Welford running count / mean / sum of squared deviations; NaN is skipped.
+    """
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n, self.mean, self.m2 = n, mean, m2
+
+    def add(self, x):
+        if _missing(x):
+            return
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Moments of a whole array at once (vectorized, same result as repeated add()).
+        """
+        v = np.asarray(values, dtype=float)
+        v = v[~np.isnan(v)]
+        if not v.size:
+            return cls()
+        mean = v.mean()
+        return cls(int(v.size), float(mean), float(np.square(v - mean).sum()))
+
+    @property
+    def std(self):
+        # ddof=1, as Series.std()
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else math.nan
+
+    def zscore(self, x):
+        return (x - self.mean) / self.std if self.n > 1 else x * math.nan
+
+    def to_list(self):
+        return [self.n, self.mean, self.m2]
+
+
+class RollingMean:
+    """
+    Mean of the last `window` values; NaNs are skipped like rolling(window, min_periods=1).
+    """
+
+    def __init__(self, window=ROLLING_WINDOW, values=()):
+        self.values = deque(values, maxlen=window)
+
+    def add(self, x):
+        self.values.append(math.nan if _missing(x) else float(x))
+        return self.value
+
+    @property
+    def value(self):
+        seen = [v for v in self.values if not math.isnan(v)]
+        return sum(seen) / len(seen) if seen else math.nan
+
+
+class EWMA:
+    """
+    Exponentially weighted mean, y = (1 - alpha) * y + alpha * x, started at the
+    first value; NaN keeps the previous value (pandas ewm(span, adjust=False, ignore_na=True)).
+    """
+
+    def __init__(self, span=ROLLING_WINDOW, value=math.nan):
+        self.alpha = 2 / (span + 1)
+        self.value = value
+
+    def add(self, x):
+        if not _missing(x):
+            self.value = float(x) if math.isnan(self.value) else \
+                self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+# --------------------------
+# Weekly engine
+# --------------------------
+class OnlineWeeklyStats:
+    """
+    Running state over the weekly rows, updated in O(1) per appended week.
+
+    update(row) returns that week's "as of" values: Fatigue_raw, the causal
+    Fatigue z-score (against the weeks seen so far), the rolling means and the
+    EWMAs. fatigue(raw) gives the full-history z-score from the current moments.
+    """
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        self.moments = RunningMoments()
+        self.rolling = {src: RollingMean(window) for src in ROLLING_COLUMNS}
+        self.ewma = {src: EWMA(window) for src in EWMA_COLUMNS}
+
+    def update(self, row):
+        out = {}
+        raw = fatigue_raw(row)
+        out["Fatigue_raw"] = raw = math.nan if _missing(raw) else float(raw)
+        self.moments.add(raw)
+        out["Fatigue_causal"] = self.moments.zscore(raw)
+
+        values = {**row, "Fatigue_raw": raw}
+        for src, dst in ROLLING_COLUMNS.items():
+            out[dst] = self.rolling[src].add(values[src])
+        for src, dst in EWMA_COLUMNS.items():
+            out[dst] = self.ewma[src].add(values[src])
+        return out
+
+    def run(self, df):
+        """
+        update() over every row of df (chronological order); returns the outputs as a frame.
+        """
+        sources = ["Totals kg", "Mins gym", "km run", *ROLLING_COLUMNS, *EWMA_COLUMNS]
+        sources = [c for c in dict.fromkeys(sources) if c != "Fatigue_raw"]
+        rows = df[sources].astype(float).to_dict("records")
+        return pd.DataFrame([self.update(r) for r in rows], index=df.index, columns=OUTPUT_COLUMNS)
+
+    def fatigue(self, raw):
+        """
+        Full-history z-score: every week against the moments of all weeks seen.
+        """
+        return self.moments.zscore(raw)
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    def to_state(self):
+        """
+        JSON-serializable state.
+        """
+        return {
+            "window": self.window,
+            "moments": self.moments.to_list(),
+            "rolling": {src: list(r.values) for src, r in self.rolling.items()},
+            "ewma": {src: e.value for src, e in self.ewma.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls(state["window"])
+        engine.moments = RunningMoments(*state["moments"])
+        for src, values in state["rolling"].items():
+            engine.rolling[src] = RollingMean(engine.window, values)
+        for src, value in state["ewma"].items():
+            engine.ewma[src] = EWMA(engine.window, value)
+        return engine
+
+    @classmethod
+    def from_history(cls, df, window=ROLLING_WINDOW):
+        """
+        State after the rows of df, rebuilt from their derived columns
+        (vectorized moments, last window - 1 values, last EWMA values).
+        """
+        engine = cls(window)
+        if not len(df):
+            return engine
+        engine.moments = RunningMoments.from_values(df["Fatigue_raw"])
+        for src in ROLLING_COLUMNS:
+            engine.rolling[src] = RollingMean(window, df[src].astype(float).iloc[max(0, len(df) - (window - 1)):])
+        for src, dst in EWMA_COLUMNS.items():
+            engine.ewma[src] = EWMA(window, float(df[dst].iloc[-1]))
+        return engine
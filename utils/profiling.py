@@ -0,0 +1,199 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# FITNESS_STATS_PROFILE=<prefix> turns profiling on for the whole run and writes
+# <prefix>.json (per-stage summary) and <prefix>.trace.json (chrome://tracing) at exit
+PROFILE_ENV = "FITNESS_STATS_PROFILE"
+
+_state = {"enabled": False, "events": [], "stack": [], "output": None}
+_lock = threading.Lock()
+
+
+class _Frame:
+    __slots__ = ("name", "category", "ts_us", "wall0", "cpu0", "mem0", "peak_seen")
+
+
+def is_enabled():
+    return _state["enabled"]
+
+
+def enable(output=None, trace_memory=True):
+    """
+    Start recording stages. With `output` (a path prefix) the reports are
+    written automatically when the interpreter exits.
+    """
+    _state["enabled"] = True
+    _state["output"] = output
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    _state["enabled"] = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def reset():
+    """
+    Drop the recorded events.
+    """
+    with _lock:
+        _state["events"] = []
+    _state["stack"] = []
+
+
+def drain():
+    """
+    Return the recorded events and clear them (used to ship them out of worker processes).
+    """
+    with _lock:
+        events, _state["events"] = _state["events"], []
+    return events
+
+
+def merge(events):
+    """
+    Add events recorded elsewhere (e.g. in a render worker process).
+    """
+    with _lock:
+        _state["events"].extend(events)
+
+
+def _memory():
+    return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+
+@contextmanager
+def stage(name, category="stage"):
+    """
+    Record wall time, CPU time and peak traced memory of the enclosed block.
+    A no-op while profiling is disabled.
+    """
+    if not _state["enabled"]:
+        yield
+        return
+
+    stack = _state["stack"]
+    current, peak = _memory()
+    if stack:
+        # tracemalloc has a single peak counter: fold it into the parent before resetting
+        stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+    frame = _Frame()
+    frame.name, frame.category = name, category
+    frame.ts_us = time.time_ns() // 1000
+    frame.mem0, frame.peak_seen = current, current
+    frame.cpu0 = time.thread_time()
+    frame.wall0 = time.perf_counter()
+    stack.append(frame)
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - frame.wall0
+        cpu = time.thread_time() - frame.cpu0
+        peak = max(frame.peak_seen, _memory()[1])
+        stack.pop()
+        if stack:
+            stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        with _lock:
+            _state["events"].append({
+                "name": name,
+                "cat": category,
+                "ts": frame.ts_us,
+                "dur": wall * 1e6,
+                "cpu_s": cpu,
+                "peak_mb": (peak - frame.mem0) / 2**20,
+                "depth": len(stack),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+
+def traced(category="stage", name=None):
+    """
+    Decorator: run the function inside stage(<qualified name>, category).
+    """
+    def wrap(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+            with stage(label, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return wrap
+
+
+# --------------------------
+# Reports
+# --------------------------
+def summary(events=None):
+    """
+    Per-stage totals, slowest first. Times are inclusive of nested stages.
+    """
+    events = _state["events"] if events is None else events
+    stages = {}
+    for e in events:
+        s = stages.setdefault(e["name"], {"name": e["name"], "category": e["cat"], "calls": 0,
+                                          "wall_s": 0.0, "cpu_s": 0.0, "peak_mb": 0.0})
+        s["calls"] += 1
+        s["wall_s"] += e["dur"] / 1e6
+        s["cpu_s"] += e["cpu_s"]
+        s["peak_mb"] = max(s["peak_mb"], e["peak_mb"])
+    top = [e for e in events if e["depth"] == 0]
+    return {
+        "total_wall_s": sum(e["dur"] for e in top) / 1e6,
+        "stages": sorted(stages.values(), key=lambda s: s["wall_s"], reverse=True),
+    }
+
+
+def chrome_trace(events=None):
+    """
+    Events in the Chrome trace-event format (load in chrome://tracing or Perfetto).
+    """
+    events = _state["events"] if events is None else events
+    return {
+        "traceEvents": [
+            {"name": e["name"], "cat": e["cat"], "ph": "X", "ts": e["ts"], "dur": e["dur"],
+             "pid": e["pid"], "tid": e["tid"],
+             "args": {"cpu_s": round(e["cpu_s"], 6), "peak_mb": round(e["peak_mb"], 3)}}
+            for e in sorted(events, key=lambda e: e["ts"])
+        ],
+        "displayTimeUnit": "ms",
+    }
+
+
+def write_reports(prefix):
+    """
+    Write <prefix>.json and <prefix>.trace.json; returns both paths.
+    """
+    events = list(_state["events"])
+    files = (f"{prefix}.json", f"{prefix}.trace.json")
+    for file, content in zip(files, (summary(events), chrome_trace(events))):
+        with open(file, "w") as fh:
+            json.dump(content, fh, indent=1)
+    return files
+
+
+def _write_at_exit():
+    if _state["output"] and _state["events"]:
+        write_reports(_state["output"])
+
+
+atexit.register(_write_at_exit)
+
+if os.environ.get(PROFILE_ENV):
+    enable(os.environ[PROFILE_ENV])
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from utils.isoweeks import dates_to_yearweek, iso_week_start, split_yearweek
+
+# kcal of surplus per kg of body weight (the workbook's 'Projected weight kg' uses the same)
+KCAL_PER_KG = 8000
+# recent complete weeks the model's intake, activity and resting rate are taken from
+CALIBRATION_WEEKS = 8
+PROJECTION_WEEKS = 12
+# default scenarios: this many daily intakes within +/- INTAKE_SPREAD kcal of the recent one
+N_SCENARIOS = 1001
+INTAKE_SPREAD = 500
+FAN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+ENERGY_COLUMNS = ["Weight avg kg", "Weekly total cal surplus (deficit)", "Resting energy kcal", "Active energy kcal"]
+
+
+class EnergyModel:
+    """
+    Weekly energy balance from the last actual week:
+
+        w[t+1] = w[t] + 7 * (intake - resting_per_kg * w[t] - active) / kcal_per_kg
+
+    intake, active and resting energy are daily kcal; resting energy follows
+    body weight, so a fixed intake converges to (intake - active) / resting_per_kg.
+    """
+
+    def __init__(self, weight, yearweek, intake, active, resting_per_kg, kcal_per_kg=KCAL_PER_KG):
+        self.weight = weight
+        self.yearweek = yearweek
+        self.intake = intake
+        self.active = active
+        self.resting_per_kg = resting_per_kg
+        self.kcal_per_kg = kcal_per_kg
+
+    def as_dict(self):
+        return {k: float(getattr(self, k)) for k in
+                ["weight", "yearweek", "intake", "active", "resting_per_kg", "kcal_per_kg"]}
+
+    def __repr__(self):
+        return (f"EnergyModel({self.weight:.1f} kg in {self.yearweek}: intake {self.intake:.0f}, "
+                f"active {self.active:.0f}, resting {self.resting_per_kg:.1f}/kg kcal/day)")
+
+
+def energy_model(df, weeks=CALIBRATION_WEEKS, kcal_per_kg=KCAL_PER_KG):
+    """
+    EnergyModel calibrated on the last `weeks` weeks with weight, surplus,
+    resting and active energy all filled in. Daily intake is recovered from the
+    surplus (surplus / 7 + resting + active, as the sheet defines it).
+
+    df is a FeatureStore or weekly DataFrame, in chronological order.
+    """
+    data = df[ENERGY_COLUMNS + ["Yearweek"]] if isinstance(df, pd.DataFrame) else \
+        pd.DataFrame({c: df[c] for c in ENERGY_COLUMNS + ["Yearweek"]})
+    data = data.astype({c: np.float64 for c in ENERGY_COLUMNS})
+    complete = data.dropna(subset=ENERGY_COLUMNS).tail(weeks)
+    if complete.empty:
+        raise ValueError("No week with weight, surplus, resting and active energy to calibrate on")
+
+    intake = complete["Weekly total cal surplus (deficit)"] / 7 + complete["Resting energy kcal"] \
+        + complete["Active energy kcal"]
+    last = data.dropna(subset=["Weight avg kg"]).iloc[-1]
+    return EnergyModel(
+        weight=last["Weight avg kg"],
+        yearweek=int(last["Yearweek"]),
+        intake=intake.mean(),
+        active=complete["Active energy kcal"].mean(),
+        resting_per_kg=(complete["Resting energy kcal"] / complete["Weight avg kg"]).median(),
+        kcal_per_kg=kcal_per_kg,
+    )
+
+
+def hindcast(df, kcal_per_kg=KCAL_PER_KG):
+    """
+    One-week-ahead projection: last week's weight plus this week's surplus
+    (what the sheet's 'Projected weight kg' holds), as a Series.
+    """
+    weight = df["Weight avg kg"].astype(np.float64)
+    return weight.shift(1) + df["Weekly total cal surplus (deficit)"].astype(np.float64) / kcal_per_kg
+
+
+# --------------------------
+# Scenarios
+# --------------------------
+def scenario_grid(intake, active):
+    """
+    Every (intake, active) combination, as two flat arrays of the same length.
+    """
+    intake, active = np.meshgrid(np.asarray(intake, dtype=float), np.asarray(active, dtype=float), indexing="ij")
+    return intake.ravel(), active.ravel()
+
+
+def simulate(model, intake=None, active=None, weeks=PROJECTION_WEEKS):
+    """
+    Weight paths of many scenarios at once.
+
+    The recurrence is linear, so week t has the closed form
+    eq + (w0 - eq) * a**t with a = 1 - 7 * resting_per_kg / kcal_per_kg and
+    eq = (intake - active) / resting_per_kg: one broadcast over scenarios x
+    weeks, no loop.
+
+    Parameters
+    ----------
+    model : EnergyModel
+    intake, active : float or array
+        Daily kcal per scenario (broadcast against each other); default the model's
+    weeks : int
+        Weeks to project
+
+    Returns
+    -------
+    np.ndarray
+        Shape broadcast(intake, active) + (weeks + 1,); [..., 0] is the last actual weight.
+    """
+    intake = np.asarray(model.intake if intake is None else intake, dtype=float)
+    active = np.asarray(model.active if active is None else active, dtype=float)
+    net = (intake - active)[..., None]
+    t = np.arange(weeks + 1)
+    if model.resting_per_kg <= 0:
+        return model.weight + 7 * net / model.kcal_per_kg * t
+    a = 1 - 7 * model.resting_per_kg / model.kcal_per_kg
+    eq = net / model.resting_per_kg
+    return eq + (model.weight - eq) * a ** t
+
+
+def future_yearweeks(yearweek, weeks):
+    """
+    Yearweek codes of yearweek and the `weeks` weeks after it.
+    """
+    start = iso_week_start(*split_yearweek([yearweek]))[0]
+    dates = pd.Series(start + np.arange(weeks + 1) * np.timedelta64(7, "D")).astype("datetime64[ns]")
+    return dates_to_yearweek(dates)[2]
+
+
+def projection_fan(df, intake=None, active=None, weeks=PROJECTION_WEEKS, quantiles=FAN_QUANTILES, model=None):
+    """
+    Quantiles over scenarios of the projected weight, week by week.
+
+    Default scenarios: N_SCENARIOS daily intakes within +/- INTAKE_SPREAD kcal
+    of the recent intake, at the recent activity. Pass arrays (e.g. from
+    scenario_grid) to explore other targets.
+
+    Returns
+    -------
+    pd.DataFrame
+        Yearweek plus one column per quantile (e.g. 'q50'); the first row is the
+        last actual week.
+    """
+    model = model or energy_model(df)
+    if intake is None:
+        intake = model.intake + np.linspace(-INTAKE_SPREAD, INTAKE_SPREAD, N_SCENARIOS)
+    paths = simulate(model, intake, active, weeks).reshape(-1, weeks + 1)
+    fan = pd.DataFrame(np.quantile(paths, quantiles, axis=0).T, columns=[f"q{round(q * 100)}" for q in quantiles])
+    fan.insert(0, "Yearweek", future_yearweeks(model.yearweek, weeks))
+    return fan
@@ -0,0 +1,191 @@
+import math
+
+import numpy as np
+
+CONFIDENCE = 0.95
+HUBER_C = 1.345
+N_BOOT = 1000
+
+
+# --------------------------
+# Student t distribution (no scipy dependency)
+# --------------------------
+def _betacf(a, b, x, max_iter=200, eps=3e-16):
+    # continued fraction of the incomplete beta function (modified Lentz)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)),
+                   -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1.0 + aa * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + aa / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < eps:
+            break
+    return h
+
+
+def _betainc(a, b, x):
+    """
+    Regularized incomplete beta function I_x(a, b).
+    """
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_pvalue(t, dof):
+    """
+    Two-sided p-value of a t statistic.
+    """
+    if dof <= 0 or not np.isfinite(t):
+        return math.nan if not np.isinf(t) else 0.0
+    return _betainc(dof / 2, 0.5, dof / (dof + t * t))
+
+
+def t_critical(level, dof):
+    """
+    t such that P(|T| < t) = level (bisection on t_pvalue).
+    """
+    if dof <= 0:
+        return math.nan
+    lo, hi = 0.0, 1.0
+    while t_pvalue(hi, dof) > 1 - level:
+        hi *= 2
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if t_pvalue(mid, dof) > 1 - level:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+# --------------------------
+# Fits
+# --------------------------
+class LinearFit:
+    """
+    y = intercept + slope * x, with standard errors, r2 and t-test p-values.
+    """
+
+    def __init__(self, x, y, weights=None, method="ols"):
+        w = np.ones_like(x) if weights is None else weights
+        sw = w.sum()
+        self.method = method
+        self.n = len(x)
+        self.dof = self.n - 2
+        self.x_mean = (w * x).sum() / sw
+        y_mean = (w * y).sum() / sw
+        self.sxx = (w * (x - self.x_mean) ** 2).sum()
+        sxy = (w * (x - self.x_mean) * (y - y_mean)).sum()
+        syy = (w * (y - y_mean) ** 2).sum()
+
+        self.slope = sxy / self.sxx if self.sxx > 0 else math.nan
+        self.intercept = y_mean - self.slope * self.x_mean
+        residuals = y - self.predict(x)
+        rss = (w * residuals ** 2).sum()
+        self.r2 = 1 - rss / syy if syy > 0 else math.nan
+        self.r = math.copysign(math.sqrt(max(self.r2, 0.0)), self.slope) if np.isfinite(self.r2) else math.nan
+        self.sigma = math.sqrt(rss / self.dof) if self.dof > 0 else math.nan
+        self._sw = sw
+
+        self.se_slope = self.sigma / math.sqrt(self.sxx) if self.sxx > 0 else math.nan
+        self.se_intercept = self.sigma * math.sqrt(1 / sw + self.x_mean ** 2 / self.sxx) if self.sxx > 0 else math.nan
+        self.t_slope = self.slope / self.se_slope if self.se_slope else math.nan
+        self.p_slope = t_pvalue(self.t_slope, self.dof)
+        self.p_intercept = t_pvalue(self.intercept / self.se_intercept if self.se_intercept else math.nan, self.dof)
+
+    def predict(self, x):
+        return self.intercept + self.slope * np.asarray(x, dtype=float)
+
+    def band(self, x, level=CONFIDENCE):
+        """
+        Analytic confidence band of the mean response at x: (low, high).
+        """
+        x = np.asarray(x, dtype=float)
+        half = t_critical(level, self.dof) * self.sigma * np.sqrt(1 / self._sw + (x - self.x_mean) ** 2 / self.sxx)
+        fit = self.predict(x)
+        return fit - half, fit + half
+
+    def as_dict(self):
+        stats = ["slope", "intercept", "r", "r2", "se_slope", "se_intercept", "p_slope", "p_intercept", "sigma"]
+        return {"method": self.method, "n": self.n, **{k: float(getattr(self, k)) for k in stats}}
+
+    def __repr__(self):
+        return (f"LinearFit({self.method}: y = {self.intercept:.4g} + {self.slope:.4g} x, "
+                f"r2={self.r2:.3f}, p={self.p_slope:.3g}, n={self.n})")
+
+
+def _xy(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = np.isfinite(x) & np.isfinite(y)
+    return x[ok], y[ok]
+
+
+def ols(x, y):
+    """
+    Ordinary least squares on the complete (x, y) pairs.
+    """
+    return LinearFit(*_xy(x, y))
+
+
+def robust(x, y, c=HUBER_C, max_iter=50, tol=1e-8):
+    """
+    Huber M-estimate by iteratively reweighted least squares (scale = MAD of the
+    residuals). Standard errors / p-values are those of the final weighted fit.
+    """
+    x, y = _xy(x, y)
+    weights = np.ones_like(x)
+    fit = LinearFit(x, y, method="huber")
+    for _ in range(max_iter):
+        residuals = y - fit.predict(x)
+        scale = 1.4826 * np.median(np.abs(residuals - np.median(residuals)))
+        if not scale > 0:
+            break
+        u = np.abs(residuals) / (c * scale)
+        new = np.where(u <= 1, 1.0, 1.0 / np.maximum(u, 1e-12))
+        # normalized to sum to n, so sigma and the standard errors keep OLS units
+        new *= len(x) / new.sum()
+        previous = (fit.slope, fit.intercept)
+        weights = new
+        fit = LinearFit(x, y, weights, method="huber")
+        if abs(fit.slope - previous[0]) + abs(fit.intercept - previous[1]) < tol * (1 + abs(fit.intercept)):
+            break
+    fit.weights = weights
+    return fit
+
+
+def bootstrap_band(x, y, grid, level=CONFIDENCE, n_boot=N_BOOT, seed=0):
+    """
+    Percentile band of the OLS line over `grid`, all resamples fitted in one
+    NumPy batch (what seaborn's regplot does one resample at a time).
+    """
+    x, y = _xy(x, y)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(x), size=(n_boot, len(x)))
+    xb, yb = x[idx], y[idx]
+    xc = xb - xb.mean(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (xc * (yb - yb.mean(axis=1, keepdims=True))).sum(axis=1) / (xc ** 2).sum(axis=1)
+    intercept = yb.mean(axis=1) - slope * xb.mean(axis=1)
+    lines = intercept[:, None] + slope[:, None] * np.asarray(grid, dtype=float)[None, :]
+    tail = (1 - level) / 2 * 100
+    return tuple(np.nanpercentile(lines, [tail, 100 - tail], axis=0))
+
+
+def fit_line(x, y, method="ols"):
+    return robust(x, y) if method == "huber" else ols(x, y)
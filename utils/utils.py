@@ -1,17 +1,37 @@
-import pandas as pd
+from utils.isoweeks import week_start_dates
+
+TONS_COLUMNS = {
+    "Totals kg": "Totals tons",
+    "Leg kg": "Leg tons",
+    "Chest kg": "Chest tons",
+    "Back kg": "Back tons",
+    "Shoulders kg": "Shoulders tons",
+    "Biceps kg": "Biceps tons",
+    "Core kg": "Core tons",
+}
+
+def add_tons_columns(df):
+    """
+    Add the '<muscle> tons' columns (kg / 1000) in place and return df.
+    """
+    for kg_col, tons_col in TONS_COLUMNS.items():
+        df[tons_col] = df[kg_col] / 1000
+    return df
 
 def yearweek_to_yyyymmm(yw):
     """
     Convert Yearweek numeric format (YYYYW or YYYYWW) to 'YYYY-MMM'.
     Example:
-        20252  -> '2025-Feb'
+        20252  -> '2025-Jan'
         202410 -> '2024-Mar'  (week 10 of 2024)
     """
-    yw = str(int(yw))  # ensure string
-    year = int(yw[:4])
-    week = int(yw[4:])
-    
-    # Convert ISO week to datetime (Monday of that week)
-    dt = pd.to_datetime(f'{year}-W{week}-1', format='%G-W%V-%u')
-    
-    return dt.strftime('%Y-%b')
\ No newline at end of file
+    # Monday of the ISO week (vectorized helper, one element)
+    dt = week_start_dates([int(yw)])[0]
+
+    return dt.strftime('%Y-%b')
+
+def yearweeks_to_yyyymmm(yearweeks):
+    """
+    Vectorized yearweek_to_yyyymmm for a whole Yearweek column.
+    """
+    return week_start_dates(yearweeks).strftime('%Y-%b')
\ No newline at end of file